@@ -1,55 +1,334 @@
 """
 Configuración del Apple Stock Scraper
-Carga y valida variables de entorno
+Carga y valida variables de entorno, con recarga en caliente de .env
 """
 
-from dotenv import load_dotenv
+from dotenv import load_dotenv, dotenv_values
+import logging
 import os
+import threading
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger('AppleStockBot')
+
+# Archivo de configuración vigilado por Config.reload_if_changed()
+CONFIG_FILE = os.getenv('CONFIG_FILE', '.env')
+
+# Entorno real del proceso: en las recargas sigue teniendo prioridad sobre .env
+_PROCESS_ENV = dict(os.environ)
 
 # Cargar variables de entorno desde .env
-load_dotenv()
+load_dotenv(CONFIG_FILE)
+
+
+def _read_settings(getenv: Callable[..., Optional[str]]) -> Dict[str, Any]:
+    """
+    Lee todos los ajustes a partir de una función con la firma de os.getenv
+    
+    Args:
+        getenv: os.getenv en el arranque, o el .env releído en una recarga
+    
+    Returns:
+        dict: NOMBRE → valor ya convertido
+    
+    Raises:
+        ValueError: Si algún valor numérico no es válido
+    """
+    class Settings:
+        # === Scraping Configuration ===
+        APPLE_STORE_URL: str = getenv(
+            'APPLE_STORE_URL', 
+            'https://www.apple.com/shop/buy-iphone'
+        )
+        PLAYWRIGHT_HEADLESS: bool = getenv('PLAYWRIGHT_HEADLESS', 'false').lower() == 'true'
+        PLAYWRIGHT_DEBUG: bool = getenv('PLAYWRIGHT_DEBUG', 'false').lower() == 'true'  # Pausar con inspector
+        SCREENSHOT_ON_ERROR: bool = getenv('SCREENSHOT_ON_ERROR', 'true').lower() == 'true'
+        SAVE_SCREENSHOTS: bool = getenv('SAVE_SCREENSHOTS', 'true').lower() == 'true'
+        SAVE_API_DEBUG: bool = getenv('SAVE_API_DEBUG', 'false').lower() == 'true'  # Volcar api_response_debug.json
+        
+        # === Artifact Configuration ===
+        ARTIFACT_MAX_FILES: int = int(getenv('ARTIFACT_MAX_FILES', '50'))  # Máximo de archivos en screenshots/
+        ARTIFACT_MAX_MB: int = int(getenv('ARTIFACT_MAX_MB', '100'))  # Tamaño máximo de screenshots/
+        ERROR_SCREENSHOT_FULL_PAGE: bool = getenv('ERROR_SCREENSHOT_FULL_PAGE', 'false').lower() == 'true'
+        
+        # === Watch / Browser Pool Configuration ===
+        WATCH_INTERVAL_SEC: int = int(getenv('WATCH_INTERVAL_SEC', '300'))  # Intervalo del modo --watch
+        BROWSER_MAX_USES: int = int(getenv('BROWSER_MAX_USES', '20'))  # Scrapes antes de reciclar Chromium
+        BROWSER_MAX_RSS_MB: int = int(getenv('BROWSER_MAX_RSS_MB', '1024'))  # RSS de hijos que fuerza reciclado
+        BROWSER_PROFILE: str = getenv('BROWSER_PROFILE', 'default')  # Perfil de lanzamiento: default | lean | minimal
+        
+        # === HTTP API (modo --watch) ===
+        API_ENABLED: bool = getenv('API_ENABLED', 'false').lower() == 'true'  # Servir estado por HTTP
+        API_HOST: str = getenv('API_HOST', '127.0.0.1')
+        API_PORT: int = int(getenv('API_PORT', '8787'))
+        API_EVENTS_MAX: int = int(getenv('API_EVENTS_MAX', '500'))  # Eventos de cambio en memoria
+        API_MAX_WAIT_SEC: float = float(getenv('API_MAX_WAIT_SEC', '60'))  # Tope del long-poll
+        
+        # === Memory Profiling Configuration ===
+        MEMORY_PROFILING: bool = getenv('MEMORY_PROFILING', 'false').lower() == 'true'  # tracemalloc + RSS
+        MEMORY_TOP_N: int = int(getenv('MEMORY_TOP_N', '10'))  # Líneas con más crecimiento por muestra
+        MEMORY_TRACE_FRAMES: int = int(getenv('MEMORY_TRACE_FRAMES', '15'))  # Profundidad de trazas
+        LOAD_TEST_MAX_SCALING: float = float(getenv('LOAD_TEST_MAX_SCALING', '2.0'))  # --load-test: crecimiento por tienda
+        
+        # === Request Coalescing Configuration ===
+        FETCH_CACHE_TTL_SEC: int = int(getenv('FETCH_CACHE_TTL_SEC', '60'))  # Reutilizar resultados (producto, ubicación)
+        
+        # === Resilience Configuration ===
+        TIMEOUT_PERCENTILE: int = int(getenv('TIMEOUT_PERCENTILE', '95'))  # Percentil de latencia para timeouts
+        TIMEOUT_MULTIPLIER: float = float(getenv('TIMEOUT_MULTIPLIER', '2.0'))  # Margen sobre el percentil
+        LATENCY_WINDOW: int = int(getenv('LATENCY_WINDOW', '50'))  # Muestras recientes por operación
+        CIRCUIT_FAILURE_THRESHOLD: int = int(getenv('CIRCUIT_FAILURE_THRESHOLD', '3'))  # Fallos seguidos para abrir
+        CIRCUIT_BASE_BACKOFF_MIN: int = int(getenv('CIRCUIT_BASE_BACKOFF_MIN', '15'))
+        CIRCUIT_MAX_BACKOFF_MIN: int = int(getenv('CIRCUIT_MAX_BACKOFF_MIN', '360'))
+        
+        # === Rate Governor (peticiones/minuto a apple.com, compartido entre procesos) ===
+        RATE_LIMIT_ENABLED: bool = getenv('RATE_LIMIT_ENABLED', 'false').lower() == 'true'
+        RATE_HOST_PER_MIN: float = float(getenv('RATE_HOST_PER_MIN', '60'))  # Techo agregado por host
+        RATE_PRODUCT_PER_MIN: float = float(getenv('RATE_PRODUCT_PER_MIN', '12'))  # Páginas de producto
+        RATE_AUTOCOMPLETE_PER_MIN: float = float(getenv('RATE_AUTOCOMPLETE_PER_MIN', '30'))
+        RATE_FULFILLMENT_PER_MIN: float = float(getenv('RATE_FULFILLMENT_PER_MIN', '20'))  # fulfillment-messages
+        RATE_BURST: int = int(getenv('RATE_BURST', '5'))  # Capacidad de cada bucket
+        
+        # === Motor híbrido (fulfillment por HTTP con la petición capturada por el navegador) ===
+        HYBRID_ENABLED: bool = getenv('HYBRID_ENABLED', 'false').lower() == 'true'
+        HYBRID_TEMPLATE_TTL_MIN: float = float(getenv('HYBRID_TEMPLATE_TTL_MIN', '30'))  # Antes de recapturar
+        HYBRID_HTTP_TIMEOUT_SEC: float = float(getenv('HYBRID_HTTP_TIMEOUT_SEC', '10'))
+        
+        # === Proxies de salida (vacío = conexión directa) ===
+        PROXY_URLS: list = [u.strip() for u in getenv('PROXY_URLS', '').split(',') if u.strip()]
+        PROXY_FAILURES_TO_COOLDOWN: int = int(getenv('PROXY_FAILURES_TO_COOLDOWN', '2'))  # Fallos seguidos
+        PROXY_COOLDOWN_SEC: int = int(getenv('PROXY_COOLDOWN_SEC', '300'))  # Se duplica en cada enfriamiento
+        PROXY_MAX_COOLDOWN_SEC: int = int(getenv('PROXY_MAX_COOLDOWN_SEC', '3600'))
+        
+        # === Cache Configuration ===
+        CACHE_DIR: str = getenv('CACHE_DIR', 'cache')  # Directorio para caché
+        CACHE_ENABLED: bool = getenv('CACHE_ENABLED', 'true').lower() == 'true'  # Habilitar sistema de caché
+        RUN_LOCK_MODE: str = getenv('RUN_LOCK_MODE', 'skip')  # Con otra ejecución en curso: skip | wait
+        RUN_LOCK_TIMEOUT_SEC: int = int(getenv('RUN_LOCK_TIMEOUT_SEC', '600'))  # Espera máxima en modo wait
+        
+        # === Payload Archive Configuration ===
+        ARCHIVE_ENABLED: bool = getenv('ARCHIVE_ENABLED', 'false').lower() == 'true'  # Archivar respuestas crudas
+        ARCHIVE_DIR: str = getenv('ARCHIVE_DIR', os.path.join('cache', 'archive'))
+        ARCHIVE_RETENTION_DAYS: int = int(getenv('ARCHIVE_RETENTION_DAYS', '30'))  # 0 = conservar todo
+        
+        # === Target Configuration ===
+        TARGET_PRODUCT: str = getenv('TARGET_PRODUCT', 'iPhone 17')
+        TARGET_STATE: str = getenv('TARGET_STATE', 'Florida')
+        PRODUCT_URL: str = getenv(
+            'PRODUCT_URL',
+            'https://www.apple.com/shop/buy-iphone/iphone-17-pro/6.9-inch-display-256gb-silver-unlocked'
+        )
+        SEARCH_LOCATION: str = getenv('SEARCH_LOCATION', 'Miami')  # Texto para el buscador de tiendas
+        LOCATION_CACHE_ENABLED: bool = getenv('LOCATION_CACHE_ENABLED', 'true').lower() == 'true'  # Sin autocompletado
+        
+        # === Store Catalog Configuration ===
+        STORES_PER_SEARCH: int = int(getenv('STORES_PER_SEARCH', '12'))  # Tiendas que devuelve una búsqueda
+        STORE_RADIUS_MILES: float = float(getenv('STORE_RADIUS_MILES', '50'))  # Radio por defecto de --stores-near
+        ZIP_CENTROIDS_FILE: str = getenv('ZIP_CENTROIDS_FILE', '')  # CSV zip,lat,lon opcional
+        
+        # === Sweep Configuration (barrido multi-proceso) ===
+        SWEEP_PRODUCT_URLS: list = [u.strip() for u in getenv('SWEEP_PRODUCT_URLS', '').split(',') if u.strip()]
+        SWEEP_LOCATIONS: list = [l.strip() for l in getenv('SWEEP_LOCATIONS', '').split(',') if l.strip()]
+        SWEEP_PARTS: list = [p.strip() for p in getenv('SWEEP_PARTS', '').split(',') if p.strip()]  # Para el fan-out
+        SWEEP_FANOUT: bool = getenv('SWEEP_FANOUT', 'false').lower() == 'true'  # Una navegación + fetch() en paralelo
+        FANOUT_CONCURRENCY: int = int(getenv('FANOUT_CONCURRENCY', '6'))  # Peticiones simultáneas desde la página
+        SWEEP_WORKERS: int = int(getenv('SWEEP_WORKERS', '0'))  # 0 = núcleos disponibles
+        SWEEP_MAX_RETRIES: int = int(getenv('SWEEP_MAX_RETRIES', '2'))  # Reintentos por tarea si el worker cae
+        SWEEP_AUTO_COVER: bool = getenv('SWEEP_AUTO_COVER', 'false').lower() == 'true'  # Ubicaciones que cubren TARGET_STATE
+        
+        # === Output Configuration (--output=ndjson) ===
+        NDJSON_TARGET: str = getenv('NDJSON_TARGET', '-')  # '-' = stdout, ruta de FIFO o de archivo
+        NDJSON_MAX_MB: float = float(getenv('NDJSON_MAX_MB', '50'))  # Rotación del archivo (0 = sin rotar)
+        NDJSON_BACKUPS: int = int(getenv('NDJSON_BACKUPS', '5'))  # Archivos rotados a conservar
+        
+        # === Telegram Configuration ===
+        TELEGRAM_BOT_TOKEN: str = getenv('TELEGRAM_BOT_TOKEN', '')
+        TELEGRAM_CHAT_ID: str = getenv('TELEGRAM_CHAT_ID', '')
+        TELEGRAM_CHAT_IDS: list = [id.strip() for id in getenv('TELEGRAM_CHAT_ID', '').split(',') if id.strip()]
+        TELEGRAM_ENABLED: bool = getenv('TELEGRAM_ENABLED', 'true').lower() == 'true'
+        SUBSCRIPTIONS_FILE: str = getenv('SUBSCRIPTIONS_FILE', 'subscriptions.json')  # Suscripciones por chat
+        TELEGRAM_API_URL: str = getenv('TELEGRAM_API_URL', 'https://api.telegram.org')
+        
+        # === Notifier Configuration (todos los destinos configurados reciben los cambios a la vez) ===
+        NOTIFIER_TIMEOUT_SEC: float = float(getenv('NOTIFIER_TIMEOUT_SEC', '15'))  # Timeout por destino
+        EARLY_ALERT_ENABLED: bool = getenv('EARLY_ALERT_ENABLED', 'false').lower() == 'true'  # Notificar al interceptar
+        POST_WORKERS: int = int(getenv('POST_WORKERS', '4'))  # Hilos de post-procesado (caché, archivo, notificación)
+        WEBHOOK_URL: str = getenv('WEBHOOK_URL', '')  # POST JSON del conjunto de cambios
+        WEBHOOK_TIMEOUT_SEC: float = float(getenv('WEBHOOK_TIMEOUT_SEC', '5'))
+        NOTIFY_FILE: str = getenv('NOTIFY_FILE', '')  # Una línea JSON por notificación
+        NOTIFY_SOCKET: str = getenv('NOTIFY_SOCKET', '')  # 'unix:/ruta' o 'host:puerto'
+        
+    return {name: value for name, value in vars(Settings).items() if name.isupper()}
+
+
+def _file_mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class ConfigSnapshot:
+    """
+    Configuración inmutable en un momento dado
+    
+    Config.current() devuelve el snapshot vigente; quien necesite valores
+    coherentes durante toda una operación (un scrape) lo toma una vez al
+    empezar. Una recarga crea un snapshot nuevo, nunca modifica uno existente.
+    """
+    
+    __slots__ = ('_values', 'version', 'loaded_at')
+    
+    def __init__(self, values: Dict[str, Any], version: int):
+        object.__setattr__(self, '_values', MappingProxyType(dict(values)))
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'loaded_at', datetime.now().isoformat(timespec='seconds'))
+    
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"La configuración es inmutable: usa Config.override({name}=...)")
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """Copia de todos los valores"""
+        return dict(self._values)
+
+
+class _ConfigMeta(type):
+    """Resuelve Config.NOMBRE contra el snapshot vigente"""
+    
+    def __getattr__(cls, name: str) -> Any:
+        return getattr(cls._snapshot, name)
+    
+    def __setattr__(cls, name: str, value: Any) -> None:
+        if name.isupper():
+            raise AttributeError(f"Config es de solo lectura: usa Config.override({name}=...)")
+        super().__setattr__(name, value)
 
 
-class Config:
-    """Clase de configuración centralizada con validación"""
+class Config(metaclass=_ConfigMeta):
+    """
+    Clase de configuración centralizada con validación
     
-    # === Scraping Configuration ===
-    APPLE_STORE_URL: str = os.getenv(
-        'APPLE_STORE_URL', 
-        'https://www.apple.com/shop/buy-iphone'
-    )
-    PLAYWRIGHT_HEADLESS: bool = os.getenv('PLAYWRIGHT_HEADLESS', 'false').lower() == 'true'
-    PLAYWRIGHT_DEBUG: bool = os.getenv('PLAYWRIGHT_DEBUG', 'false').lower() == 'true'  # Pausar con inspector
-    SCREENSHOT_ON_ERROR: bool = os.getenv('SCREENSHOT_ON_ERROR', 'true').lower() == 'true'
-    SAVE_SCREENSHOTS: bool = os.getenv('SAVE_SCREENSHOTS', 'true').lower() == 'true'
+    Los ajustes viven en un ConfigSnapshot inmutable que se sustituye de forma
+    atómica: Config.NOMBRE siempre lee el snapshot vigente, así un proceso de
+    larga duración ve los cambios de .env en la siguiente verificación sin
+    reiniciarse. Las sobrescrituras de línea de comandos (--headless, ...) se
+    registran con Config.override() y sobreviven a las recargas.
+    """
     
-    # === Cache Configuration ===
-    CACHE_DIR: str = os.getenv('CACHE_DIR', 'cache')  # Directorio para caché
-    CACHE_ENABLED: bool = os.getenv('CACHE_ENABLED', 'true').lower() == 'true'  # Habilitar sistema de caché
+    _snapshot: ConfigSnapshot = ConfigSnapshot(_read_settings(os.getenv), version=1)
+    _overrides: Dict[str, Any] = {}
+    _lock = threading.Lock()
+    _mtime: Optional[float] = _file_mtime(CONFIG_FILE)
     
-    # === Target Configuration ===
-    TARGET_PRODUCT: str = os.getenv('TARGET_PRODUCT', 'iPhone 17')
-    TARGET_STATE: str = os.getenv('TARGET_STATE', 'Florida')
+    @classmethod
+    def current(cls) -> ConfigSnapshot:
+        """Snapshot vigente"""
+        return cls._snapshot
+    
+    @classmethod
+    def overrides(cls) -> Dict[str, Any]:
+        """Sobrescrituras activas (para reproducirlas en procesos worker)"""
+        return dict(cls._overrides)
+    
+    @classmethod
+    def override(cls, **values: Any) -> None:
+        """
+        Sobrescribe ajustes en este proceso (persisten tras las recargas)
+        
+        Args:
+            **values: NOMBRE=valor
+        
+        Raises:
+            AttributeError: Si algún nombre no es un ajuste conocido
+        """
+        with cls._lock:
+            current = cls._snapshot.as_dict()
+            unknown = [name for name in values if name not in current]
+            if unknown:
+                raise AttributeError(f"Ajustes desconocidos: {', '.join(unknown)}")
+            cls._overrides.update(values)
+            cls._snapshot = ConfigSnapshot({**current, **values}, cls._snapshot.version + 1)
     
-    # === Telegram Configuration ===
-    TELEGRAM_BOT_TOKEN: str = os.getenv('TELEGRAM_BOT_TOKEN', '')
-    TELEGRAM_CHAT_ID: str = os.getenv('TELEGRAM_CHAT_ID', '')
-    TELEGRAM_CHAT_IDS: list = [id.strip() for id in os.getenv('TELEGRAM_CHAT_ID', '').split(',') if id.strip()]
-    TELEGRAM_ENABLED: bool = os.getenv('TELEGRAM_ENABLED', 'true').lower() == 'true'
+    @classmethod
+    def reload_if_changed(cls) -> bool:
+        """
+        Recarga CONFIG_FILE si cambió su mtime (barato: un stat por llamada)
+        
+        Returns:
+            bool: True si se aplicó una configuración nueva
+        """
+        mtime = _file_mtime(CONFIG_FILE)
+        if mtime == cls._mtime:
+            return False
+        cls._mtime = mtime
+        return cls.reload()
+    
+    @classmethod
+    def reload(cls) -> bool:
+        """
+        Relee CONFIG_FILE, valida y sustituye el snapshot de forma atómica
+        
+        Si el archivo nuevo no es válido se conserva el snapshot anterior.
+        
+        Returns:
+            bool: True si se aplicó una configuración nueva
+        """
+        env = {k: v for k, v in dotenv_values(CONFIG_FILE).items() if v is not None}
+        env.update(_PROCESS_ENV)
+        
+        try:
+            values = {**_read_settings(lambda key, default=None: env.get(key, default)), **cls._overrides}
+            Config.validate(ConfigSnapshot(values, version=0))
+        except ValueError as e:
+            logger.error(f"❌ {CONFIG_FILE} inválido, se mantiene la configuración anterior: {e}")
+            return False
+        
+        with cls._lock:
+            previous = cls._snapshot
+            changed = sorted(k for k, v in values.items() if previous.as_dict().get(k) != v)
+            if not changed:
+                return False
+            cls._snapshot = ConfigSnapshot(values, previous.version + 1)
+        
+        logger.info(f"🔄 Configuración recargada (v{cls._snapshot.version}): {', '.join(changed)}")
+        return True
     
     @staticmethod
-    def validate() -> None:
+    def validate(snapshot: Optional[ConfigSnapshot] = None) -> None:
         """
         Valida que las configuraciones críticas estén presentes
         
+        Args:
+            snapshot: Configuración a validar (default: la vigente)
+        
         Raises:
             ValueError: Si falta alguna configuración crítica
         """
-        if not Config.APPLE_STORE_URL:
+        snapshot = snapshot or Config.current()
+        
+        if not snapshot.APPLE_STORE_URL:
             raise ValueError("❌ APPLE_STORE_URL no configurado")
         
-        if not Config.TARGET_PRODUCT:
+        if not snapshot.TARGET_PRODUCT:
             raise ValueError("❌ TARGET_PRODUCT no configurado")
+        
+        if snapshot.RUN_LOCK_MODE not in ('skip', 'wait'):
+            raise ValueError(f"❌ RUN_LOCK_MODE inválido: {snapshot.RUN_LOCK_MODE} (skip | wait)")
+        
+        if snapshot.BROWSER_PROFILE not in ('default', 'lean', 'minimal'):
+            raise ValueError(f"❌ BROWSER_PROFILE inválido: {snapshot.BROWSER_PROFILE} (default | lean | minimal)")
+        
+        for proxy in snapshot.PROXY_URLS:
+            if '://' not in proxy:
+                raise ValueError("❌ PROXY_URLS: cada proxy debe incluir esquema (http://, https://, socks5://)")
     
     @staticmethod
     def display_config() -> str:
@@ -62,19 +341,63 @@ class Config:
 🍎 Scraping:
    URL: {Config.APPLE_STORE_URL}
    Headless: {Config.PLAYWRIGHT_HEADLESS}
+   Perfil de lanzamiento: {Config.BROWSER_PROFILE}
+   Motor híbrido: {f'HTTP con plantilla de {Config.HYBRID_TEMPLATE_TTL_MIN:g} min, navegador al fallar' if Config.HYBRID_ENABLED else 'Deshabilitado (siempre navegador)'}
    Screenshots en error: {Config.SCREENSHOT_ON_ERROR}
    Guardar screenshots: {Config.SAVE_SCREENSHOTS}
+   Volcado API debug: {Config.SAVE_API_DEBUG}
+   Artefactos: máx. {Config.ARTIFACT_MAX_FILES} archivos / {Config.ARTIFACT_MAX_MB} MB
+
+👁️ Watch:
+   Intervalo: {Config.WATCH_INTERVAL_SEC}s
+   Recarga en caliente: {CONFIG_FILE} (v{Config.current().version}, {Config.current().loaded_at})
+   Reciclar navegador: {Config.BROWSER_MAX_USES} usos / {Config.BROWSER_MAX_RSS_MB} MB
+   API HTTP: {f'http://{Config.API_HOST}:{Config.API_PORT}' if Config.API_ENABLED else 'Deshabilitada'}
+
+🧠 Memoria:
+   Perfilado: {Config.MEMORY_PROFILING} (top {Config.MEMORY_TOP_N})
+   Prueba de carga: coste por tienda hasta ×{Config.LOAD_TEST_MAX_SCALING:g} al escalar
+
+🔗 Coalescencia:
+   TTL resultados: {Config.FETCH_CACHE_TTL_SEC}s
+
+🛡️ Resiliencia:
+   Límite de tasa: {f'{Config.RATE_HOST_PER_MIN:g}/min host, producto {Config.RATE_PRODUCT_PER_MIN:g}, autocompletado {Config.RATE_AUTOCOMPLETE_PER_MIN:g}, fulfillment {Config.RATE_FULFILLMENT_PER_MIN:g} (ráfaga {Config.RATE_BURST})' if Config.RATE_LIMIT_ENABLED else 'Deshabilitado'}
+   Timeouts: p{Config.TIMEOUT_PERCENTILE} × {Config.TIMEOUT_MULTIPLIER} (ventana {Config.LATENCY_WINDOW})
+   Circuit breaker: {Config.CIRCUIT_FAILURE_THRESHOLD} fallos, backoff {Config.CIRCUIT_BASE_BACKOFF_MIN}-{Config.CIRCUIT_MAX_BACKOFF_MIN} min
+   Proxies: {f'{len(Config.PROXY_URLS)} (enfriamiento tras {Config.PROXY_FAILURES_TO_COOLDOWN} fallos, {Config.PROXY_COOLDOWN_SEC}-{Config.PROXY_MAX_COOLDOWN_SEC}s)' if Config.PROXY_URLS else 'Conexión directa'}
 
 📦 Cache:
    Directorio: {Config.CACHE_DIR}
    Habilitado: {Config.CACHE_ENABLED}
+   Ejecución concurrente: {Config.RUN_LOCK_MODE}{f' (máx. {Config.RUN_LOCK_TIMEOUT_SEC}s)' if Config.RUN_LOCK_MODE == 'wait' else ''}
+   Archivo de payloads: {Config.ARCHIVE_DIR if Config.ARCHIVE_ENABLED else 'Deshabilitado'} ({Config.ARCHIVE_RETENTION_DAYS} días)
 
 🎯 Target:
    Producto: {Config.TARGET_PRODUCT}
    Estado: {Config.TARGET_STATE}
+   URL producto: {Config.PRODUCT_URL}
+   Ubicación: {Config.SEARCH_LOCATION}{' (resolución en caché)' if Config.LOCATION_CACHE_ENABLED else ''}
+   Tiendas por búsqueda: {Config.STORES_PER_SEARCH} (radio {Config.STORE_RADIUS_MILES:g} mi)
+
+🧵 Barrido:
+   Productos: {len(Config.SWEEP_PRODUCT_URLS) or 1}
+   Ubicaciones: {len(Config.SWEEP_LOCATIONS) or ('cobertura de ' + Config.TARGET_STATE if Config.SWEEP_AUTO_COVER else 1)}
+   Workers: {Config.SWEEP_WORKERS or 'auto'}
+   Fan-out: {f'{len(Config.SWEEP_PARTS) or 1} parte(s), {Config.FANOUT_CONCURRENCY} en paralelo' if Config.SWEEP_FANOUT else 'Deshabilitado'}
+
+📤 Salida NDJSON:
+   Destino: {'stdout' if Config.NDJSON_TARGET == '-' else Config.NDJSON_TARGET} (rota a {Config.NDJSON_MAX_MB:g} MB × {Config.NDJSON_BACKUPS})
 
 📱 Telegram:
    Habilitado: {Config.TELEGRAM_ENABLED}
    Bot Token: {'Configurado' if Config.TELEGRAM_BOT_TOKEN else 'No configurado'}
    Chat ID: {'Configurado' if Config.TELEGRAM_CHAT_ID else 'No configurado'}
+   Suscripciones: {Config.SUBSCRIPTIONS_FILE if os.path.exists(Config.SUBSCRIPTIONS_FILE) else 'No configuradas (envío a todos)'}
+
+🔔 Otros notificadores (timeout {Config.NOTIFIER_TIMEOUT_SEC:g}s):
+   Alerta temprana: {'Al interceptar la respuesta' if Config.EARLY_ALERT_ENABLED else 'Al terminar el scrape'} ({Config.POST_WORKERS} hilos de post-procesado)
+   Webhook: {Config.WEBHOOK_URL or 'No configurado'}
+   Archivo: {Config.NOTIFY_FILE or 'No configurado'}
+   Socket: {Config.NOTIFY_SOCKET or 'No configurado'}
 """
@@ -9,13 +9,21 @@ Uso:
     python main.py                    # Ejecutar scraper
     python main.py --headless=false   # Ejecutar con navegador visible
     python main.py --show-config      # Mostrar configuración actual
+    python main.py --sweep            # Barrido multi-proceso productos × ubicaciones
+    python main.py --replay <dir>     # Reprocesar payloads archivados sin navegador
+    python main.py --watch            # Proceso continuo con pool de navegadores
+    python main.py --stores-near ZIP  # Tiendas cercanas desde el catálogo local
+    python main.py --output=ndjson    # Registros JSON en streaming (stdout, FIFO o archivo)
+    python main.py --benchmark-launch # Comparar perfiles de lanzamiento de Chromium
 
 Autor: Apple Store Scraper
 Versión: 1.0.0
 Fecha: Enero 2026
 """
 
+import os
 import sys
+import time
 import argparse
 import json
 from typing import Optional
@@ -24,6 +32,10 @@ from datetime import datetime
 from config import Config
 from utils.logger import setup_logger
 from services.apple_scraper import AppleScraper
+from utils.metrics import RunMetrics
+from utils.memory_profiler import MemoryProfiler
+from utils.ndjson_writer import NdjsonWriter
+from utils.file_lock import FileLock
 
 # Inicializar logger global
 logger = setup_logger()
@@ -43,34 +55,29 @@ def run_scraper(show_browser: bool = False) -> dict:
     
     # Sobrescribir configuración si se especifica
     if show_browser:
-        Config.PLAYWRIGHT_HEADLESS = False
+        Config.override(PLAYWRIGHT_HEADLESS=False)
         logger.info("👀 Modo visible activado - Se mostrará el navegador")
     
     try:
+        metrics = RunMetrics('scrape')
+        profiler = MemoryProfiler()
+        
         # Crear instancia del scraper
-        scraper = AppleScraper()
+        scraper = AppleScraper(profiler=profiler)
         
         # 🔁 EJECUTAR FLUJO COMPLETO CON CACHÉ
         logger.info("🕷️ Iniciando flujo con caché...")
-        result = scraper.check_availability_with_cache()
+        with metrics.timer('scrape'):
+            result = scraper.check_availability_with_cache(on_alert=notify_changes)
         
         # Mostrar resultados
         display_results(result)
         
         # 🔔 SOLO ENVIAR NOTIFICACIÓN SI HAY CAMBIOS
-        if Config.TELEGRAM_ENABLED:
-            if result.get('should_alert', False):
-                logger.info("📱 HAY CAMBIOS - Enviando notificación a Telegram...")
-                try:
-                    from services.telegram_bot import TelegramBot
-                    telegram = TelegramBot()
-                    telegram.send_availability_report(result)
-                    logger.info("✅ Notificación enviada exitosamente")
-                except Exception as e:
-                    logger.error(f"❌ Error enviando notificación a Telegram: {e}", exc_info=True)
-            else:
-                logger.info("ℹ️ Sin cambios - No se enviará notificación a Telegram")
+        with metrics.timer('notify'):
+            notify_changes(result)
         
+        record_run_metrics(metrics, result, profiler)
         return result
         
     except Exception as e:
@@ -78,6 +85,185 @@ def run_scraper(show_browser: bool = False) -> dict:
         sys.exit(1)
 
 
+def run_sweep(show_browser: bool = False, output: Optional[NdjsonWriter] = None) -> dict:
+    """
+    Ejecuta un barrido productos × ubicaciones en varios procesos
+    
+    Los workers solo hacen scraping; el proceso padre combina los resultados,
+    actualiza el caché una vez y envía una única notificación.
+    
+    Args:
+        show_browser: Si True, muestra los navegadores durante el scraping
+        output: Writer NDJSON (las tiendas de cada tarea se emiten al recogerla;
+                los cambios y el resumen, tras actualizar el caché)
+    
+    Returns:
+        dict: Resultado combinado con información de cambios
+    """
+    logger.info("🧵 Iniciando barrido multi-proceso...")
+    
+    if show_browser:
+        Config.override(PLAYWRIGHT_HEADLESS=False)
+        logger.info("👀 Modo visible activado - Se mostrarán los navegadores")
+    
+    try:
+        from services.sweep_executor import SweepExecutor
+        from services.subscriptions import SubscriptionRegistry
+        
+        scraper = AppleScraper()
+        cache_age = scraper.cache_manager.get_cache_age()
+        
+        # Con suscripciones se consulta una vez la unión de todas ellas
+        registry = SubscriptionRegistry.load()
+        tasks = registry.queries() if registry else None
+        
+        if Config.SWEEP_FANOUT:
+            # Una sola navegación: las ubicaciones del barrido se consultan desde la misma página
+            tasks = tasks or SweepExecutor.build_tasks()
+            scraping_result = scraper.check_matrix(
+                product_url=tasks[0][0],
+                locations=list(dict.fromkeys(location for _, location in tasks))
+            )
+        else:
+            on_result = (lambda task, task_result: output.write_stores(task_result, location=task[1])) if output else None
+            scraping_result = SweepExecutor(on_result=on_result).run(tasks)
+        result = scraper.apply_cache(scraping_result, cache_age)
+        if output:
+            output.write_result(result, stores=Config.SWEEP_FANOUT)
+        
+        display_results(result)
+        notify_changes(result)
+        
+        return result
+    
+    except Exception as e:
+        logger.error(f"❌ Error ejecutando barrido: {e}", exc_info=True)
+        sys.exit(1)
+
+
+def run_watch(show_browser: bool = False, interval: Optional[int] = None,
+              output: Optional[NdjsonWriter] = None) -> None:
+    """
+    Ejecuta el scraper en bucle dentro de un proceso de larga duración
+    
+    Reutiliza un pool de navegadores entre iteraciones (Chromium se recicla
+    por número de usos o por memoria) en lugar de lanzar uno por scrape.
+    
+    Args:
+        show_browser: Si True, muestra el navegador durante el scraping
+        interval: Segundos entre verificaciones (default: Config.WATCH_INTERVAL_SEC)
+        output: Writer NDJSON (cada iteración emite sus registros en cuanto termina el scrape)
+    
+    Con API_ENABLED (o --api) sirve el último estado por HTTP mientras corre.
+    Los cambios en .env (CONFIG_FILE) se aplican al inicio de la siguiente iteración.
+    """
+    logger.info(f"👁️ Modo watch - Verificando cada {interval or Config.WATCH_INTERVAL_SEC}s (Ctrl+C para salir)")
+    
+    if show_browser:
+        Config.override(PLAYWRIGHT_HEADLESS=False)
+        logger.info("👀 Modo visible activado - Se mostrará el navegador")
+    
+    from services.browser_pool import BrowserPool
+    
+    profiler = MemoryProfiler()
+    hub = api = None
+    
+    with BrowserPool() as pool:
+        scraper = AppleScraper(pool=pool, profiler=profiler)
+        iteration = 0
+        
+        if Config.API_ENABLED:
+            from services.http_api import ApiServer, StateHub
+            hub = StateHub()
+            hub.publish(scraper.cache_manager.load_cache() or {})  # Último estado conocido
+            api = ApiServer(hub)
+            api.start()
+        
+        try:
+            while True:
+                iteration += 1
+                started = time.monotonic()
+                if Config.reload_if_changed():
+                    # Nueva configuración sin reiniciar: se conservan navegador y cachés
+                    scraper.refresh_config()
+                    pool.refresh_config()
+                logger.info(f"🔁 Iteración {iteration}")
+                metrics = RunMetrics('watch')
+                metrics.set('iteration', iteration)
+                
+                try:
+                    with metrics.timer('scrape'):
+                        result = scraper.check_availability_with_cache(on_alert=notify_changes)
+                    if output:
+                        output.write_result(result)
+                    display_results(result)
+                    if hub:
+                        hub.publish(result)
+                    with metrics.timer('notify'):
+                        notify_changes(result)
+                    metrics.set('browser_recycles', pool.recycles)
+                    record_run_metrics(metrics, result, profiler)
+                except Exception as e:
+                    logger.error(f"❌ Error en iteración {iteration}: {e}", exc_info=True)
+                
+                elapsed = time.monotonic() - started
+                wait_seconds = max(0.0, (interval or Config.WATCH_INTERVAL_SEC) - elapsed)
+                if scraper.governor:
+                    # Sin cupo de peticiones, esperar a que lo haya en vez de bloquear dentro del navegador
+                    wait_seconds = max(wait_seconds, scraper.governor.next_delay())
+                time.sleep(wait_seconds)
+        finally:
+            if api:
+                api.stop()
+
+
+def record_run_metrics(metrics: RunMetrics, result: dict, profiler: MemoryProfiler) -> None:
+    """
+    Escribe las métricas de la ejecución junto con las muestras de memoria
+    
+    Args:
+        metrics: Métricas acumuladas de la ejecución
+        result: Resultado del scraper
+        profiler: Profiler de memoria (sin efecto si está deshabilitado)
+    """
+    metrics.record_result(result)
+    profiler.checkpoint('notify')
+    samples = profiler.drain()
+    if samples:
+        metrics.set('memory', samples)
+    metrics.write()
+
+
+def notify_changes(result: dict) -> None:
+    """
+    Envía la notificación a todos los destinos solo si el resultado indica cambios
+    
+    Args:
+        result: Resultado de check_availability_with_cache / apply_cache
+    """
+    from services.notifiers import NotifierPipeline
+    
+    if not result.get('should_alert', False):
+        logger.info("ℹ️ Sin cambios - No se enviarán notificaciones")
+        return
+    
+    if result.get('notified'):
+        logger.info("ℹ️ Notificación ya enviada al interceptar la respuesta")
+        return
+    
+    try:
+        pipeline = NotifierPipeline.from_config()
+        if not pipeline:
+            return
+        
+        logger.info(f"📱 HAY CAMBIOS - Notificando a {len(pipeline.notifiers)} destino(s)...")
+        statuses = pipeline.dispatch(result)
+        if all(status == 'ok' for status in statuses.values()):
+            logger.info("✅ Notificación enviada exitosamente")
+    except Exception as e:
+        logger.error(f"❌ Error enviando notificaciones: {e}", exc_info=True)
+
+
 def display_results(result: dict) -> None:
     """
     Muestra los resultados del scraping de forma formateada
@@ -192,6 +378,117 @@ def save_results_json(result: dict, filename: Optional[str] = None) -> None:
         logger.error(f"❌ Error guardando resultados: {e}")
 
 
+def run_replay(source: str) -> dict:
+    """
+    Reprocesa payloads archivados sin navegador ni envíos reales
+    
+    Args:
+        source: Directorio del archivo de payloads o de archivos .json
+    
+    Returns:
+        dict: Reporte del replay con las alertas que se habrían disparado
+    """
+    if not os.path.exists(source):
+        logger.error(f"❌ No existe la fuente de replay: {source}")
+        if not Config.ARCHIVE_ENABLED:
+            logger.error("💡 Activa ARCHIVE_ENABLED=true para archivar las respuestas de los próximos scrapes")
+        sys.exit(1)
+    
+    from services.replay import ReplayRunner
+    return ReplayRunner(source).run()
+
+
+def run_store_lookup(near: Optional[str] = None, radius: Optional[float] = None) -> dict:
+    """
+    Consulta el catálogo de tiendas localmente (sin navegador)
+    
+    Args:
+        near: ZIP o "lat,lon" (None = tiendas de TARGET_STATE)
+        radius: Radio en millas (default: Config.STORE_RADIUS_MILES)
+    
+    Returns:
+        dict: Tiendas encontradas y ubicaciones mínimas que las cubren
+    """
+    from utils.store_catalog import StoreCatalog
+    
+    catalog = StoreCatalog()
+    if not catalog.stores:
+        logger.warning("⚠️ Catálogo de tiendas vacío: ejecuta primero una verificación normal")
+        return {'stores': [], 'locations': []}
+    
+    if near:
+        radius = radius or Config.STORE_RADIUS_MILES
+        try:
+            matches = catalog.stores_within(near, radius)
+        except ValueError as e:
+            logger.error(f"❌ {e}")
+            logger.info("💡 Usa 'lat,lon' o configura ZIP_CENTROIDS_FILE")
+            sys.exit(1)
+        logger.info(f"🗺️ {len(matches)} tienda(s) a menos de {radius:g} millas de {near}")
+    else:
+        matches = [(number, None) for number in catalog.stores_in_state(Config.TARGET_STATE)]
+        logger.info(f"🗺️ {len(matches)} tienda(s) en {Config.TARGET_STATE}")
+    
+    stores = []
+    for number, miles in matches:
+        store = catalog.get(number)
+        distance = f" - {miles:.1f} mi" if miles is not None else ''
+        logger.info(f"   🏪 {store['name']} ({store['city']}, {store['state']}) [{number}]{distance}")
+        stores.append({'store_number': number, **store, 'miles': miles})
+    
+    locations = catalog.covering_locations([number for number, _ in matches])
+    logger.info(f"🎯 {len(locations)} búsqueda(s) cubren estas tiendas: {', '.join(locations)}")
+    
+    return {'stores': stores, 'locations': locations}
+
+
+def run_launch_benchmark(runs: int, profiles: Optional[str] = None) -> dict:
+    """
+    Compara los perfiles de lanzamiento de Chromium con scrapes reales
+    
+    Args:
+        runs: Ejecuciones por perfil
+        profiles: Perfiles separados por comas (None = todos)
+    
+    Returns:
+        dict: Resumen por perfil y perfil recomendado
+    """
+    from services.launch_benchmark import LaunchBenchmark
+    
+    names = [name.strip() for name in profiles.split(',') if name.strip()] if profiles else None
+    try:
+        benchmark = LaunchBenchmark(names, runs)
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+    return benchmark.run()
+
+
+def run_load_test(stores: int, parts: int, change_rate: float, rounds: int) -> dict:
+    """
+    Mide el escalado de parser, comparación y mensajes con payloads sintéticos
+    
+    Args:
+        stores: Tiendas por payload (la prueba repite con 4 veces más)
+        parts: Números de parte por ronda
+        change_rate: Fracción de (tienda, parte) que cambia por ronda
+        rounds: Rondas medidas por escala
+    
+    Returns:
+        dict: Medidas por escala y componente, escalado y fallos
+    """
+    from services.load_test import LoadTest
+    
+    # El volcado de depuración escribiría un archivo por payload sintético
+    Config.override(SAVE_API_DEBUG=False)
+    try:
+        load_test = LoadTest(stores, parts, change_rate, rounds)
+    except ValueError as e:
+        logger.error(f"❌ {e}")
+        sys.exit(1)
+    return load_test.run()
+
+
 def test_connection() -> None:
     """Prueba la conexión con Apple Store y Telegram"""
     logger.info("🧪 Probando conexión con Apple Store...")
@@ -235,6 +532,38 @@ def test_connection() -> None:
         sys.exit(1)
 
 
+def acquire_run_lock(mode: Optional[str] = None) -> Optional[FileLock]:
+    """
+    Adquiere el lock de ejecución única (cache/run.lock)
+    
+    Evita que dos procesos (p. ej. el Programador de Tareas lanzando una
+    ejecución mientras la anterior sigue) abran dos navegadores y dupliquen
+    alertas.
+    
+    Args:
+        mode: 'skip' (salir si hay otra en curso) o 'wait' (esperar hasta
+              RUN_LOCK_TIMEOUT_SEC). Default: Config.RUN_LOCK_MODE
+    
+    Returns:
+        FileLock adquirido, o None si hay que no ejecutar
+    """
+    mode = mode or Config.RUN_LOCK_MODE
+    lock = FileLock(os.path.join(Config.CACHE_DIR, 'run.lock'))
+    
+    if lock.acquire(timeout=0):
+        return lock
+    
+    if mode == 'wait':
+        logger.info(f"⏳ Otra ejecución en curso ({lock.owner()}) - Esperando hasta {Config.RUN_LOCK_TIMEOUT_SEC}s...")
+        if lock.acquire(timeout=Config.RUN_LOCK_TIMEOUT_SEC):
+            return lock
+        logger.warning("⚠️ La ejecución anterior no terminó a tiempo - Se omite esta ejecución")
+        return None
+    
+    logger.info(f"⏭️ Otra ejecución en curso ({lock.owner()}) - Se omite esta ejecución")
+    return None
+
+
 def show_config() -> None:
     """Muestra la configuración actual del scraper"""
     print(Config.display_config())
@@ -257,6 +586,14 @@ Ejemplos de uso:
   python main.py --test               # Probar conexión
   python main.py --show-config        # Ver configuración
   python main.py --save-json          # Guardar resultados en JSON
+  python main.py --sweep              # Barrido productos × ubicaciones multi-proceso
+  python main.py --replay cache/archive  # Reprocesar payloads archivados (sin navegador)
+  python main.py --watch --interval 300  # Proceso continuo con pool de navegadores
+  python main.py --watch --api        # + API HTTP: curl localhost:8787/availability
+  python main.py --stores-near 33131 --radius 50  # Tiendas cercanas desde el catálogo local
+  python main.py --watch --output=ndjson | jq -c 'select(.type=="change")'  # Stream de eventos
+  python main.py --benchmark-launch --benchmark-runs 5  # Perfil de Chromium más rápido
+  python main.py --load-test --load-stores 200  # Escalado de parser/caché/mensajes (sin navegador)
 
 Para más información: README.md
         """
@@ -295,9 +632,147 @@ Para más información: README.md
         help='Guardar resultados en archivo JSON'
     )
     
+    parser.add_argument(
+        '--sweep',
+        action='store_true',
+        help='Barrido de SWEEP_PRODUCT_URLS × SWEEP_LOCATIONS en varios procesos'
+    )
+    
+    parser.add_argument(
+        '--replay',
+        metavar='ARCHIVO_O_DIR',
+        help='Reprocesar payloads archivados (parser, caché y mensajes) sin navegador ni envíos'
+    )
+    
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help='Ejecutar en bucle (proceso de larga duración con pool de navegadores)'
+    )
+    
+    parser.add_argument(
+        '--interval',
+        type=int,
+        default=None,
+        help='Segundos entre verificaciones en modo --watch (default: WATCH_INTERVAL_SEC)'
+    )
+    
+    parser.add_argument(
+        '--api',
+        action='store_true',
+        help='En modo --watch, servir el estado por HTTP en API_HOST:API_PORT'
+    )
+    
+    parser.add_argument(
+        '--if-running',
+        choices=['skip', 'wait'],
+        default=None,
+        help='Si ya hay una ejecución en curso: omitir esta o esperar a que termine (default: RUN_LOCK_MODE)'
+    )
+    
+    parser.add_argument(
+        '--profile-memory',
+        action='store_true',
+        help='Perfilado de memoria (tracemalloc + RSS) en logs/metrics_YYYYMMDD.jsonl'
+    )
+    
+    parser.add_argument(
+        '--output',
+        choices=['ndjson'],
+        default=None,
+        help='Emitir un registro JSON por tienda y por cambio en streaming (destino: NDJSON_TARGET)'
+    )
+    
+    parser.add_argument(
+        '--output-target',
+        metavar='DESTINO',
+        default=None,
+        help="Destino de --output: '-' (stdout), FIFO o archivo rotativo (default: NDJSON_TARGET)"
+    )
+    
+    parser.add_argument(
+        '--stores-near',
+        metavar='ZIP_O_LATLON',
+        help='Listar tiendas del catálogo en un radio y las búsquedas mínimas que las cubren'
+    )
+    
+    parser.add_argument(
+        '--stores-in-state',
+        action='store_true',
+        help='Igual que --stores-near pero para todas las tiendas de TARGET_STATE'
+    )
+    
+    parser.add_argument(
+        '--radius',
+        type=float,
+        default=None,
+        help='Radio en millas para --stores-near (default: STORE_RADIUS_MILES)'
+    )
+    
+    parser.add_argument(
+        '--benchmark-launch',
+        action='store_true',
+        help='Medir lanzamiento, primera respuesta, fulfillment y memoria de cada perfil de Chromium'
+    )
+    
+    parser.add_argument(
+        '--benchmark-runs',
+        type=int,
+        default=3,
+        help='Ejecuciones por perfil en --benchmark-launch (default: 3)'
+    )
+    
+    parser.add_argument(
+        '--benchmark-profiles',
+        metavar='PERFILES',
+        default=None,
+        help='Perfiles a comparar separados por comas (default: todos)'
+    )
+    
+    parser.add_argument(
+        '--load-test',
+        action='store_true',
+        help='Medir rendimiento y memoria de parser, comparación y mensajes con payloads sintéticos '
+             '(sale con código 1 si el escalado supera LOAD_TEST_MAX_SCALING)'
+    )
+    
+    parser.add_argument(
+        '--load-stores',
+        type=int,
+        default=100,
+        help='Tiendas por payload en --load-test; se repite con 4 veces más (default: 100)'
+    )
+    
+    parser.add_argument(
+        '--load-parts',
+        type=int,
+        default=10,
+        help='Números de parte por ronda en --load-test (default: 10)'
+    )
+    
+    parser.add_argument(
+        '--load-change-rate',
+        type=float,
+        default=0.05,
+        help='Fracción de (tienda, parte) que cambia entre rondas en --load-test (default: 0.05)'
+    )
+    
+    parser.add_argument(
+        '--load-rounds',
+        type=int,
+        default=5,
+        help='Rondas medidas por escala en --load-test (default: 5)'
+    )
+    
     # Parsear argumentos
     args = parser.parse_args()
     
+    if args.profile_memory:
+        Config.override(MEMORY_PROFILING=True)
+    
+    if args.api:
+        Config.override(API_ENABLED=True)
+    
     # Ejecutar acción correspondiente
     try:
         if args.show_config:
@@ -308,6 +783,26 @@ Para más información: README.md
             test_connection()
             return
         
+        if args.replay:
+            report = run_replay(args.replay)
+            if args.save_json:
+                save_results_json(report, f"replay_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            return
+        
+        if args.load_test:
+            report = run_load_test(args.load_stores, args.load_parts, args.load_change_rate, args.load_rounds)
+            if args.save_json:
+                save_results_json(report, f"loadtest_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            if not report['passed']:
+                sys.exit(1)
+            return
+        
+        if args.stores_near or args.stores_in_state:
+            lookup = run_store_lookup(args.stores_near, args.radius)
+            if args.save_json:
+                save_results_json(lookup, f"stores_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            return
+        
         if args.test_telegram:
             logger.info("🧪 Probando solo Telegram...")
             if not Config.TELEGRAM_ENABLED:
@@ -333,9 +828,40 @@ Para más información: README.md
             logger.error("💡 Crea un archivo .env basado en .env.example")
             sys.exit(1)
         
+        # Una sola ejecución a la vez (navegador, caché y alertas)
+        run_lock = acquire_run_lock(args.if_running)
+        if run_lock is None:
+            return
+        
         # Ejecutar scraper
         show_browser = args.headless.lower() == 'false'
-        result = run_scraper(show_browser=show_browser)
+        if args.benchmark_launch:
+            if show_browser:
+                Config.override(PLAYWRIGHT_HEADLESS=False)
+            try:
+                report = run_launch_benchmark(args.benchmark_runs, args.benchmark_profiles)
+            finally:
+                run_lock.release()
+            if args.save_json:
+                save_results_json(report, f"benchmark_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+            return
+        
+        output = NdjsonWriter(args.output_target) if args.output == 'ndjson' else None
+        try:
+            if args.watch:
+                run_watch(show_browser=show_browser, interval=args.interval, output=output)
+                return
+            
+            if args.sweep:
+                result = run_sweep(show_browser=show_browser, output=output)
+            else:
+                result = run_scraper(show_browser=show_browser)
+                if output:
+                    output.write_result(result)
+        finally:
+            if output:
+                output.close()
+            run_lock.release()
         
         # Guardar resultados si se especifica
         if args.save_json:
@@ -7,13 +7,32 @@ from playwright.sync_api import sync_playwright, Page, Browser, TimeoutError as
 import logging
 from datetime import datetime
 import os
-from typing import Dict, List, Any, Optional
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Any, Iterator, Optional
+from urllib.parse import parse_qsl, urlsplit
 
 from config import Config
+from services.browser_pool import BrowserPool, launch_args, context_options
+from services.fulfillment_api import HybridEngine, build_url, fan_out, fetch_headers, is_valid_payload
 from utils.cache_manager import CacheManager
+from utils.artifact_store import get_artifact_store
+from utils.payload_archive import PayloadArchive
+from utils.adaptive_timeout import LatencyTracker
+from utils.circuit_breaker import CircuitBreaker
+from utils.memory_profiler import MemoryProfiler
+from utils.singleflight import SingleFlight
+from utils.store_catalog import StoreCatalog
+from utils.rate_governor import RateGovernor
+from utils.proxy_pool import ProxyPool, proxy_label, to_playwright_proxy
+from utils.post_pipeline import get_post_pipeline
+from utils.location_cache import LocationCache
 
 logger = logging.getLogger('AppleStockBot')
 
+# Compartido por todos los scrapers del proceso: clave (URL del producto, ubicación)
+_FETCHES = SingleFlight(ttl=Config.FETCH_CACHE_TTL_SEC)
+
 
 class AppleScraper:
     """
@@ -21,17 +40,71 @@ class AppleScraper:
     Usa Playwright para navegación realista con JavaScript completo
     """
     
-    def __init__(self):
-        """Inicializa el scraper con configuración"""
+    def __init__(self, pool: Optional[BrowserPool] = None, profiler: Optional[MemoryProfiler] = None):
+        """
+        Inicializa el scraper con configuración
+        
+        Args:
+            pool: Pool de navegadores para reutilizar Chromium entre scrapes
+                  (modo --watch). Sin pool se lanza un navegador por scrape.
+            profiler: Profiler de memoria (toma una muestra con el navegador abierto)
+        """
         self.config = Config
+        self.pool = pool
+        self.profiler = profiler
         self.screenshot_dir = 'screenshots'
         os.makedirs(self.screenshot_dir, exist_ok=True)
-        self.cache_manager = CacheManager()  # Inicializar cache manager
+        self.artifacts = get_artifact_store(self.screenshot_dir)  # Escritura en segundo plano, disco acotado
+        self.archive = PayloadArchive() if self.config.ARCHIVE_ENABLED else None
+        self.latency = LatencyTracker(self.config.CACHE_DIR)  # Timeouts según latencias recientes
+        self.circuit = CircuitBreaker(cache_dir=self.config.CACHE_DIR)
+        self.catalog = StoreCatalog(self.config.CACHE_DIR)  # Coordenadas de tiendas, sin scrapes extra
+        self.cache_manager = CacheManager(catalog=self.catalog)  # Snapshots compactos unidos con el catálogo
+        self.governor = RateGovernor(self.config.CACHE_DIR) if self.config.RATE_LIMIT_ENABLED else None
+        self.proxies = ProxyPool.from_config()  # None = conexión directa
+        self.hybrid = self._make_hybrid()  # Repetir por HTTP la petición de fulfillment capturada
+        self.locations = self._make_locations()  # Ubicaciones ya resueltas: sin autocompletado
+        self.post = get_post_pipeline()  # Caché, archivo y notificaciones en paralelo al cierre del navegador
+        self._early: Optional[Dict[str, Any]] = None  # Alerta temprana en curso (check_availability_with_cache)
+    
+    def refresh_config(self) -> None:
+        """
+        Aplica una configuración recargada a los componentes que la leen al crearse
+        
+        El resto (producto, ubicación, headless, Telegram...) se lee de Config en
+        cada scrape y no necesita nada más.
+        """
+        self.latency.window = self.config.LATENCY_WINDOW
+        self.latency.percentile = self.config.TIMEOUT_PERCENTILE
+        self.latency.multiplier = self.config.TIMEOUT_MULTIPLIER
+        self.circuit.failure_threshold = self.config.CIRCUIT_FAILURE_THRESHOLD
+        self.circuit.base_backoff = self.config.CIRCUIT_BASE_BACKOFF_MIN * 60
+        self.circuit.max_backoff = self.config.CIRCUIT_MAX_BACKOFF_MIN * 60
+        _FETCHES.ttl = self.config.FETCH_CACHE_TTL_SEC
+        _FETCHES.invalidate()
+        self.governor = RateGovernor(self.config.CACHE_DIR) if self.config.RATE_LIMIT_ENABLED else None
+        self.proxies = ProxyPool.from_config()
+        self.hybrid = self._make_hybrid()
+        self.locations = self._make_locations()
+    
+    def _make_locations(self) -> Optional[LocationCache]:
+        """Caché de ubicaciones resueltas si LOCATION_CACHE_ENABLED"""
+        return LocationCache(self.config.CACHE_DIR) if self.config.LOCATION_CACHE_ENABLED else None
+    
+    def _make_hybrid(self) -> Optional[HybridEngine]:
+        """Motor híbrido si HYBRID_ENABLED (comparte el gobernador de tasa)"""
+        if not self.config.HYBRID_ENABLED:
+            return None
+        return HybridEngine(self.config.CACHE_DIR, governor=self.governor)
     
-    def check_availability(self) -> Dict[str, Any]:
+    def check_availability(self, product_url: Optional[str] = None, location: Optional[str] = None) -> Dict[str, Any]:
         """
         Verifica disponibilidad de productos en Apple Store
         
+        Args:
+            product_url: URL de la configuración del producto (default: Config.PRODUCT_URL)
+            location: Ubicación a buscar en el modal (default: Config.SEARCH_LOCATION)
+        
         Returns:
             dict: {
                 'success': bool,
@@ -42,84 +115,294 @@ class AppleScraper:
                 'error': str (opcional)
             }
         """
+        product_url = product_url or self.config.PRODUCT_URL
+        location = location or self.config.SEARCH_LOCATION
+        
+        # Peticiones concurrentes para el mismo (producto, ubicación) comparten un
+        # único fetch, y un resultado reciente se sirve desde memoria
+        key = (product_url, location.strip().lower())
+        _FETCHES.purge_expired()
+        result, source = _FETCHES.do(
+            key,
+            lambda: self._fetch(product_url, location),
+            cacheable=lambda r: r.get('success', False)
+        )
+        
+        if source != 'fetch':
+            logger.info(f"♻️ Resultado reutilizado ({source}) para {location}")
+        return {**result, 'fetch_source': source}
+    
+    def _fetch(self, product_url: str, location: str) -> Dict[str, Any]:
+        """
+        Ejecuta el scrape real protegido por el circuit breaker
+        
+        Args:
+            product_url: URL de la configuración del producto
+            location: Ubicación a buscar en el modal
+        
+        Returns:
+            dict: Mismo formato que check_availability
+        """
+        # Circuit breaker: no lanzar el navegador mientras Apple está caído o bloqueando
+        if not self.circuit.allow_request():
+            return {**self._error_result("Circuit breaker abierto - scrape omitido"), 'skipped': True}
+        
+        if self.circuit.current_state == CircuitBreaker.HALF_OPEN and not self.test_connection():
+            self.circuit.record_failure()
+            return {**self._error_result("Prueba de conexión fallida - scrape omitido"), 'skipped': True}
+        
+        result = self._scrape(product_url, location)
+        
+        # Respuesta vacía = Apple no devolvió disponibilidad (bloqueo o página cambiada)
+        if result['success'] and (result['available_stores'] or result['unavailable_stores']):
+            self.circuit.record_success()
+        else:
+            self.circuit.record_failure()
+        self.post.submit('latency', self.latency.save)
+        
+        return result
+    
+    def _scrape(self, product_url: str, location: str) -> Dict[str, Any]:
+        """
+        Ejecuta el flujo completo del navegador para un producto y una ubicación
+        
+        Args:
+            product_url: URL de la configuración del producto
+            location: Ubicación a buscar en el modal
+        
+        Returns:
+            dict: Mismo formato que check_availability
+        """
         logger.info(f"🔍 Iniciando scraping de: {self.config.TARGET_PRODUCT}")
         logger.info(f"🌐 URL objetivo: {self.config.APPLE_STORE_URL}")
         
+        if not self.proxies:
+            return self._scrape_via(product_url, location, None)
+        
+        # Proxy de salida: sus éxitos, latencia y fallos deciden cuánto tráfico recibe
+        proxy = self.proxies.select()
+        logger.info(f"🛰️ Proxy de salida: {proxy_label(proxy)}")
+        started = time.perf_counter()
+        result = self._scrape_via(product_url, location, proxy)
+        if result['success'] and (result['available_stores'] or result['unavailable_stores']):
+            self.proxies.record_success(proxy, (time.perf_counter() - started) * 1000)
+        else:
+            self.proxies.record_failure(proxy)
+        return result
+    
+    def _scrape_via(self, product_url: str, location: str, proxy: Optional[str]) -> Dict[str, Any]:
+        """
+        Ejecuta el scrape con una salida concreta
+        
+        Args:
+            product_url: URL de la configuración del producto
+            location: Ubicación a buscar en el modal
+            proxy: URL del proxy de salida (None = conexión directa)
+        
+        Returns:
+            dict: Mismo formato que check_availability
+        """
+        # Modo híbrido: sin navegador mientras la plantilla capturada siga siendo válida
+        if self.hybrid:
+            result = self._poll_http(product_url, location, proxy)
+            if result:
+                return result
+        
+        try:
+            with self._browser_session(proxy) as page:
+                try:
+                    return self._run_flow(page, product_url, location, proxy)
+                    
+                except PlaywrightTimeout as e:
+                    logger.error(f"⏱️ Timeout durante scraping: {e}")
+                    self._save_error_screenshot(page, 'timeout')
+                    return self._error_result(f"Timeout navegando Apple Store: {str(e)}")
+                    
+                except Exception as e:
+                    logger.error(f"❌ Error durante scraping: {e}", exc_info=True)
+                    self._save_error_screenshot(page, 'error')
+                    return self._error_result(str(e))
+        
+        except Exception as e:
+            # Fallo lanzando el navegador o creando el contexto
+            logger.error(f"❌ Error iniciando navegador: {e}", exc_info=True)
+            return self._error_result(str(e))
+    
+    def _poll_http(self, product_url: str, location: str, proxy: Optional[str]) -> Optional[Dict[str, Any]]:
+        """
+        Consulta fulfillment por HTTP con la plantilla capturada
+        
+        Args:
+            product_url: URL de la configuración del producto
+            location: Ubicación
+            proxy: URL del proxy de salida (None = conexión directa)
+        
+        Returns:
+            dict: Resultado con el formato de check_availability, o None si
+                  hay que pasar por el navegador
+        """
+        payload = self.hybrid.poll(product_url, location, proxy)
+        if payload is None:
+            return None
+        
+        if self.archive:
+            self.post.submit('archive', self.archive.append, payload)
+        
+        available_stores, unavailable_stores, product_title = self._parse_fulfillment_data(payload)
+        logger.info(f"✅ Consulta HTTP completada - Encontradas {len(available_stores)} tiendas con stock")
+        return {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'product': product_title or self.config.TARGET_PRODUCT,
+            'product_url': product_url,
+            'location': location,
+            'available_stores': available_stores,
+            'unavailable_stores': unavailable_stores,
+            'product_title': product_title,
+            'engine': 'http'
+        }
+    
+    def check_matrix(self, product_url: Optional[str] = None, parts: Optional[List[str]] = None,
+                     locations: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Barrido SKU × ubicación con una sola navegación
+        
+        Recorre una vez el flujo del localizador de tiendas (cookies y sesión
+        listas), y con la petición de fulfillment capturada como plantilla
+        consulta el resto de combinaciones con fetch() concurrentes desde la
+        misma página, sin repetir clics.
+        
+        Args:
+            product_url: Página usada para calentar la sesión (default: Config.PRODUCT_URL)
+            parts: Números de parte (default: Config.SWEEP_PARTS o el de la página)
+            locations: Ubicaciones (default: Config.SWEEP_LOCATIONS o Config.SEARCH_LOCATION)
+        
+        Returns:
+            dict: Resultado combinado con el formato de SweepExecutor.run
+        """
+        from services.sweep_executor import SweepExecutor
+        
+        product_url = product_url or self.config.PRODUCT_URL
+        locations = locations or self.config.SWEEP_LOCATIONS or [self.config.SEARCH_LOCATION]
+        
+        if not self.circuit.allow_request():
+            return {**self._error_result("Circuit breaker abierto - barrido omitido"), 'skipped': True}
+        
+        proxy = self.proxies.select() if self.proxies else None
+        results: Dict[tuple, Dict[str, Any]] = {}
+        tasks: List[tuple] = []
+        started = time.perf_counter()
+        
+        try:
+            with self._browser_session(proxy) as page:
+                warm = self._run_flow(page, product_url, locations[0], proxy, keep_request=True)
+                request = warm.pop('fulfillment_request', None)
+                if not request:
+                    raise Exception("No se capturó la petición de fulfillment para el fan-out")
+                
+                parts = parts or self.config.SWEEP_PARTS or [
+                    value for name, value in parse_qsl(urlsplit(request['url']).query) if name == 'parts.0'
+                ]
+                if not parts:
+                    raise Exception("Sin números de parte para el fan-out (configura SWEEP_PARTS)")
+                tasks = [(part, location) for part in parts for location in locations]
+                urls = [
+                    build_url(request['url'], {'parts.0': part, 'location': location, 'store': None})
+                    for part, location in tasks
+                ]
+                logger.info(f"🌊 Fan-out: {len(urls)} consulta(s) desde la página ({self.config.FANOUT_CONCURRENCY} en paralelo)")
+                responses = fan_out(page, urls, fetch_headers(request['headers']), self.config.FANOUT_CONCURRENCY)
+        
+        except Exception as e:
+            logger.error(f"❌ Error en fan-out: {e}", exc_info=True)
+            self.circuit.record_failure()
+            if self.proxies:
+                self.proxies.record_failure(proxy)
+            return self._error_result(str(e))
+        
+        for task, response in zip(tasks, responses):
+            payload = response.get('body')
+            if not is_valid_payload(payload):
+                error = response.get('error') or f"Respuesta no válida (status {response.get('status')})"
+                results[task] = {**self._error_result(error), 'product_url': product_url, 'location': task[1]}
+                continue
+            
+            if self.archive:
+                self.post.submit('archive', self.archive.append, payload)
+            available_stores, unavailable_stores, product_title = self._parse_fulfillment_data(payload)
+            results[task] = {
+                'success': True,
+                'product': product_title,
+                'product_url': product_url,
+                'location': task[1],
+                'available_stores': available_stores,
+                'unavailable_stores': unavailable_stores
+            }
+        
+        merged = SweepExecutor._merge_results(tasks, results)
+        failed = [task for task in tasks if not results[task]['success']]
+        merged['sweep'] = {
+            'tasks': len(tasks),
+            'mode': 'fanout',
+            'failed_tasks': [
+                {'part': part, 'location': location, 'error': results[(part, location)].get('error')}
+                for part, location in failed
+            ]
+        }
+        
+        if merged['success']:
+            self.circuit.record_success()
+            if self.proxies:
+                self.proxies.record_success(proxy, (time.perf_counter() - started) * 1000)
+        else:
+            self.circuit.record_failure()
+            if self.proxies:
+                self.proxies.record_failure(proxy)
+        self.post.submit('latency', self.latency.save)
+        self.post.drain()
+        
+        logger.info(
+            f"🏁 Fan-out completado - {len(tasks) - len(failed)}/{len(tasks)} consulta(s) válidas "
+            f"en {time.perf_counter() - started:.1f}s"
+        )
+        return merged
+    
+    @contextmanager
+    def _browser_session(self, proxy: Optional[str] = None) -> Iterator[Page]:
+        """
+        Proporciona una página lista para navegar
+        
+        Con pool reutiliza su navegador; sin pool lanza Chromium y lo
+        cierra al terminar (ejecuciones programadas de un solo scrape).
+        
+        Args:
+            proxy: URL del proxy de salida del contexto (None = conexión directa)
+        
+        Yields:
+            Page de Playwright
+        """
+        context_proxy = to_playwright_proxy(proxy) if proxy else None
+        if self.pool:
+            with self.pool.checkout(context_proxy) as page:
+                yield page
+            return
+        
         with sync_playwright() as p:
             browser: Optional[Browser] = None
-            page: Optional[Page] = None
-            
             try:
                 # Lanzar navegador Chromium
-                logger.info(f"🚀 Lanzando navegador (headless={self.config.PLAYWRIGHT_HEADLESS})")
+                logger.info(
+                    f"🚀 Lanzando navegador (headless={self.config.PLAYWRIGHT_HEADLESS}, "
+                    f"perfil {self.config.BROWSER_PROFILE})"
+                )
                 browser = p.chromium.launch(
                     headless=self.config.PLAYWRIGHT_HEADLESS,
-                    args=['--disable-blink-features=AutomationControlled']  # Evitar detección de bot
+                    args=launch_args()
                 )
                 
                 # Crear contexto con configuración realista
-                context = browser.new_context(
-                    user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                    viewport={'width': 1920, 'height': 1080},
-                    locale='en-US',
-                    timezone_id='America/New_York'
-                )
-                
-                page = context.new_page()
-                
-                # Navegar directamente al iPhone 17 Pro configurado (6.9", 256GB, Silver, Unlocked)
-                logger.info("🌐 Navegando a configuración de iPhone 17 Pro...")
-                product_url = "https://www.apple.com/shop/buy-iphone/iphone-17-pro/6.9-inch-display-256gb-silver-unlocked"
-                response = page.goto(
-                    product_url, 
-                    wait_until='networkidle',
-                    timeout=30000
-                )
-                
-                if not response or not response.ok:
-                    raise Exception(f"Error al cargar página: Status {response.status if response else 'N/A'}")
-                
-                logger.info(f"✓ Página cargada - Status: {response.status}")
-                logger.info("✓ Configuración preseleccionada: 6.9\", 256GB, Silver, Unlocked")
-                
-                # Esperar a que cargue contenido dinámico
-                page.wait_for_timeout(3000)
-                
-                # Screenshot inicial para debug
-                if not self.config.PLAYWRIGHT_HEADLESS:
-                    logger.info("📸 Guardando screenshot de página inicial...")
-                    page.screenshot(path=f"{self.screenshot_dir}/initial_page.png")
-                
-                # Extraer datos de disponibilidad
-                result = self._extract_availability_data(page)
-                
-                # Cerrar navegador
-                context.close()
-                browser.close()
-                
-                logger.info(f"✅ Scraping completado - Encontradas {len(result['available_stores'])} tiendas con stock")
-                
-                # Usar el título del producto de la API si está disponible, sino usar el de config
-                product_name = result.get('product_title') or self.config.TARGET_PRODUCT
-                
-                return {
-                    'success': True,
-                    'timestamp': datetime.now().isoformat(),
-                    'product': product_name,
-                    **result
-                }
-                
-            except PlaywrightTimeout as e:
-                logger.error(f"⏱️ Timeout durante scraping: {e}")
-                if page:
-                    self._save_error_screenshot(page, 'timeout')
-                return self._error_result(f"Timeout navegando Apple Store: {str(e)}")
-                
-            except Exception as e:
-                logger.error(f"❌ Error durante scraping: {e}", exc_info=True)
-                if page:
-                    self._save_error_screenshot(page, 'error')
-                return self._error_result(str(e))
+                context = browser.new_context(**context_options(), proxy=context_proxy)
+                yield context.new_page()
                 
             finally:
                 # Asegurar limpieza de recursos
@@ -129,12 +412,95 @@ class AppleScraper:
                     except:
                         pass
     
-    def _extract_availability_data(self, page: Page) -> Dict[str, Any]:
+    def _run_flow(self, page: Page, product_url: str, location: str,
+                  proxy: Optional[str] = None, keep_request: bool = False) -> Dict[str, Any]:
+        """
+        Navega al producto y extrae la disponibilidad
+        
+        Args:
+            page: Página de Playwright
+            product_url: URL de la configuración del producto
+            location: Ubicación a buscar en el modal
+            proxy: URL del proxy de salida (el límite por host se cuenta por salida)
+            keep_request: Dejar en el resultado la petición de fulfillment capturada
+                          ('fulfillment_request', para el fan-out)
+        
+        Returns:
+            dict: Resultado exitoso con el formato de check_availability
+        """
+        # Límite de tasa: la navegación espera su turno antes de page.goto y las
+        # XHR (autocompletado, fulfillment-messages) se gobiernan con una ruta
+        if self.governor:
+            egress = proxy_label(proxy) if proxy else None
+            self.governor.acquire(product_url, egress)
+            self.governor.install(page, egress)
+        
+        # Navegar directamente a la configuración del producto
+        logger.info(f"🌐 Navegando a configuración del producto: {product_url}")
+        goto_timeout = self.latency.timeout('goto', 30000, floor_ms=10000)
+        started = time.perf_counter()
+        try:
+            response = page.goto(
+                product_url, 
+                wait_until='networkidle',
+                timeout=goto_timeout
+            )
+        except PlaywrightTimeout:
+            self.latency.record_timeout('goto', 30000)
+            raise
+        self.latency.record('goto', (time.perf_counter() - started) * 1000)
+        
+        if not response or not response.ok:
+            raise Exception(f"Error al cargar página: Status {response.status if response else 'N/A'}")
+        
+        logger.info(f"✓ Página cargada - Status: {response.status}")
+        
+        # Esperar a que cargue contenido dinámico
+        page.wait_for_timeout(3000)
+        
+        # Screenshot inicial para debug
+        if not self.config.PLAYWRIGHT_HEADLESS:
+            logger.info("📸 Guardando screenshot de página inicial...")
+            self.artifacts.save_bytes('initial_page.png', page.screenshot())
+        
+        # Extraer datos de disponibilidad
+        result = self._extract_availability_data(page, location)
+        
+        # Plantilla para el modo híbrido: la petición que Apple aceptó, con las cookies de la sesión
+        fulfillment_request = result.pop('fulfillment_request', None)
+        if self.hybrid and fulfillment_request and (result['available_stores'] or result['unavailable_stores']):
+            try:
+                self.hybrid.harvest(product_url, location, fulfillment_request, page.context.cookies())
+            except Exception as e:
+                logger.warning(f"⚠️ No se pudo guardar la plantilla de fulfillment: {e}")
+        if keep_request:
+            result['fulfillment_request'] = fulfillment_request
+        
+        # Muestra de memoria mientras el navegador sigue abierto
+        if self.profiler:
+            self.profiler.checkpoint('scrape')
+        
+        logger.info(f"✅ Scraping completado - Encontradas {len(result['available_stores'])} tiendas con stock")
+        
+        # Usar el título del producto de la API si está disponible, sino usar el de config
+        product_name = result.get('product_title') or self.config.TARGET_PRODUCT
+        
+        return {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'product': product_name,
+            'product_url': product_url,
+            'location': location,
+            **result
+        }
+    
+    def _extract_availability_data(self, page: Page, location: str) -> Dict[str, Any]:
         """
         Extrae datos de disponibilidad de la página de Apple Store
         
         Args:
             page: Página de Playwright
+            location: Ubicación a ingresar en el buscador de tiendas
         
         Returns:
             dict con listas de tiendas disponibles/no disponibles y título del producto
@@ -146,19 +512,62 @@ class AppleScraper:
         
         logger.info("🔎 Extrayendo datos de disponibilidad...")
         
-        # Variable para capturar la respuesta de la API
+        # Variables para capturar la respuesta de la API y la petición que la produjo
         fulfillment_data = None
+        fulfillment_request = None
+        parsed = None  # (disponibles, no disponibles, título) del primer payload con tiendas
+        parsed_data = None  # Payload del que sale `parsed`
+        # Solo cuentan las respuestas posteriores al envío de la ubicación (y, si se
+        # conoce el texto enviado, las que lo llevan en su parámetro `location`)
+        capture = {'open': False, 'location': None}
+        
+        def start_capture(expected_location: Optional[str] = None) -> None:
+            nonlocal fulfillment_data, fulfillment_request, parsed, parsed_data
+            fulfillment_data = fulfillment_request = parsed = parsed_data = None
+            capture.update(open=True, location=expected_location)
         
         # Interceptor de respuestas de red
         def handle_response(response):
-            nonlocal fulfillment_data
+            nonlocal fulfillment_data, fulfillment_request, parsed, parsed_data
             if 'fulfillment-messages' in response.url:
+                if not self._matches_capture(response.url, capture):
+                    logger.info(f"⏭️ Respuesta de fulfillment ajena a la búsqueda ignorada: {response.url}")
+                    return
                 logger.info(f"🎯 API interceptada: {response.url}")
                 try:
                     fulfillment_data = response.json()
                     logger.info(f"✓ Datos de disponibilidad capturados")
                 except Exception as e:
                     logger.error(f"❌ Error parseando respuesta: {e}")
+                    return
+                
+                # Solo sirven de plantilla las peticiones que devolvieron tiendas
+                # (el clic del PASO 1 puede disparar una respuesta vacía antes de la ubicación)
+                if is_valid_payload(fulfillment_data):
+                    try:
+                        fulfillment_request = {'url': response.request.url, 'headers': response.request.all_headers()}
+                    except Exception as e:
+                        logger.warning(f"⚠️ No se pudo capturar la petición de fulfillment: {e}")
+                
+                # Alerta temprana: comparar y notificar ya, antes de esperas, screenshots y cierre.
+                # Se fija el primer payload con tiendas; los vacíos no bloquean a los siguientes
+                if self._early is not None and parsed is None:
+                    candidate = self._parse_fulfillment_data(fulfillment_data)
+                    if candidate[0] or candidate[1]:
+                        parsed, parsed_data = candidate, fulfillment_data
+                        try:
+                            self._dispatch_early(parsed)
+                        except Exception as e:
+                            logger.error(f"❌ Error en alerta temprana (se comparará al terminar): {e}", exc_info=True)
+                
+                if self.archive:
+                    self.post.submit('archive', self.archive.append, fulfillment_data)
+        
+        def wait_for_payload() -> None:
+            # Dar tiempo a la API para responder, sin esperar de más
+            deadline = time.monotonic() + 3
+            while fulfillment_data is None and time.monotonic() < deadline:
+                page.wait_for_timeout(100)
         
         # Configurar interceptor
         page.on("response", handle_response)
@@ -171,7 +580,7 @@ class AppleScraper:
             
             # PASO 1: Seleccionar no Apple Care
             logger.info("🛡️ PASO 1: Seleccionando no Apple Care...")
-            page.wait_for_selector('input[data-autom="noapplecare"]', timeout=10000)
+            self._wait_for_selector(page, 'input[data-autom="noapplecare"]')
             page.click('input[data-autom="noapplecare"]', force=True)
             logger.info("✓ No Apple Care seleccionado")
             page.wait_for_timeout(1000)
@@ -179,7 +588,7 @@ class AppleScraper:
             # PASO 2: Click en botón "Check availability"
             logger.info("📍 PASO 2: Haciendo clic en 'Check availability'...")
             check_availability_btn = 'button[data-autom^="productLocatorTriggerLink"]'
-            page.wait_for_selector(check_availability_btn, timeout=10000)
+            self._wait_for_selector(page, check_availability_btn)
             page.click(check_availability_btn)
             logger.info("✓ Modal de disponibilidad abierto")
             page.wait_for_timeout(2000)
@@ -189,24 +598,35 @@ class AppleScraper:
                 logger.info("🔍 PAUSA 2: Inspecciona el modal de búsqueda")
                 page.pause()
             
-            # PASO 3: Ingresar "Miami" en el input
-            logger.info("🔢 PASO 3: Ingresando 'Miami' en el buscador...")
+            # PASO 3-4: Ubicación ya resuelta (texto canónico + Enter) o autocompletado
             search_input = 'input[data-autom="zipCode"]'
-            page.wait_for_selector(search_input, timeout=10000)
-            page.fill(search_input, 'Miami')
-            logger.info("✓ 'Miami' ingresado")
-            
-            # PASO 4: Esperar al fetch y hacer click en "Miami, FL"
-            logger.info("⏳ PASO 4: Esperando opciones del autocomplete...")
-            miami_option = 'li[role="option"][data-option-index="0"]'
-            page.wait_for_selector(miami_option, timeout=10000)
-            page.wait_for_timeout(1000)  # Esperar a que se complete el fetch
-            page.click(miami_option)
-            logger.info("✓ 'Miami, FL' seleccionado")
+            self._wait_for_selector(page, search_input)
+            resolved = self.locations.get(location) if self.locations else None
+            option_text = None
+            if resolved:
+                logger.info(f"📌 PASO 3-4: Usando ubicación resuelta '{resolved}' (sin autocompletado)")
+                page.fill(search_input, resolved)
+                start_capture(resolved)
+                page.press(search_input, 'Enter')
+            else:
+                option_text = self._pick_location(page, search_input, location, start_capture)
             
             # PASO 5: Esperar a que se haga la petición a la API
             logger.info("⏳ PASO 5: Esperando respuesta de la API de disponibilidad...")
-            page.wait_for_timeout(3000)  # Dar tiempo a la API para responder
+            wait_for_payload()
+            
+            if resolved and not is_valid_payload(fulfillment_data):
+                # La resolución guardada ya no sirve: olvidarla y repetir con el autocompletado
+                logger.warning(f"🔁 La ubicación resuelta '{resolved}' no obtuvo respuesta - usando el autocompletado")
+                self.locations.forget(location)
+                resolved = None
+                option_text = self._pick_location(page, search_input, location, start_capture)
+                wait_for_payload()
+            
+            if self.locations and not resolved and is_valid_payload(fulfillment_data):
+                canonical = self._sent_location(fulfillment_request) or option_text
+                if canonical:
+                    self.post.submit('locations', self.locations.remember, location, canonical)
             
             # 🔍 INSPECCIÓN FINAL: Resultados en el modal
             if self.config.PLAYWRIGHT_DEBUG:
@@ -215,13 +635,17 @@ class AppleScraper:
             
             # Screenshot final
             if not self.config.PLAYWRIGHT_HEADLESS:
-                page.screenshot(path=f"{self.screenshot_dir}/availability_modal.png")
+                self.artifacts.save_bytes('availability_modal.png', page.screenshot())
                 logger.info("📸 Screenshot del modal de disponibilidad")
             
             # PASO 6: Procesar los datos capturados de la API
             if fulfillment_data:
                 logger.info("📊 Procesando datos de disponibilidad...")
-                available_stores, unavailable_stores, product_title = self._parse_fulfillment_data(fulfillment_data)
+                # Reutilizar el parseo del interceptor solo si corresponde al último payload
+                if parsed is not None and parsed_data is fulfillment_data:
+                    available_stores, unavailable_stores, product_title = parsed
+                else:
+                    available_stores, unavailable_stores, product_title = self._parse_fulfillment_data(fulfillment_data)
                 logger.info(f"✅ Encontradas {len(available_stores)} tiendas con stock")
                 logger.info(f"📊 Total de {len(unavailable_stores)} tiendas sin stock")
             else:
@@ -231,11 +655,127 @@ class AppleScraper:
         except Exception as e:
             logger.error(f"❌ Error extrayendo datos: {e}", exc_info=True)
         
+        finally:
+            # Quitar el interceptor: en modo pool la página no debe acumular handlers
+            page.remove_listener("response", handle_response)
+        
         return {
             'available_stores': available_stores,
             'unavailable_stores': unavailable_stores,
-            'product_title': product_title  # Título completo del producto desde la API
+            'product_title': product_title,  # Título completo del producto desde la API
+            'fulfillment_request': fulfillment_request  # Plantilla para modo híbrido y fan-out (la retira _run_flow)
+        }
+    
+    def _pick_location(self, page: Page, search_input: str, location: str,
+                       on_submit: Callable[[], None]) -> Optional[str]:
+        """
+        Flujo interactivo: escribe la ubicación y elige la primera opción del autocompletado
+        
+        Args:
+            page: Página de Playwright con el modal abierto
+            search_input: Selector del buscador
+            location: Ubicación a buscar
+            on_submit: Se llama justo antes de elegir la opción (empieza la captura del payload)
+        
+        Returns:
+            str: Texto de la opción elegida (o None si no se pudo leer)
+        """
+        # PASO 3: Ingresar la ubicación en el input
+        logger.info(f"🔢 PASO 3: Ingresando '{location}' en el buscador...")
+        page.fill(search_input, location)
+        logger.info(f"✓ '{location}' ingresado")
+        
+        # PASO 4: Esperar al fetch y hacer click en la primera opción
+        logger.info("⏳ PASO 4: Esperando opciones del autocomplete...")
+        location_option = 'li[role="option"][data-option-index="0"]'
+        self._wait_for_selector(page, location_option)
+        page.wait_for_timeout(1000)  # Esperar a que se complete el fetch
+        try:
+            option_text = page.inner_text(location_option).strip() or None
+        except Exception:
+            option_text = None
+        on_submit()
+        page.click(location_option)
+        logger.info(f"✓ Primera opción para '{location}' seleccionada")
+        return option_text
+    
+    @staticmethod
+    def _matches_capture(url: str, capture: Dict[str, Any]) -> bool:
+        """La respuesta de fulfillment pertenece a la búsqueda en curso"""
+        if not capture['open']:
+            return False
+        if not capture['location']:
+            return True
+        sent = dict(parse_qsl(urlsplit(url).query)).get('location')
+        return sent is None or sent.strip().lower() == capture['location'].strip().lower()
+    
+    @staticmethod
+    def _sent_location(fulfillment_request: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Parámetro `location` que la página envió a fulfillment-messages"""
+        if not fulfillment_request:
+            return None
+        params = dict(parse_qsl(urlsplit(fulfillment_request['url']).query))
+        return params.get('location') or None
+    
+    def _dispatch_early(self, parsed: tuple) -> None:
+        """
+        Compara con el caché y lanza la notificación en cuanto llega el payload
+        
+        Se llama desde el interceptor. Comparación + guardado del caché y la
+        notificación son etapas del pipeline de post-procesado: corren mientras
+        el hilo de Playwright termina el flujo y cierra el navegador, y la
+        notificación arranca antes de guardar el caché.
+        check_availability_with_cache las espera al final.
+        
+        Args:
+            parsed: (available_stores, unavailable_stores, product_title)
+        """
+        early = self._early
+        available_stores, unavailable_stores, product_title = parsed
+        if early['result'] is not None or not (available_stores or unavailable_stores):
+            return
+        
+        early['response_at'] = time.perf_counter()
+        scraping_result = {
+            'success': True,
+            'timestamp': datetime.now().isoformat(),
+            'product': product_title or self.config.TARGET_PRODUCT,
+            'product_url': early['product_url'],
+            'location': early['location'],
+            'available_stores': available_stores,
+            'unavailable_stores': unavailable_stores,
+            'product_title': product_title
         }
+        
+        def deliver(result: Dict[str, Any]) -> None:
+            try:
+                early['on_alert'](result)
+            except Exception as e:
+                logger.error(f"❌ Error en alerta temprana: {e}", exc_info=True)
+            early['delivery_ms'] = (time.perf_counter() - early['response_at']) * 1000
+        
+        def start_alert(result: Dict[str, Any]) -> None:
+            logger.info("⚡ Alerta temprana: notificando desde el interceptor")
+            early['notify'] = self.post.submit('notify', deliver, result)
+        
+        early['result'] = self.post.submit('cache', self.apply_cache, scraping_result, early['cache_age'],
+                                           on_alert=start_alert)
+    
+    def _wait_for_selector(self, page: Page, selector: str) -> None:
+        """
+        Espera un selector con timeout adaptativo y registra la latencia
+        
+        Args:
+            page: Página de Playwright
+            selector: Selector CSS
+        """
+        started = time.perf_counter()
+        try:
+            page.wait_for_selector(selector, timeout=self.latency.timeout('selector', 10000))
+        except PlaywrightTimeout:
+            self.latency.record_timeout('selector', 10000)
+            raise
+        self.latency.record('selector', (time.perf_counter() - started) * 1000)
     
     def _parse_fulfillment_data(self, data: Dict[str, Any]) -> tuple[List[Dict[str, str]], List[Dict[str, str]], str]:
         """
@@ -254,12 +794,10 @@ class AppleScraper:
         try:
             logger.info("🔍 Analizando datos de la API...")
             
-            # DEBUG: Guardar respuesta completa para inspección
-            import json
-            debug_file = f"{self.screenshot_dir}/api_response_debug.json"
-            with open(debug_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            logger.info(f"💾 Respuesta API guardada en: {debug_file}")
+            # DEBUG: Guardar respuesta completa para inspección (opt-in, fuera del hilo principal)
+            if self.config.SAVE_API_DEBUG:
+                debug_file = self.artifacts.save_json('api_response_debug.json', data)
+                logger.info(f"💾 Respuesta API guardada en: {debug_file}")
             
             # Estructura real de Apple Store API
             if 'body' in data and 'content' in data['body']:
@@ -275,6 +813,7 @@ class AppleScraper:
                             break
                 
                 stores_data = data['body']['content'].get('pickupMessage', {}).get('stores', [])
+                self.catalog.update_from_stores(stores_data)
                 
                 logger.info(f"📍 Analizando {len(stores_data)} tiendas...")
                 
@@ -357,10 +896,8 @@ class AppleScraper:
             else:
                 logger.warning("⚠️ Estructura de datos no reconocida. Guardando raw data...")
                 # Guardar JSON para inspección
-                import json
-                with open(f"{self.screenshot_dir}/api_response.json", 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2)
-                logger.info(f"💾 Respuesta guardada en: {self.screenshot_dir}/api_response.json")
+                raw_file = self.artifacts.save_json('api_response.json', data)
+                logger.info(f"💾 Respuesta guardada en: {raw_file}")
         
         except Exception as e:
             logger.error(f"❌ Error parseando datos de fulfillment: {e}", exc_info=True)
@@ -384,10 +921,11 @@ class AppleScraper:
         if not self.config.SCREENSHOT_ON_ERROR:
             return
         
-        filename = f"{self.screenshot_dir}/error_{error_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
+        name = f"error_{error_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.png"
         
         try:
-            page.screenshot(path=filename, full_page=True)
+            image = page.screenshot(full_page=self.config.ERROR_SCREENSHOT_FULL_PAGE)
+            filename = self.artifacts.save_bytes(name, image)
             logger.info(f"📸 Screenshot de error guardado: {filename}")
         except Exception as e:
             logger.error(f"❌ No se pudo guardar screenshot: {e}")
@@ -424,7 +962,13 @@ class AppleScraper:
             try:
                 browser = p.chromium.launch(headless=True)
                 page = browser.new_page()
-                response = page.goto(self.config.APPLE_STORE_URL, timeout=15000)
+                started = time.perf_counter()
+                try:
+                    response = page.goto(self.config.APPLE_STORE_URL, timeout=self.latency.timeout('probe', 15000))
+                except PlaywrightTimeout:
+                    self.latency.record_timeout('probe', 15000)
+                    raise
+                self.latency.record('probe', (time.perf_counter() - started) * 1000)
                 browser.close()
                 
                 if response and response.ok:
@@ -438,7 +982,7 @@ class AppleScraper:
                 logger.error(f"❌ Error probando conexión: {e}")
                 return False
     
-    def check_availability_with_cache(self) -> Dict[str, Any]:
+    def check_availability_with_cache(self, on_alert: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
         """
         🔁 FLUJO COMPLETO CON CACHÉ
         
@@ -453,6 +997,14 @@ class AppleScraper:
         8. Actualiza caché
         9. Cierra
         
+        Con `on_alert` (y EARLY_ALERT_ENABLED) los pasos 6-8 corren en cuanto se
+        intercepta la respuesta y la alerta sale antes de guardar el caché y de
+        cerrar el navegador.
+        
+        Args:
+            on_alert: Función que envía la alerta de un resultado con cambios
+                      (p. ej. main.notify_changes)
+        
         Returns:
             dict: {
                 'success': bool,
@@ -464,6 +1016,8 @@ class AppleScraper:
                 'available_stores': list,
                 'unavailable_stores': list,
                 'cache_age': str,              # Antigüedad del caché anterior
+                'notified': bool,              # La alerta ya se envió (alerta temprana)
+                'response_to_delivery_ms': float,  # Respuesta de Apple → entrega
                 'error': str (opcional)
             }
         """
@@ -480,8 +1034,60 @@ class AppleScraper:
         
         # PASO 1-5: Ejecutar scraping normal (abre, interactúa, intercepta, extrae)
         logger.info("🕷️ PASO 1-5: Ejecutando scraping...")
-        scraping_result = self.check_availability()
+        if on_alert and self.config.EARLY_ALERT_ENABLED:
+            # PASOS 6-8 desde el interceptor (ver _dispatch_early)
+            self._early = {
+                'on_alert': on_alert, 'cache_age': cache_age, 'result': None, 'notify': None,
+                'product_url': self.config.PRODUCT_URL, 'location': self.config.SEARCH_LOCATION,
+            }
+        try:
+            scraping_result = self.check_availability()
+        finally:
+            early, self._early = self._early, None
         
+        enriched = None
+        if early and early['result'] is not None:
+            try:
+                enriched = early['result'].result()
+            except Exception:
+                enriched = None  # Ya registrado por el pipeline: comparar ahora
+        
+        if enriched is None or not scraping_result.get('success'):
+            # Sin alerta temprana (resultado reutilizado, modo HTTP o payload no válido)
+            result = self.apply_cache(scraping_result, cache_age)
+            result['pipeline_ms'] = self.post.drain()
+            return result
+        
+        # El caché ya se actualizó y la alerta salió con el payload interceptado: el
+        # resultado es ese mismo (tiendas y comparación), con los metadatos del scrape
+        if CacheManager._snapshot_keys(scraping_result) != CacheManager._snapshot_keys(enriched):
+            logger.info("ℹ️ El payload final difiere del interceptado: se conserva el que se comparó y notificó")
+        result = {**scraping_result, **enriched}
+        # Durabilidad: caché, archivo y notificación terminados antes de devolver
+        result['pipeline_ms'] = self.post.drain()
+        if early['notify']:
+            result['notified'] = True
+            result['response_to_delivery_ms'] = round(early['delivery_ms'], 1)
+            logger.info(f"⏱️ Respuesta de Apple → notificación entregada: {early['delivery_ms']:.0f} ms")
+        return result
+
+    def apply_cache(self, scraping_result: Dict[str, Any], cache_age: Optional[str] = None,
+                    on_alert: Optional[Callable[[Dict[str, Any]], Any]] = None) -> Dict[str, Any]:
+        """
+        Compara un resultado de scraping con el caché y lo actualiza (PASOS 6-9)
+
+        Usado por check_availability_with_cache y por el barrido multi-proceso,
+        que reúne los resultados de todos los workers antes de llamar aquí.
+
+        Args:
+            scraping_result: Resultado de check_availability (o resultado combinado)
+            cache_age: Antigüedad del caché anterior (solo informativo)
+            on_alert: Si hay que alertar, se llama con el resultado enriquecido
+                      justo después de comparar y antes de guardar el caché
+
+        Returns:
+            dict: Resultado enriquecido con información de cambios
+        """
         # Si el scraping falló, retornar error
         if not scraping_result.get('success'):
             logger.error("❌ Scraping falló - No se puede continuar")
@@ -495,28 +1101,47 @@ class AppleScraper:
         
         logger.info(f"✅ Scraping completado - {len(scraping_result['available_stores'])} tiendas con stock")
         
-        # PASO 6: Comparar con caché
-        logger.info("🔍 PASO 6: Comparando con caché...")
-        comparison = self.cache_manager.compare_with_cache(scraping_result)
-        
-        # PASO 7: Determinar si debe alertar
-        has_changes = comparison['has_changes']
-        is_first_run = comparison.get('is_first_run', False)
-        should_alert = has_changes  # Alertar solo si hay cambios
-        
-        if has_changes:
-            if is_first_run:
-                logger.info("🆕 Primera ejecución - Se guardará estado inicial")
+        # PASOS 6-8 bajo el lock del caché: otra ejecución no puede leer entre medias
+        # (alertas duplicadas) ni sobrescribir el resultado (actualizaciones perdidas)
+        with self.cache_manager.lock:
+            # Barrido con tareas fallidas: lo no observado conserva su estado (ni alerta ni se pierde)
+            if scraping_result.get('partial'):
+                scraping_result = self.cache_manager.carry_forward(scraping_result)
+            
+            # PASO 6: Comparar con caché
+            logger.info("🔍 PASO 6: Comparando con caché...")
+            comparison = self.cache_manager.compare_with_cache(scraping_result)
+            
+            # PASO 7: Determinar si debe alertar
+            has_changes = comparison['has_changes']
+            is_first_run = comparison.get('is_first_run', False)
+            should_alert = has_changes  # Alertar solo si hay cambios
+            
+            if has_changes:
+                if is_first_run:
+                    logger.info("🆕 Primera ejecución - Se guardará estado inicial")
+                else:
+                    logger.info(f"🔔 CAMBIOS DETECTADOS - Se debe enviar alerta")
+                    logger.info(f"   {comparison['summary']}")
             else:
-                logger.info(f"🔔 CAMBIOS DETECTADOS - Se debe enviar alerta")
+                logger.info(f"ℹ️ Sin cambios - No se enviará alerta")
                 logger.info(f"   {comparison['summary']}")
-        else:
-            logger.info(f"ℹ️ Sin cambios - No se enviará alerta")
-            logger.info(f"   {comparison['summary']}")
-        
-        # PASO 8: Actualizar caché (siempre actualizar con datos más recientes)
-        logger.info("💾 PASO 8: Actualizando caché...")
-        self.cache_manager.save_cache(scraping_result)
+            
+            enriched = {
+                **scraping_result,
+                'has_changes': has_changes,
+                'should_alert': should_alert,
+                'changes': comparison['changes'],
+                'summary': comparison['summary'],
+                'cache_age': cache_age,
+                'is_first_run': is_first_run
+            }
+            if should_alert and on_alert:
+                on_alert(enriched)
+            
+            # PASO 8: Actualizar caché (siempre actualizar con datos más recientes)
+            logger.info("💾 PASO 8: Actualizando caché...")
+            self.cache_manager.save_cache(scraping_result)
         
         # PASO 9: (El cierre ya se hizo en check_availability)
         logger.info("✅ PASO 9: Navegador cerrado")
@@ -526,12 +1151,4 @@ class AppleScraper:
         logger.info("=" * 70)
         
         # Retornar resultado enriquecido
-        return {
-            **scraping_result,
-            'has_changes': has_changes,
-            'should_alert': should_alert,
-            'changes': comparison['changes'],
-            'summary': comparison['summary'],
-            'cache_age': cache_age,
-            'is_first_run': is_first_run
-        }
+        return enriched
@@ -0,0 +1,240 @@
+"""
+Pool de navegadores para ejecución prolongada
+Reutiliza Chromium entre scrapes y lo recicla por usos o por memoria
+"""
+
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+from playwright.sync_api import sync_playwright, Browser, Page, Playwright
+
+from config import Config
+from utils.process_memory import get_children_rss
+
+logger = logging.getLogger('AppleStockBot')
+
+# Argumentos de lanzamiento y contexto comunes a todos los navegadores
+LAUNCH_ARGS: List[str] = ['--disable-blink-features=AutomationControlled']  # Evitar detección de bot
+CONTEXT_OPTIONS: Dict[str, Any] = {
+    'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'viewport': {'width': 1920, 'height': 1080},
+    'locale': 'en-US',
+    'timezone_id': 'America/New_York'
+}
+
+# Flags que recortan trabajo de fondo de Chromium (actualizaciones, sync, telemetría...)
+_BACKGROUND_ARGS: List[str] = [
+    '--disable-background-networking',
+    '--disable-component-update',
+    '--disable-default-apps',
+    '--disable-extensions',
+    '--disable-sync',
+    '--metrics-recording-only',
+    '--mute-audio',
+    '--no-first-run',
+    '--disable-features=Translate,MediaRouter,OptimizationHints,AutofillServerCommunication',
+]
+
+# Perfiles de lanzamiento (BROWSER_PROFILE): flags extra sobre LAUNCH_ARGS y ajustes
+# de contexto. Elegir con `python main.py --benchmark-launch` el más rápido que
+# siga obteniendo una respuesta de fulfillment válida
+LAUNCH_PROFILES: Dict[str, Dict[str, Any]] = {
+    'default': {
+        'args': [],
+        'viewport': {'width': 1920, 'height': 1080},
+        'service_workers': 'allow',
+    },
+    'lean': {
+        'args': _BACKGROUND_ARGS,
+        'viewport': {'width': 1280, 'height': 800},
+        'service_workers': 'block',
+    },
+    'minimal': {
+        'args': _BACKGROUND_ARGS + [
+            '--disable-gpu',
+            '--disable-dev-shm-usage',
+            '--blink-settings=imagesEnabled=false',
+        ],
+        'viewport': {'width': 1024, 'height': 768},
+        'service_workers': 'block',
+    },
+}
+
+
+def launch_args(profile: Optional[str] = None) -> List[str]:
+    """
+    Argumentos de Chromium de un perfil
+
+    Args:
+        profile: Nombre en LAUNCH_PROFILES (default: Config.BROWSER_PROFILE)
+    """
+    return LAUNCH_ARGS + LAUNCH_PROFILES[profile or Config.BROWSER_PROFILE]['args']
+
+
+def context_options(profile: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Opciones de new_context de un perfil
+
+    Args:
+        profile: Nombre en LAUNCH_PROFILES (default: Config.BROWSER_PROFILE)
+    """
+    spec = LAUNCH_PROFILES[profile or Config.BROWSER_PROFILE]
+    return {**CONTEXT_OPTIONS, 'viewport': spec['viewport'], 'service_workers': spec['service_workers']}
+
+
+class BrowserPool:
+    """
+    Pool de navegadores Chromium con contextos desechables
+
+    - Cada checkout crea un contexto nuevo (cookies limpias) sobre un
+      navegador ya lanzado y lo valida con una prueba barata.
+    - Al devolverlo se cierra el contexto (página, listeners y cookies).
+    - El navegador se recicla tras BROWSER_MAX_USES usos o cuando el RSS
+      de los procesos hijos supera BROWSER_MAX_RSS_MB.
+
+    La API síncrona de Playwright está ligada a un hilo: cada hilo o
+    proceso worker debe tener su propio pool.
+    """
+
+    def __init__(self, max_uses: Optional[int] = None, max_rss_mb: Optional[int] = None):
+        """
+        Inicializa el pool (el navegador se lanza en el primer checkout)
+
+        Args:
+            max_uses: Usos antes de reciclar (default: Config.BROWSER_MAX_USES)
+            max_rss_mb: Límite de RSS de los hijos en MB (default: Config.BROWSER_MAX_RSS_MB)
+        """
+        self.max_uses = max_uses or Config.BROWSER_MAX_USES
+        self.max_rss = (max_rss_mb or Config.BROWSER_MAX_RSS_MB) * 1024 * 1024
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._profile: Optional[str] = None  # Perfil con el que se lanzó el navegador actual
+        self._uses = 0
+        self.recycles = 0
+
+    def refresh_config(self) -> None:
+        """Aplica los límites de reciclado (y el perfil) de una configuración recargada"""
+        self.max_uses = Config.BROWSER_MAX_USES
+        self.max_rss = Config.BROWSER_MAX_RSS_MB * 1024 * 1024
+        if self._browser and self._profile != Config.BROWSER_PROFILE:
+            self._recycle(f"perfil {self._profile} → {Config.BROWSER_PROFILE}")
+
+    def start(self) -> 'BrowserPool':
+        """Arranca el driver de Playwright"""
+        if not self._playwright:
+            self._playwright = sync_playwright().start()
+        return self
+
+    def close(self) -> None:
+        """Cierra el navegador y detiene Playwright"""
+        self._close_browser()
+        if self._playwright:
+            try:
+                self._playwright.stop()
+            except Exception:
+                pass
+            self._playwright = None
+
+    def __enter__(self) -> 'BrowserPool':
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @contextmanager
+    def checkout(self, proxy: Optional[Dict[str, str]] = None) -> Iterator[Page]:
+        """
+        Presta una página en un contexto nuevo
+
+        Args:
+            proxy: Proxy de salida del contexto (formato de Playwright,
+                   ver utils.proxy_pool.to_playwright_proxy)
+
+        Yields:
+            Page lista para navegar
+        """
+        self.start()
+        context = None
+        page = None
+
+        for _ in range(2):
+            browser = self._get_browser()
+            try:
+                context = browser.new_context(**context_options(), proxy=proxy)
+                page = context.new_page()
+                if self._is_healthy(page):
+                    break
+            except Exception as e:
+                logger.warning(f"⚠️ Contexto no saludable: {e}")
+
+            # Navegador en mal estado: reciclar y reintentar una vez
+            if context:
+                self._safe_close(context)
+            context = page = None
+            self._recycle("falló la prueba de salud")
+
+        if not page:
+            raise RuntimeError("No se pudo obtener un contexto saludable del pool")
+
+        try:
+            yield page
+        finally:
+            # Quien registra listeners los quita (ver _extract_availability_data);
+            # cerrar el contexto libera además la página y sus handlers
+            self._safe_close(context)
+            self._uses += 1
+            self._maybe_recycle()
+
+    def _get_browser(self) -> Browser:
+        """Devuelve el navegador actual o lanza uno nuevo"""
+        if self._browser and self._browser.is_connected():
+            return self._browser
+
+        logger.info(
+            f"🚀 Pool: lanzando navegador (headless={Config.PLAYWRIGHT_HEADLESS}, perfil {Config.BROWSER_PROFILE})"
+        )
+        self._browser = self._playwright.chromium.launch(
+            headless=Config.PLAYWRIGHT_HEADLESS,
+            args=launch_args()
+        )
+        self._profile = Config.BROWSER_PROFILE
+        self._uses = 0
+        return self._browser
+
+    @staticmethod
+    def _is_healthy(page: Page) -> bool:
+        """Prueba barata: el renderer responde a una evaluación JS"""
+        try:
+            return page.evaluate('() => 1 + 1') == 2
+        except Exception:
+            return False
+
+    def _maybe_recycle(self) -> None:
+        """Recicla el navegador si superó los usos o la memoria permitida"""
+        if self._uses >= self.max_uses:
+            self._recycle(f"{self._uses} usos")
+            return
+
+        rss = get_children_rss()
+        if rss is not None and rss > self.max_rss:
+            self._recycle(f"RSS {rss // (1024 * 1024)} MB")
+
+    def _recycle(self, reason: str) -> None:
+        """Cierra el navegador actual; el próximo checkout lanzará otro"""
+        logger.info(f"♻️ Pool: reciclando navegador ({reason})")
+        self._close_browser()
+        self.recycles += 1
+
+    def _close_browser(self) -> None:
+        if self._browser:
+            self._safe_close(self._browser)
+            self._browser = None
+        self._uses = 0
+
+    @staticmethod
+    def _safe_close(target: Any) -> None:
+        try:
+            target.close()
+        except Exception:
+            pass
@@ -0,0 +1,269 @@
+"""
+Motor híbrido de fulfillment-messages
+El navegador captura la petición real una vez; las consultas siguientes la repiten por HTTP
+o, con la página ya abierta, en paralelo desde la propia sesión del navegador (fan-out)
+"""
+
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+
+from config import Config
+from utils.file_lock import FileLock
+from utils.proxy_pool import proxy_label
+
+logger = logging.getLogger('AppleStockBot')
+
+# Cabeceras que no se copian de la petición capturada: las pone requests
+# (host, longitud, compresión), van en el cookie jar o son pseudo-cabeceras HTTP/2
+_SKIPPED_HEADERS = {'host', 'cookie', 'content-length', 'accept-encoding', 'connection'}
+
+# fetch() concurrente dentro de la página: comparte cookies y origen de la sesión.
+# Como mucho `concurrency` peticiones en vuelo; el resultado conserva el orden de `urls`
+FANOUT_SCRIPT = """
+async ({urls, headers, concurrency}) => {
+    const results = new Array(urls.length);
+    let next = 0;
+    const worker = async () => {
+        while (next < urls.length) {
+            const i = next++;
+            const started = performance.now();
+            try {
+                const response = await fetch(urls[i], {credentials: 'include', headers});
+                const body = response.ok ? await response.json().catch(() => null) : null;
+                results[i] = {status: response.status, body, ms: performance.now() - started};
+            } catch (e) {
+                results[i] = {status: 0, body: null, error: String(e), ms: performance.now() - started};
+            }
+        }
+    };
+    await Promise.all(Array.from({length: Math.min(concurrency, urls.length)}, worker));
+    return results;
+}
+"""
+
+
+def template_key(product_url: str, location: str) -> str:
+    """Clave de plantilla: una por (producto, ubicación), igual que el coalescing de fetches"""
+    return f"{product_url}|{location.strip().lower()}"
+
+
+def fetch_headers(headers: Dict[str, str]) -> Dict[str, str]:
+    """
+    Cabeceras capturadas que fetch() puede reenviar desde la página
+
+    El navegador pone por su cuenta user-agent, referer, sec-* y cookies
+    (y rechaza que la página las fije), así que solo pasan las propias de
+    la aplicación (x-aos-*, accept...).
+    """
+    return {
+        name: value for name, value in headers.items()
+        if not name.startswith(':') and name.lower() not in _SKIPPED_HEADERS
+        and not name.lower().startswith('sec-') and name.lower() not in ('user-agent', 'referer', 'origin')
+    }
+
+
+def fan_out(page, urls: List[str], headers: Dict[str, str], concurrency: int) -> List[Dict[str, Any]]:
+    """
+    Lanza varias peticiones de fulfillment a la vez desde una página ya navegada
+
+    Args:
+        page: Page de Playwright con la sesión de Apple establecida
+        urls: URLs a consultar
+        headers: Cabeceras extra (ver fetch_headers)
+        concurrency: Peticiones simultáneas como máximo
+
+    Returns:
+        list: {'status', 'body', 'ms', 'error'?} por URL, en el mismo orden
+    """
+    return page.evaluate(FANOUT_SCRIPT, {'urls': urls, 'headers': headers, 'concurrency': max(1, concurrency)})
+
+
+def build_url(url: str, overrides: Optional[Dict[str, str]] = None) -> str:
+    """
+    URL de la plantilla con parámetros sustituidos
+
+    Args:
+        url: URL capturada
+        overrides: Parámetros a reemplazar o añadir (p. ej. {'parts.0': 'MXXXX'});
+                   un valor None elimina el parámetro
+    """
+    if not overrides:
+        return url
+    parts = urlsplit(url)
+    params = dict(parse_qsl(parts.query, keep_blank_values=True))
+    for name, value in overrides.items():
+        if value is None:
+            params.pop(name, None)
+        else:
+            params[name] = value
+    return urlunsplit(parts._replace(query=urlencode(params)))
+
+
+def is_valid_payload(payload: Any) -> bool:
+    """Un payload de fulfillment es válido si trae tiendas en pickupMessage"""
+    try:
+        stores = payload['body']['content']['pickupMessage']['stores']
+    except (KeyError, TypeError):
+        return False
+    return isinstance(stores, list) and len(stores) > 0
+
+
+class HybridEngine:
+    """
+    Repite por HTTP la petición de fulfillment que hizo el navegador
+
+    - harvest(): tras un scrape válido guarda URL, cabeceras y cookies de la
+      petición interceptada (CACHE_DIR/fulfillment_templates.json).
+    - poll(): mientras la plantilla tenga menos de HYBRID_TEMPLATE_TTL_MIN,
+      la reenvía con requests y valida la respuesta. Si falla, la plantilla
+      se descarta y el llamador vuelve al flujo de Playwright, que captura
+      una nueva.
+
+    Así la mayoría de consultas no lanzan navegador y el contrato de la API
+    no se mantiene a mano: siempre es el que Apple usó en la última captura.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, ttl_min: Optional[float] = None,
+                 governor=None):
+        """
+        Inicializa el motor
+
+        Args:
+            cache_dir: Directorio de las plantillas (default: Config.CACHE_DIR)
+            ttl_min: Minutos de validez de una plantilla (default: Config.HYBRID_TEMPLATE_TTL_MIN)
+            governor: RateGovernor para las peticiones HTTP (None = sin límite)
+        """
+        cache_dir = cache_dir or Config.CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.templates_file = os.path.join(cache_dir, 'fulfillment_templates.json')
+        self.lock = FileLock(os.path.join(cache_dir, 'fulfillment_templates.lock'))
+        self.ttl = (ttl_min or Config.HYBRID_TEMPLATE_TTL_MIN) * 60
+        self.governor = governor
+        self.polls = 0
+        self.fallbacks = 0
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.templates_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, templates: Dict[str, Dict[str, Any]]) -> None:
+        tmp_file = f"{self.templates_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(templates, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.templates_file)
+
+    def _update(self, key: str, template: Optional[Dict[str, Any]]) -> None:
+        """Guarda (o borra con None) una plantilla sin pisar las de otros procesos"""
+        with self.lock:
+            templates = self._load()
+            if template is None:
+                templates.pop(key, None)
+            else:
+                templates[key] = template
+            self._save(templates)
+
+    def get(self, product_url: str, location: str) -> Optional[Dict[str, Any]]:
+        """Plantilla vigente para (producto, ubicación), o None si no hay o caducó"""
+        with self.lock:
+            template = self._load().get(template_key(product_url, location))
+        if not template or time.time() - template['captured_at'] > self.ttl:
+            return None
+        return template
+
+    def harvest(self, product_url: str, location: str, request: Dict[str, Any],
+                cookies: List[Dict[str, Any]]) -> None:
+        """
+        Guarda la petición interceptada por el navegador como plantilla
+
+        Args:
+            product_url: URL del producto del scrape
+            location: Ubicación del scrape
+            request: {'url': str, 'headers': dict} de la petición a fulfillment-messages
+            cookies: Cookies del contexto (BrowserContext.cookies())
+        """
+        headers = {
+            name: value for name, value in request['headers'].items()
+            if not name.startswith(':') and name.lower() not in _SKIPPED_HEADERS
+        }
+        template = {
+            'url': request['url'],
+            'headers': headers,
+            'cookies': [
+                {'name': c['name'], 'value': c['value'], 'domain': c.get('domain', ''), 'path': c.get('path', '/')}
+                for c in cookies if 'apple.com' in c.get('domain', '')
+            ],
+            'captured_at': time.time(),
+        }
+        self._update(template_key(product_url, location), template)
+        logger.info(f"🧬 Plantilla de fulfillment capturada ({len(template['cookies'])} cookies)")
+
+    def poll(self, product_url: str, location: str, proxy: Optional[str] = None,
+             overrides: Optional[Dict[str, str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Reenvía la plantilla por HTTP
+
+        Args:
+            product_url: URL del producto
+            location: Ubicación
+            proxy: Proxy de salida (None = conexión directa)
+            overrides: Parámetros a sustituir en la URL capturada
+
+        Returns:
+            dict: Payload de fulfillment válido, o None si no hay plantilla vigente
+                  o la respuesta no pasó la validación (hay que usar el navegador)
+        """
+        key = template_key(product_url, location)
+        template = self.get(product_url, location)
+        if not template:
+            return None
+
+        url = build_url(template['url'], overrides)
+        session = requests.Session()
+        session.headers.update(template['headers'])
+        for cookie in template['cookies']:
+            session.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'], path=cookie['path'])
+        if proxy:
+            session.proxies = {'http': proxy, 'https': proxy}
+
+        if self.governor:
+            self.governor.acquire(url, proxy_label(proxy) if proxy else None)
+
+        self.polls += 1
+        started = time.perf_counter()
+        status = 'N/A'
+        try:
+            response = session.get(url, timeout=Config.HYBRID_HTTP_TIMEOUT_SEC, allow_redirects=False)
+            status = response.status_code
+            payload = response.json() if status == 200 else None
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"⚠️ Petición HTTP de fulfillment fallida: {e}")
+            payload = None
+        finally:
+            session.close()
+
+        if not is_valid_payload(payload):
+            logger.warning(f"🔁 Plantilla de fulfillment rechazada (status {status}) - se vuelve al navegador")
+            self.fallbacks += 1
+            self._update(key, None)
+            return None
+
+        # Apple renueva cookies de sesión en las respuestas: conservarlas alarga la plantilla
+        template['cookies'] = [
+            {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path}
+            for c in session.cookies
+        ]
+        self._update(key, template)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        age_min = (time.time() - template['captured_at']) / 60
+        logger.info(f"⚡ Fulfillment por HTTP en {elapsed_ms:.0f} ms (plantilla de hace {age_min:.0f} min)")
+        return payload
@@ -0,0 +1,283 @@
+"""
+API HTTP local de disponibilidad (modo --watch)
+Servidor asyncio de la stdlib que sirve el último estado y los cambios recientes
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from config import Config
+
+logger = logging.getLogger('AppleStockBot')
+
+_REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed'}
+
+
+def _dumps(data: Any) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'), default=str).encode('utf-8')
+
+
+class StateHub:
+    """
+    Último estado publicado + eventos de cambio recientes
+
+    El hilo de watch llama a publish(); el servidor (otro hilo, con su event
+    loop) solo lee. El cuerpo JSON y su ETag se calculan una vez por
+    publicación, así cada lector cuesta una copia de bytes y nunca un scrape.
+
+    El ETag se calcula solo sobre el contenido de disponibilidad (tienda,
+    parte, estado y plazo), no sobre el timestamp: un scrape sin cambios
+    conserva cuerpo y ETag, y los clientes siguen recibiendo 304. El
+    'timestamp' del cuerpo es, por tanto, el del último cambio.
+    """
+
+    def __init__(self, max_events: Optional[int] = None):
+        """
+        Inicializa el hub
+
+        Args:
+            max_events: Eventos de cambio a conservar (default: Config.API_EVENTS_MAX)
+        """
+        self._lock = threading.Lock()
+        self._events: deque = deque(maxlen=max_events or Config.API_EVENTS_MAX)
+        self._seq = 0
+        self._body = _dumps({'available_stores': [], 'unavailable_stores': [], 'timestamp': None})
+        self._etag = self._make_etag(self._content({}))
+        self._updated: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._changed: Optional[asyncio.Future] = None
+
+    @staticmethod
+    def _make_etag(content: bytes) -> str:
+        return f'"{hashlib.sha1(content).hexdigest()[:16]}"'
+
+    @staticmethod
+    def _content(result: Dict[str, Any]) -> bytes:
+        """Contenido de disponibilidad de un resultado, ordenado y sin metadatos volátiles"""
+        rows = sorted(
+            [
+                store.get('store_number', ''),
+                (store.get('part_info') or {}).get('part_number') or '',
+                store.get('status', ''),
+                store.get('pickup_quote', ''),
+            ]
+            for store in result.get('available_stores', []) + result.get('unavailable_stores', [])
+        )
+        return _dumps({'product': result.get('product'), 'stores': rows})
+
+    def attach(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Asocia el event loop del servidor (para despertar a los long-polls)"""
+        self._loop = loop
+        self._changed = loop.create_future()
+
+    def publish(self, result: Dict[str, Any]) -> None:
+        """
+        Publica un resultado (llamado desde el hilo de watch)
+
+        Args:
+            result: Resultado de check_availability_with_cache o datos del caché
+        """
+        if not result.get('success', True):
+            return  # Un scrape fallido no invalida el último estado bueno
+
+        snapshot = {
+            'timestamp': result.get('timestamp'),
+            'product': result.get('product'),
+            'available_stores': result.get('available_stores', []),
+            'unavailable_stores': result.get('unavailable_stores', []),
+        }
+        etag = self._make_etag(self._content(snapshot))
+        now = datetime.now().isoformat(timespec='seconds')
+
+        with self._lock:
+            self._updated = now
+            changed = etag != self._etag
+            if changed:
+                self._body = _dumps(snapshot)
+                self._etag = etag
+
+            if not result.get('is_first_run'):
+                for event in ('new_available', 'new_unavailable'):
+                    for store in (result.get('changes') or {}).get(event, []):
+                        self._seq += 1
+                        self._events.append({'seq': self._seq, 'ts': now, 'event': event, 'store': store})
+                        changed = True
+
+        if changed and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._notify)
+
+    def _notify(self) -> None:
+        """Despierta a todos los long-polls (en el hilo del event loop)"""
+        waiter, self._changed = self._changed, self._loop.create_future()
+        if not waiter.done():
+            waiter.set_result(None)
+
+    def snapshot(self) -> Tuple[bytes, str]:
+        """Cuerpo JSON y ETag actuales"""
+        with self._lock:
+            return self._body, self._etag
+
+    def events_since(self, seq: int) -> Tuple[List[Dict[str, Any]], int]:
+        """Eventos con seq > `seq` y último seq emitido"""
+        with self._lock:
+            return [e for e in self._events if e['seq'] > seq], self._seq
+
+    def health(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'status': 'ok', 'updated': self._updated, 'last_seq': self._seq, 'etag': self._etag}
+
+    async def wait_change(self, timeout: float) -> bool:
+        """
+        Espera la siguiente publicación con cambios
+
+        Returns:
+            bool: True si hubo cambio, False si venció el timeout
+        """
+        try:
+            await asyncio.wait_for(asyncio.shield(self._changed), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+
+class ApiServer:
+    """
+    Servidor HTTP/1.1 mínimo sobre asyncio.start_server, en su propio hilo
+
+    Endpoints (solo GET):
+    - /availability[?wait=N]: estado actual. Con If-None-Match igual al ETag
+      responde 304; si además hay wait, espera hasta N s al siguiente cambio.
+    - /events?since=SEQ[&wait=N]: cambios con seq > SEQ (long-poll si no hay).
+    - /health: última actualización y último seq.
+    """
+
+    def __init__(self, hub: StateHub, host: Optional[str] = None, port: Optional[int] = None):
+        """
+        Inicializa el servidor
+
+        Args:
+            hub: Estado compartido con el hilo de watch
+            host: Interfaz (default: Config.API_HOST)
+            port: Puerto (default: Config.API_PORT)
+        """
+        self.hub = hub
+        self.host = host or Config.API_HOST
+        self.port = port or Config.API_PORT
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None
+
+    def start(self) -> None:
+        """Arranca el servidor en segundo plano (espera a que escuche)"""
+        self._thread = threading.Thread(target=self._serve, name='http-api', daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error:
+            raise self._error
+        logger.info(f"🌐 API HTTP escuchando en http://{self.host}:{self.port}")
+
+    def stop(self) -> None:
+        """Detiene el servidor"""
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _serve(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self.hub.attach(self._loop)
+            server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, self.port)
+            )
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+            return
+
+        self._ready.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            server.close()
+            self._loop.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Atiende una petición (Connection: close)"""
+        try:
+            request_line = (await asyncio.wait_for(reader.readline(), 10)).decode('latin-1').strip()
+            headers = {}
+            while True:
+                line = (await asyncio.wait_for(reader.readline(), 10)).decode('latin-1').strip()
+                if not line:
+                    break
+                name, _, value = line.partition(':')
+                headers[name.strip().lower()] = value.strip()
+
+            parts = request_line.split()
+            if len(parts) < 2:
+                status, body, etag = 400, _dumps({'error': 'bad request'}), None
+            elif parts[0] != 'GET':
+                status, body, etag = 405, _dumps({'error': 'method not allowed'}), None
+            else:
+                status, body, etag = await self._route(parts[1], headers)
+
+            self._respond(writer, status, body, etag)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"❌ Error en API HTTP: {e}")
+        finally:
+            writer.close()
+
+    async def _route(self, target: str, headers: Dict[str, str]) -> Tuple[int, bytes, Optional[str]]:
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        try:
+            wait = min(float(query.get('wait', ['0'])[0]), Config.API_MAX_WAIT_SEC)
+            since = int(query.get('since', ['0'])[0])
+        except ValueError:
+            return 400, _dumps({'error': 'invalid wait/since'}), None
+
+        if url.path == '/availability':
+            body, etag = self.hub.snapshot()
+            if headers.get('if-none-match') == etag:
+                if wait > 0 and await self.hub.wait_change(wait):
+                    body, etag = self.hub.snapshot()
+                if headers.get('if-none-match') == etag:
+                    return 304, b'', etag
+            return 200, body, etag
+
+        if url.path == '/events':
+            events, last_seq = self.hub.events_since(since)
+            if not events and wait > 0 and await self.hub.wait_change(wait):
+                events, last_seq = self.hub.events_since(since)
+            return 200, _dumps({'events': events, 'last_seq': last_seq}), None
+
+        if url.path == '/health':
+            return 200, _dumps(self.hub.health()), None
+
+        return 404, _dumps({'error': 'not found'}), None
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, body: bytes, etag: Optional[str]) -> None:
+        head = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            'Content-Type: application/json; charset=utf-8',
+            f"Content-Length: {len(body)}",
+            'Cache-Control: no-cache',
+            'Connection: close',
+        ]
+        if etag:
+            head.append(f"ETag: {etag}")
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
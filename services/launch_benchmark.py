@@ -0,0 +1,161 @@
+"""
+Benchmark de perfiles de lanzamiento de Chromium
+Mide lanzamiento → primera respuesta → respuesta de fulfillment y memoria por perfil
+"""
+
+import logging
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+from playwright.sync_api import sync_playwright, Playwright
+
+from config import Config
+from services.apple_scraper import AppleScraper
+from services.browser_pool import LAUNCH_PROFILES, launch_args, context_options
+from utils.process_memory import get_children_rss
+
+logger = logging.getLogger('AppleStockBot')
+
+
+class LaunchBenchmark:
+    """
+    Compara los perfiles de LAUNCH_PROFILES con scrapes reales
+
+    Cada ejecución lanza un Chromium nuevo con el perfil, recorre el mismo
+    flujo que un scrape normal (_run_flow) y registra:
+    - launch_ms: hasta que el navegador está lanzado
+    - first_response_ms: hasta la primera respuesta HTTP de la página
+    - fulfillment_ms: hasta la respuesta de fulfillment-messages
+    - rss_mb: RSS de Chromium y el driver con la página cargada
+    - valid: el scrape devolvió tiendas
+
+    Un perfil solo es recomendable si todas sus ejecuciones fueron válidas.
+    """
+
+    def __init__(self, profiles: Optional[List[str]] = None, runs: int = 3,
+                 product_url: Optional[str] = None, location: Optional[str] = None):
+        """
+        Inicializa el benchmark
+
+        Args:
+            profiles: Perfiles a medir (default: todos los de LAUNCH_PROFILES)
+            runs: Ejecuciones por perfil (se alternan los perfiles en cada ronda)
+            product_url: URL del producto (default: Config.PRODUCT_URL)
+            location: Ubicación (default: Config.SEARCH_LOCATION)
+        """
+        self.profiles = profiles or list(LAUNCH_PROFILES)
+        unknown = [name for name in self.profiles if name not in LAUNCH_PROFILES]
+        if unknown:
+            raise ValueError(f"Perfil(es) desconocido(s): {', '.join(unknown)} (disponibles: {', '.join(LAUNCH_PROFILES)})")
+        self.runs = runs
+        self.product_url = product_url or Config.PRODUCT_URL
+        self.location = location or Config.SEARCH_LOCATION
+        self.scraper = AppleScraper()
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Ejecuta el benchmark
+
+        Returns:
+            dict: {
+                'profiles': {perfil: resumen},
+                'samples': {perfil: list[dict]},
+                'recommended': str | None   # Más rápido con todas las ejecuciones válidas
+            }
+        """
+        logger.info(f"⏱️ Benchmark de lanzamiento: {', '.join(self.profiles)} × {self.runs} ejecución(es)")
+        samples: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.profiles}
+
+        with sync_playwright() as p:
+            # Rondas alternas: la red y la caché del SO afectan igual a todos los perfiles
+            for round_number in range(1, self.runs + 1):
+                for name in self.profiles:
+                    sample = self._measure(p, name)
+                    samples[name].append(sample)
+                    logger.info(
+                        f"   [{round_number}/{self.runs}] {name}: "
+                        f"{sample['fulfillment_ms'] or '-'} ms fulfillment, "
+                        f"{sample['rss_mb'] or '-'} MB, {'válido' if sample['valid'] else 'NO válido'}"
+                    )
+
+        summaries = {name: self._summarize(runs) for name, runs in samples.items()}
+        candidates = [
+            name for name, summary in summaries.items()
+            if summary['valid_runs'] == self.runs and summary['fulfillment_ms'] is not None
+        ]
+        recommended = min(candidates, key=lambda name: summaries[name]['fulfillment_ms'], default=None)
+
+        report = {'profiles': summaries, 'samples': samples, 'recommended': recommended}
+        self._log_report(report)
+        return report
+
+    def _measure(self, p: Playwright, profile: str) -> Dict[str, Any]:
+        """Una ejecución completa con un perfil"""
+        marks: Dict[str, float] = {}
+        sample: Dict[str, Any] = {
+            'launch_ms': None, 'first_response_ms': None, 'fulfillment_ms': None,
+            'total_ms': None, 'rss_mb': None, 'valid': False, 'error': None,
+        }
+
+        def handle_response(response):
+            now = time.perf_counter()
+            marks.setdefault('first_response', now)
+            if 'fulfillment-messages' in response.url and response.ok:
+                marks.setdefault('fulfillment', now)
+
+        started = time.perf_counter()
+        browser = None
+        try:
+            browser = p.chromium.launch(headless=Config.PLAYWRIGHT_HEADLESS, args=launch_args(profile))
+            sample['launch_ms'] = round((time.perf_counter() - started) * 1000)
+
+            context = browser.new_context(**context_options(profile))
+            page = context.new_page()
+            page.on('response', handle_response)
+            result = self.scraper._run_flow(page, self.product_url, self.location)
+
+            rss = get_children_rss()
+            sample['rss_mb'] = round(rss / (1024 * 1024)) if rss is not None else None
+            sample['valid'] = bool(result['available_stores'] or result['unavailable_stores'])
+        except Exception as e:
+            logger.warning(f"⚠️ Benchmark {profile}: {e}")
+            sample['error'] = str(e)
+        finally:
+            if browser:
+                try:
+                    browser.close()
+                except Exception:
+                    pass
+
+        sample['total_ms'] = round((time.perf_counter() - started) * 1000)
+        for mark in ('first_response', 'fulfillment'):
+            if mark in marks:
+                sample[f'{mark}_ms'] = round((marks[mark] - started) * 1000)
+        return sample
+
+    @staticmethod
+    def _summarize(samples: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Medianas por métrica (solo de las ejecuciones que la registraron)"""
+        summary: Dict[str, Any] = {'valid_runs': sum(1 for s in samples if s['valid'])}
+        for metric in ('launch_ms', 'first_response_ms', 'fulfillment_ms', 'total_ms', 'rss_mb'):
+            values = [s[metric] for s in samples if s[metric] is not None]
+            summary[metric] = round(statistics.median(values)) if values else None
+        return summary
+
+    def _log_report(self, report: Dict[str, Any]) -> None:
+        """Muestra la tabla comparativa"""
+        logger.info("=" * 70)
+        logger.info("⏱️ BENCHMARK DE LANZAMIENTO (medianas)")
+        logger.info("=" * 70)
+        logger.info(f"   {'perfil':<10}{'launch':>9}{'1ª resp.':>10}{'fulfill.':>10}{'total':>9}{'RSS MB':>8}{'válidos':>9}")
+        for name, s in report['profiles'].items():
+            cells = [s[m] if s[m] is not None else '-' for m in
+                     ('launch_ms', 'first_response_ms', 'fulfillment_ms', 'total_ms', 'rss_mb')]
+            logger.info(f"   {name:<10}{cells[0]:>9}{cells[1]:>10}{cells[2]:>10}{cells[3]:>9}{cells[4]:>8}"
+                        f"{s['valid_runs']:>6}/{self.runs}")
+        logger.info("=" * 70)
+        if report['recommended']:
+            logger.info(f"🏁 Perfil recomendado: {report['recommended']} (BROWSER_PROFILE={report['recommended']})")
+        else:
+            logger.warning("⚠️ Ningún perfil obtuvo una respuesta de fulfillment válida en todas las ejecuciones")
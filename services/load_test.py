@@ -0,0 +1,392 @@
+"""
+Prueba de carga sintética
+Mide cómo escalan el parser, la comparación con el caché y el envío de mensajes de Telegram
+con payloads de fulfillment-messages generados de tamaño configurable
+"""
+
+import logging
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import Config
+from services.apple_scraper import AppleScraper
+from services.subscriptions import SubscriptionRegistry
+from services.telegram_bot import RecordingTelegramBot
+from utils.cache_manager import CacheManager
+from utils.store_catalog import StoreCatalog
+
+logger = logging.getLogger('AppleStockBot')
+
+# La prueba se repite con SCALE_FACTOR veces más tiendas para medir el crecimiento
+SCALE_FACTOR = 4
+
+COMPONENTS = ('parse', 'compare', 'notify')
+
+_CITIES = [
+    ('Miami', 'FL', '33131', 25.77, -80.19), ('Orlando', 'FL', '32801', 28.54, -81.38),
+    ('Austin', 'TX', '78701', 30.27, -97.74), ('Seattle', 'WA', '98101', 47.61, -122.33),
+    ('Denver', 'CO', '80202', 39.74, -104.99), ('Boston', 'MA', '02108', 42.36, -71.06),
+    ('Chicago', 'IL', '60601', 41.88, -87.63), ('Phoenix', 'AZ', '85004', 33.45, -112.07),
+]
+
+_QUOTES = {
+    'available': 'Available Today',
+    'unavailable': 'Currently unavailable',
+    'ineligible': 'Not available for pickup',
+}
+
+
+class SyntheticFulfillment:
+    """
+    Generador de payloads de fulfillment-messages con la estructura real
+
+    Mantiene un estado de disponibilidad por (tienda, parte) y en cada
+    advance() cambia una fracción `change_rate` de esas combinaciones, como
+    pasa entre dos ejecuciones reales. Con la misma semilla genera siempre
+    la misma secuencia.
+    """
+
+    def __init__(self, stores: int, parts: int, change_rate: float, seed: int = 0):
+        """
+        Args:
+            stores: Tiendas por payload
+            parts: Números de parte (un payload por parte)
+            change_rate: Fracción de (tienda, parte) que cambia de estado por ronda
+            seed: Semilla del generador
+        """
+        self.rng = random.Random(seed)
+        self.change_rate = change_rate
+        self.parts = [f"MF{n:03d}LL/A" for n in range(parts)]
+        self.stores = []
+        for n in range(stores):
+            city, state, postal_code, lat, lon = _CITIES[n % len(_CITIES)]
+            self.stores.append({
+                'storeNumber': f"R{n + 1:03d}",
+                'storeName': f"{city} Store {n + 1}",
+                'city': city,
+                'state': state,
+                'address': {'address': f"{100 + n} Main Street", 'address2': f"Suite {n}", 'postalCode': postal_code},
+                'storelatitude': lat + self.rng.uniform(-1, 1),
+                'storelongitude': lon + self.rng.uniform(-1, 1),
+                'phoneNumber': f"(555) 555-{n % 10000:04d}",
+                'storeDistanceWithUnit': f"{self.rng.uniform(0, 300):.1f} mi",
+                'reservationUrl': f"https://www.apple.com/retail/{city.lower()}-{n}",
+                'storeHours': {'hours': [{'storeTimings': '10:00 a.m. - 9:00 p.m.', 'storeDays': 'Mon - Sat:'}]},
+            })
+        statuses = list(_QUOTES)
+        self.status = {
+            (store['storeNumber'], part): self.rng.choices(statuses, weights=(2, 7, 1))[0]
+            for store in self.stores for part in self.parts
+        }
+
+    @property
+    def entries(self) -> int:
+        """Combinaciones (tienda, parte) por ronda"""
+        return len(self.status)
+
+    def advance(self) -> int:
+        """
+        Cambia el estado de change_rate × entries combinaciones
+
+        Returns:
+            int: Combinaciones cambiadas
+        """
+        keys = list(self.status)
+        changed = self.rng.sample(keys, round(len(keys) * self.change_rate))
+        for key in changed:
+            self.status[key] = 'unavailable' if self.status[key] == 'available' else 'available'
+        return len(changed)
+
+    def payload(self, part: str) -> Dict[str, Any]:
+        """Payload de fulfillment-messages de una parte con el estado actual"""
+        stores = []
+        for store in self.stores:
+            status = self.status[(store['storeNumber'], part)]
+            quote = _QUOTES[status]
+            stores.append({
+                **store,
+                'partsAvailability': {
+                    part: {
+                        'pickupDisplay': status,
+                        'pickupSearchQuote': quote,
+                        'storePickEligible': status != 'ineligible',
+                        'messageTypes': {
+                            'regular': {
+                                'storePickupProductTitle': f"iPhone 17 Pro {part}",
+                                'storePickupQuote': f"<span>{quote}</span>",
+                                'storeSelectionEnabled': True,
+                            }
+                        }
+                    }
+                }
+            })
+        return {
+            'head': {'status': '200', 'data': {}},
+            'body': {'content': {
+                'deliveryMessage': {part: {'regular': {'subHeader': f"For iPhone 17 Pro {part}"}}},
+                'pickupMessage': {'stores': stores, 'pickupLocation': 'Miami'},
+            }}
+        }
+
+    def payloads(self) -> List[Dict[str, Any]]:
+        """Un payload por parte (como un barrido de SKUs)"""
+        return [self.payload(part) for part in self.parts]
+
+
+class LoadTest:
+    """
+    Rendimiento y memoria de parse, compare y notify a dos escalas
+
+    Para cada escala (stores y stores × SCALE_FACTOR) se generan `rounds`
+    rondas con `change_rate` de cambios y se mide por componente:
+    - parse: _parse_fulfillment_data de todos los payloads de la ronda
+    - compare: compare_snapshots contra el snapshot compacto anterior + compact
+    - notify: el camino real de envío, SubscriptionRegistry.route del resultado
+      con los cambios y send_availability_report por chat (con un bot que
+      registra los mensajes en lugar de enviarlos)
+
+    El tiempo es el de la mejor ronda (menos ruido del SO) y la memoria el
+    pico de tracemalloc en una ronda aparte (tracemalloc ralentiza). La
+    prueba falla si el coste por combinación (tienda, parte) en tiempo o
+    memoria crece más de LOAD_TEST_MAX_SCALING veces al pasar a la escala
+    grande: un componente lineal se queda cerca de 1×, uno cuadrático en SCALE_FACTOR×.
+
+    El pico de memoria es determinista (misma semilla, mismas asignaciones);
+    el tiempo depende de la carga de la máquina. `checks` elige qué medidas
+    pueden hacer fallar la prueba: en CI conviene solo ('memory',).
+    """
+
+    def __init__(self, stores: int = 100, parts: int = 10, change_rate: float = 0.05,
+                 rounds: int = 5, seed: int = 0, checks: Tuple[str, ...] = ('time', 'memory')):
+        """
+        Inicializa la prueba
+
+        Args:
+            stores: Tiendas por payload en la escala pequeña
+            parts: Números de parte por ronda
+            change_rate: Fracción de (tienda, parte) que cambia por ronda
+            rounds: Rondas medidas por escala (más una de calentamiento)
+            seed: Semilla del generador
+            checks: Medidas cuyo escalado hace fallar la prueba ('time', 'memory')
+        """
+        if stores < 1 or parts < 1 or rounds < 1:
+            raise ValueError("stores, parts y rounds deben ser al menos 1")
+        if not 0 <= change_rate <= 1:
+            raise ValueError(f"change_rate debe estar entre 0 y 1: {change_rate}")
+        unknown = set(checks) - {'time', 'memory'}
+        if unknown:
+            raise ValueError(f"checks desconocidos: {', '.join(sorted(unknown))}")
+        self.stores = stores
+        self.parts = parts
+        self.change_rate = change_rate
+        self.rounds = rounds
+        self.seed = seed
+        self.checks = tuple(checks)
+        self.max_scaling = Config.LOAD_TEST_MAX_SCALING
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Ejecuta la prueba en las dos escalas
+
+        Returns:
+            dict: {
+                'scales': {'1x': {componente: medidas}, '4x': {...}},
+                'scaling': {componente: {'time': float, 'memory': float}},
+                'failures': list[str],
+                'passed': bool
+            }
+        """
+        logger.info(
+            f"🏋️ Prueba de carga: {self.stores}→{self.stores * SCALE_FACTOR} tiendas × {self.parts} partes, "
+            f"{self.change_rate:.0%} de cambios, {self.rounds} ronda(s)"
+        )
+
+        # El parser registra cada tienda en INFO; aquí solo interesan avisos
+        previous_level = logger.level
+        logger.setLevel(logging.WARNING)
+        try:
+            # Catálogo y caché en un directorio temporal: las tiendas sintéticas no llegan al real
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                scraper = AppleScraper()
+                scraper.catalog = StoreCatalog(tmp_dir)
+                cache_manager = CacheManager(tmp_dir, catalog=scraper.catalog)
+                bot = RecordingTelegramBot()
+                scales = {
+                    f"{factor}x": self._measure(scraper, cache_manager, bot, self.stores * factor)
+                    for factor in (1, SCALE_FACTOR)
+                }
+        finally:
+            logger.setLevel(previous_level)
+
+        small, large = scales['1x'], scales[f"{SCALE_FACTOR}x"]
+        scaling: Dict[str, Dict[str, Optional[float]]] = {}
+        failures: List[str] = []
+        for component in COMPONENTS:
+            scaling[component] = {
+                'time': self._ratio(large[component]['us_per_item'], small[component]['us_per_item']),
+                'memory': self._ratio(large[component]['bytes_per_item'], small[component]['bytes_per_item']),
+            }
+            for kind, ratio in scaling[component].items():
+                if kind in self.checks and ratio is not None and ratio > self.max_scaling:
+                    failures.append(f"{component}: coste por tienda en {'tiempo' if kind == 'time' else 'memoria'} "
+                                    f"×{ratio:.2f} al escalar ×{SCALE_FACTOR} (máx. ×{self.max_scaling:g})")
+
+        report = {
+            'stores': self.stores,
+            'parts': self.parts,
+            'change_rate': self.change_rate,
+            'rounds': self.rounds,
+            'scales': scales,
+            'scaling': scaling,
+            'max_scaling': self.max_scaling,
+            'checks': list(self.checks),
+            'failures': failures,
+            'passed': not failures,
+        }
+        self._log_report(report)
+        return report
+
+    def _measure(self, scraper: AppleScraper, cache_manager: CacheManager, bot: RecordingTelegramBot,
+                 stores: int) -> Dict[str, Dict[str, Any]]:
+        """Mide los tres componentes con `stores` tiendas por payload"""
+        generator = SyntheticFulfillment(stores, self.parts, self.change_rate, self.seed)
+        registry = SubscriptionRegistry(self._subscriptions(generator))
+        timings: Dict[str, List[float]] = {component: [] for component in COMPONENTS}
+
+        # Ronda 0 de calentamiento: puebla el catálogo y da el primer snapshot
+        result = self._parse(scraper, generator.payloads())
+        previous = CacheManager.compact(result)
+
+        for _ in range(self.rounds):
+            generator.advance()
+            payloads = generator.payloads()
+            result, elapsed = self._timed(lambda: self._parse(scraper, payloads))
+            timings['parse'].append(elapsed)
+            (comparison, previous), elapsed = self._timed(lambda: self._compare(cache_manager, previous, result))
+            timings['compare'].append(elapsed)
+            _, elapsed = self._timed(lambda: self._notify(registry, bot, self._report_input(result, comparison)))
+            timings['notify'].append(elapsed)
+
+        # Ronda extra con tracemalloc para los picos de memoria
+        generator.advance()
+        payloads = generator.payloads()
+        result, parse_peak = self._peak(lambda: self._parse(scraper, payloads))
+        (comparison, _), compare_peak = self._peak(lambda: self._compare(cache_manager, previous, result))
+        _, notify_peak = self._peak(lambda: self._notify(registry, bot, self._report_input(result, comparison)))
+        peaks = {'parse': parse_peak, 'compare': compare_peak, 'notify': notify_peak}
+
+        entries = generator.entries
+        measures = {}
+        for component in COMPONENTS:
+            best = min(timings[component])
+            measures[component] = {
+                'items': entries,
+                'best_ms': round(best * 1000, 3),
+                'median_ms': round(statistics.median(timings[component]) * 1000, 3),
+                'items_per_sec': round(entries / best) if best > 0 else None,
+                'us_per_item': round(best * 1e6 / entries, 3),
+                'peak_kb': round(peaks[component] / 1024, 1),
+                'bytes_per_item': round(peaks[component] / entries, 1),
+            }
+        return measures
+
+    @staticmethod
+    def _parse(scraper: AppleScraper, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Parsea los payloads de una ronda en un resultado combinado (como un barrido)"""
+        available_stores, unavailable_stores = [], []
+        product_title = None
+        for payload in payloads:
+            available, unavailable, title = scraper._parse_fulfillment_data(payload)
+            available_stores.extend(available)
+            unavailable_stores.extend(unavailable)
+            product_title = product_title or title
+        return {
+            'success': True,
+            'timestamp': '2026-01-01T00:00:00',
+            'product': product_title,
+            'available_stores': available_stores,
+            'unavailable_stores': unavailable_stores,
+        }
+
+    @staticmethod
+    def _compare(cache_manager: CacheManager, previous: Dict[str, Any],
+                 result: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Compara con el snapshot anterior y genera el siguiente (lo que hace apply_cache)"""
+        return cache_manager.compare_snapshots(previous, result), CacheManager.compact(result)
+
+    @staticmethod
+    def _subscriptions(generator: SyntheticFulfillment) -> List[Dict[str, Any]]:
+        """Un chat por estado, uno por la primera parte, uno por una tienda y uno global"""
+        states = sorted({store['state'] for store in generator.stores})
+        return (
+            [{'chat_id': f"state-{state}", 'state': state} for state in states]
+            + [{'chat_id': 'part', 'part': generator.parts[0]},
+               {'chat_id': 'store', 'stores': [generator.stores[0]['storeNumber']]},
+               {'chat_id': 'all'}]
+        )
+
+    @staticmethod
+    def _notify(registry: SubscriptionRegistry, bot: RecordingTelegramBot, report: Dict[str, Any]) -> int:
+        """Enruta un resultado y construye el mensaje de cada chat (lo que hace TelegramNotifier)"""
+        bot.sent.clear()
+        for chat_id, chat_result in registry.route(report).items():
+            bot.send_availability_report(chat_result, [chat_id])
+        return len(bot.sent)
+
+    @staticmethod
+    def _report_input(result: Dict[str, Any], comparison: Dict[str, Any]) -> Dict[str, Any]:
+        return {**result, 'has_changes': comparison['has_changes'], 'changes': comparison['changes'],
+                'summary': comparison['summary'], 'cache_age': '5 minutos', 'is_first_run': False}
+
+    @staticmethod
+    def _timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        value = fn()
+        return value, time.perf_counter() - started
+
+    @staticmethod
+    def _peak(fn: Callable[[], Any]) -> Tuple[Any, int]:
+        """Valor de fn() y bytes asignados en su pico (respecto al inicio)"""
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        try:
+            value = fn()
+            peak = tracemalloc.get_traced_memory()[1] - baseline
+        finally:
+            if not was_tracing:
+                tracemalloc.stop()
+        return value, max(peak, 0)
+
+    @staticmethod
+    def _ratio(large: Optional[float], small: Optional[float]) -> Optional[float]:
+        if not large or not small:
+            return None
+        return round(large / small, 2)
+
+    def _log_report(self, report: Dict[str, Any]) -> None:
+        """Muestra la tabla por escala y componente"""
+        logger.info("=" * 70)
+        logger.info("🏋️ PRUEBA DE CARGA (mejor ronda)")
+        logger.info("=" * 70)
+        logger.info(f"   {'escala':<8}{'componente':<12}{'items':>8}{'ms':>10}{'items/s':>11}{'µs/item':>10}{'pico KB':>10}")
+        for scale, measures in report['scales'].items():
+            for component, m in measures.items():
+                logger.info(f"   {scale:<8}{component:<12}{m['items']:>8}{m['best_ms']:>10.1f}"
+                            f"{m['items_per_sec'] or '-':>11}{m['us_per_item']:>10.2f}{m['peak_kb']:>10.1f}")
+        logger.info("-" * 70)
+        for component, ratios in report['scaling'].items():
+            cells = [f"×{r:.2f}" if r is not None else '-' for r in (ratios['time'], ratios['memory'])]
+            logger.info(f"   {component:<12} coste por item al escalar ×{SCALE_FACTOR}: tiempo {cells[0]}, memoria {cells[1]}")
+        logger.info("=" * 70)
+        if report['passed']:
+            logger.info(f"✅ Escalado dentro del límite (×{report['max_scaling']:g})")
+        else:
+            for failure in report['failures']:
+                logger.error(f"❌ {failure}")
@@ -0,0 +1,280 @@
+"""
+Pipeline de notificaciones
+Envía cada conjunto de cambios a todos los destinos en paralelo (asyncio) con timeout por destino
+"""
+
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import requests
+
+from config import Config
+
+logger = logging.getLogger('AppleStockBot')
+
+
+def build_change_set(result: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Documento compacto con los cambios de un resultado (para webhook, archivo y socket)
+
+    Args:
+        result: Resultado de check_availability_with_cache / apply_cache
+
+    Returns:
+        dict: Cambios y totales, serializable a JSON
+    """
+    changes = result.get('changes') or {}
+    return {
+        'timestamp': result.get('timestamp') or datetime.now().isoformat(),
+        'product': result.get('product'),
+        'is_first_run': bool(result.get('is_first_run')),
+        'summary': result.get('summary', ''),
+        'available': len(result.get('available_stores', [])),
+        'total': len(result.get('available_stores', [])) + len(result.get('unavailable_stores', [])),
+        'new_available': changes.get('new_available', []),
+        'new_unavailable': changes.get('new_unavailable', []),
+    }
+
+
+class Notifier(ABC):
+    """
+    Destino de notificaciones
+
+    Clase abstracta: las subclases implementan `send`; el pipeline la ejecuta con `timeout`
+    segundos como máximo. El trabajo bloqueante (requests, disco) va en
+    asyncio.to_thread para no frenar al resto de destinos.
+    """
+
+    name = 'notifier'
+
+    def __init__(self, timeout: Optional[float] = None):
+        """
+        Args:
+            timeout: Segundos máximos por envío (default: Config.NOTIFIER_TIMEOUT_SEC)
+        """
+        self.timeout = timeout or Config.NOTIFIER_TIMEOUT_SEC
+
+    @abstractmethod
+    async def send(self, result: Dict[str, Any]) -> bool:
+        """
+        Envía la notificación de un resultado con cambios
+
+        Returns:
+            bool: True si se entregó
+        """
+
+
+class TelegramNotifier(Notifier):
+    """Telegram, con enrutado por suscripciones si SUBSCRIPTIONS_FILE existe"""
+
+    name = 'telegram'
+
+    def __init__(self, bot=None, registry=None, timeout: Optional[float] = None):
+        """
+        Args:
+            bot: TelegramBot (default: uno nuevo)
+            registry: SubscriptionRegistry (default: SubscriptionRegistry.load())
+            timeout: Segundos máximos por envío
+        """
+        super().__init__(timeout)
+        from services.telegram_bot import TelegramBot
+        from services.subscriptions import SubscriptionRegistry
+        self.bot = bot or TelegramBot()
+        self.registry = registry if registry is not None else SubscriptionRegistry.load()
+
+    async def send(self, result: Dict[str, Any]) -> bool:
+        if not self.registry:
+            return await asyncio.to_thread(self.bot.send_availability_report, result)
+
+        # Cada chat recibe solo los cambios de sus suscripciones, todos a la vez
+        routed = self.registry.route(result)
+        sent = await asyncio.gather(*(
+            asyncio.to_thread(self.bot.send_availability_report, chat_result, [chat_id])
+            for chat_id, chat_result in routed.items()
+        ))
+        logger.info(f"✅ Notificación enrutada a {sum(sent)}/{len(routed)} chat(s) suscrito(s)")
+        return not routed or any(sent)
+
+
+class WebhookNotifier(Notifier):
+    """POST JSON del conjunto de cambios a una URL"""
+
+    name = 'webhook'
+
+    def __init__(self, url: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            url: Destino (default: Config.WEBHOOK_URL)
+            timeout: Segundos máximos por envío (default: Config.WEBHOOK_TIMEOUT_SEC)
+        """
+        super().__init__(timeout or Config.WEBHOOK_TIMEOUT_SEC)
+        self.url = url or Config.WEBHOOK_URL
+
+    async def send(self, result: Dict[str, Any]) -> bool:
+        response = await asyncio.to_thread(
+            requests.post, self.url, json=build_change_set(result), timeout=self.timeout
+        )
+        if response.status_code >= 300:
+            logger.error(f"❌ Webhook respondió {response.status_code}")
+            return False
+        return True
+
+
+class FileNotifier(Notifier):
+    """Añade el conjunto de cambios como una línea JSON a un archivo local"""
+
+    name = 'file'
+
+    def __init__(self, path: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            path: Archivo destino (default: Config.NOTIFY_FILE)
+            timeout: Segundos máximos por envío
+        """
+        super().__init__(timeout)
+        self.path = path or Config.NOTIFY_FILE
+
+    def _append(self, line: str) -> bool:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line)
+        return True
+
+    async def send(self, result: Dict[str, Any]) -> bool:
+        line = json.dumps(build_change_set(result), ensure_ascii=False, default=str) + '\n'
+        return await asyncio.to_thread(self._append, line)
+
+
+class SocketNotifier(Notifier):
+    """Escribe el conjunto de cambios como una línea JSON en un socket ('unix:/ruta' o 'host:puerto')"""
+
+    name = 'socket'
+
+    def __init__(self, address: Optional[str] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            address: Socket destino (default: Config.NOTIFY_SOCKET)
+            timeout: Segundos máximos por envío
+        """
+        super().__init__(timeout)
+        self.address = address or Config.NOTIFY_SOCKET
+
+    async def send(self, result: Dict[str, Any]) -> bool:
+        if self.address.startswith('unix:'):
+            _, writer = await asyncio.open_unix_connection(self.address[len('unix:'):])
+        else:
+            host, _, port = self.address.rpartition(':')
+            _, writer = await asyncio.open_connection(host or '127.0.0.1', int(port))
+        try:
+            line = json.dumps(build_change_set(result), ensure_ascii=False, default=str) + '\n'
+            writer.write(line.encode('utf-8'))
+            await writer.drain()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        return True
+
+
+class NotifierPipeline:
+    """
+    Reparte un resultado entre todos los destinos a la vez
+
+    Cada destino corre con su propio timeout: uno lento o caído se cancela
+    sin retrasar a los demás, y su fallo solo queda registrado en el log.
+    """
+
+    def __init__(self, notifiers: List[Notifier]):
+        """
+        Args:
+            notifiers: Destinos activos
+        """
+        self.notifiers = notifiers
+
+    @classmethod
+    def from_config(cls) -> 'NotifierPipeline':
+        """
+        Construye los destinos configurados
+
+        - telegram: TELEGRAM_ENABLED
+        - webhook: WEBHOOK_URL
+        - file: NOTIFY_FILE
+        - socket: NOTIFY_SOCKET
+        """
+        notifiers: List[Notifier] = []
+        if Config.TELEGRAM_ENABLED:
+            notifiers.append(TelegramNotifier())
+        if Config.WEBHOOK_URL:
+            notifiers.append(WebhookNotifier())
+        if Config.NOTIFY_FILE:
+            notifiers.append(FileNotifier())
+        if Config.NOTIFY_SOCKET:
+            notifiers.append(SocketNotifier())
+        return cls(notifiers)
+
+    def __bool__(self) -> bool:
+        return bool(self.notifiers)
+
+    def dispatch(self, result: Dict[str, Any]) -> Dict[str, str]:
+        """
+        Envía a todos los destinos (bloquea hasta que terminan o vencen)
+
+        Args:
+            result: Resultado con cambios
+
+        Returns:
+            dict: destino → 'ok' | 'failed' | 'timeout' | 'error'. El destino es
+                  su `name`, con '#2', '#3'... si hay varios del mismo tipo
+        """
+        if not self.notifiers:
+            return {}
+
+        # Loop y executor propios: asyncio.run esperaría al cerrar a los hilos de
+        # un destino que ya venció, y eso es justo lo que hay que evitar
+        loop = asyncio.new_event_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=8, thread_name_prefix='notify'))
+        try:
+            return loop.run_until_complete(self._dispatch(result))
+        finally:
+            loop.close()  # Cierra el executor sin esperar
+
+    def labels(self) -> List[str]:
+        """Etiqueta única de cada destino ('webhook', 'webhook#2'...)"""
+        labels: List[str] = []
+        seen: Dict[str, int] = {}
+        for notifier in self.notifiers:
+            seen[notifier.name] = seen.get(notifier.name, 0) + 1
+            count = seen[notifier.name]
+            labels.append(notifier.name if count == 1 else f"{notifier.name}#{count}")
+        return labels
+
+    async def _dispatch(self, result: Dict[str, Any]) -> Dict[str, str]:
+        labels = self.labels()
+        statuses = await asyncio.gather(*(
+            self._run(notifier, label, result) for notifier, label in zip(self.notifiers, labels)
+        ))
+        return dict(zip(labels, statuses))
+
+    async def _run(self, notifier: Notifier, label: str, result: Dict[str, Any]) -> str:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            ok = await asyncio.wait_for(notifier.send(result), notifier.timeout)
+            status = 'ok' if ok else 'failed'
+        except asyncio.TimeoutError:
+            status = 'timeout'
+        except Exception as e:
+            logger.error(f"❌ Error notificando por {label}: {e}")
+            status = 'error'
+
+        elapsed_ms = (loop.time() - started) * 1000
+        icon = '✅' if status == 'ok' else '⚠️'
+        logger.info(f"{icon} Notificador {label}: {status} ({elapsed_ms:.0f} ms)")
+        return status
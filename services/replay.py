@@ -0,0 +1,216 @@
+"""
+Modo replay: reprocesa payloads archivados sin navegador
+Permite probar cambios del parser, la comparación y los mensajes en segundos
+"""
+
+import glob
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple
+
+from config import Config
+
+from services.apple_scraper import AppleScraper
+from services.telegram_bot import RecordingTelegramBot
+from utils.cache_manager import CacheManager
+from utils.payload_archive import PayloadArchive
+
+logger = logging.getLogger('AppleStockBot')
+
+
+class ReplayRunner:
+    """
+    Reproduce payloads de fulfillment-messages en orden temporal
+
+    Para cada payload ejecuta el mismo camino que una ejecución real
+    (parseo → comparación con el estado anterior → formateo del mensaje)
+    con el estado en memoria y los envíos de Telegram sustituidos por
+    un registro, e informa qué alertas se habrían disparado.
+
+    El scraper se crea con CACHE_DIR en un directorio temporal y sin volcado
+    de depuración, así el replay no reescribe el catálogo, el caché ni los
+    artefactos reales con datos antiguos. El estado anterior se
+    guarda por (ubicación, SKU): dos ubicaciones del mismo SKU son consultas
+    distintas y compararlas entre sí dispararía alertas falsas.
+    """
+
+    def __init__(self, source: str):
+        """
+        Inicializa el replay
+
+        Args:
+            source: Directorio del archivo de payloads (.seg/.idx), directorio
+                    con archivos .json o un único archivo .json
+        """
+        self.source = source
+        self.bot = RecordingTelegramBot()
+
+    @staticmethod
+    @contextmanager
+    def _isolated_config(cache_dir: str) -> Iterator[None]:
+        """CACHE_DIR temporal y SAVE_API_DEBUG apagado mientras dura el replay"""
+        previous = {'CACHE_DIR': Config.CACHE_DIR, 'SAVE_API_DEBUG': Config.SAVE_API_DEBUG}
+        Config.override(CACHE_DIR=cache_dir, SAVE_API_DEBUG=False)
+        try:
+            yield
+        finally:
+            Config.override(**previous)
+
+    @staticmethod
+    def extract_location(payload: Dict[str, Any]) -> str:
+        """
+        Obtiene la ubicación consultada de un payload
+
+        Args:
+            payload: JSON de fulfillment-messages
+
+        Returns:
+            str: Ubicación de pickupMessage o, si falta, la tienda más cercana
+                 (la primera de la lista identifica la zona consultada)
+        """
+        pickup = ((payload.get('body') or {}).get('content') or {}).get('pickupMessage') or {}
+        if pickup.get('location'):
+            return str(pickup['location']).strip().lower()
+        stores = pickup.get('stores') or []
+        return stores[0].get('storeNumber', '') if stores else ''
+
+    def iter_payloads(self) -> Iterator[Tuple[datetime, Dict[str, Any]]]:
+        """
+        Itera los payloads de la fuente en orden temporal
+
+        Yields:
+            tuple (timestamp, payload)
+        """
+        if os.path.isdir(self.source) and glob.glob(os.path.join(self.source, '*.idx')):
+            archive = PayloadArchive(self.source, retention_days=0)
+            for entry, payload in archive.iter_payloads():
+                yield datetime.fromtimestamp(entry.timestamp), payload
+            return
+
+        if os.path.isdir(self.source):
+            files = glob.glob(os.path.join(self.source, '*.json'))
+        else:
+            files = [self.source]
+
+        for path in sorted(files, key=os.path.getmtime):
+            with open(path, 'r', encoding='utf-8') as f:
+                yield datetime.fromtimestamp(os.path.getmtime(path)), json.load(f)
+
+    def run(self) -> Dict[str, Any]:
+        """
+        Ejecuta el replay completo
+
+        Returns:
+            dict: {
+                'payloads': int,
+                'alerts': list[dict],     # Alertas que se habrían enviado
+                'errors': int,            # Payloads sin tiendas reconocibles
+                'elapsed_seconds': float,
+                'payloads_per_second': float
+            }
+        """
+        logger.info(f"⏪ Iniciando replay desde: {self.source}")
+
+        # El parser registra cada tienda en INFO; en replay solo interesan avisos
+        previous_level = logger.level
+        logger.setLevel(logging.WARNING)
+
+        previous: Dict[Tuple[str, str], Dict[str, Any]] = {}  # estado anterior por (ubicación, SKU), compacto
+        alerts: List[Dict[str, Any]] = []
+        payloads = 0
+        errors = 0
+        started = time.perf_counter()
+
+        try:
+            # Catálogo, caché y estado del scraper en un directorio temporal
+            with tempfile.TemporaryDirectory() as tmp_dir, self._isolated_config(tmp_dir):
+                scraper = AppleScraper()
+                cache_manager = CacheManager(tmp_dir, catalog=scraper.catalog)
+                for timestamp, payload in self.iter_payloads():
+                    payloads += 1
+                    sku = PayloadArchive.extract_sku(payload)
+                    key = (self.extract_location(payload), sku)
+
+                    available, unavailable, product_title = scraper._parse_fulfillment_data(payload)
+                    if not available and not unavailable:
+                        errors += 1
+                        continue
+
+                    result = {
+                        'success': True,
+                        'timestamp': timestamp.isoformat(),
+                        'product': product_title,
+                        'available_stores': available,
+                        'unavailable_stores': unavailable
+                    }
+
+                    cached = previous.get(key)
+                    comparison = cache_manager.compare_snapshots(cached, result)
+                    previous[key] = CacheManager.compact(result)
+
+                    if not comparison['has_changes']:
+                        continue
+
+                    cache_age = None
+                    if cached:
+                        cache_age = CacheManager.format_age(datetime.fromisoformat(cached['timestamp']), timestamp)
+
+                    self.bot.send_availability_report({
+                        **result,
+                        'has_changes': True,
+                        'should_alert': True,
+                        'changes': comparison['changes'],
+                        'summary': comparison['summary'],
+                        'cache_age': cache_age,
+                        'is_first_run': comparison.get('is_first_run', False)
+                    })
+
+                    changes = comparison['changes']
+                    alerts.append({
+                        'timestamp': timestamp.isoformat(),
+                        'sku': sku,
+                        'location': key[0],
+                        'is_first_run': comparison.get('is_first_run', False),
+                        'summary': comparison['summary'],
+                        'new_available': [s.get('name') for s in changes.get('new_available', [])],
+                        'new_unavailable': [s.get('name') for s in changes.get('new_unavailable', [])],
+                        'message': self.bot.sent[-1]
+                    })
+        finally:
+            logger.setLevel(previous_level)
+
+        elapsed = time.perf_counter() - started
+        report = {
+            'payloads': payloads,
+            'alerts': alerts,
+            'errors': errors,
+            'elapsed_seconds': round(elapsed, 3),
+            'payloads_per_second': round(payloads / elapsed, 1) if elapsed > 0 else 0.0
+        }
+
+        self._log_report(report)
+        return report
+
+    @staticmethod
+    def _log_report(report: Dict[str, Any]) -> None:
+        """Muestra el resumen del replay"""
+        logger.info("=" * 70)
+        logger.info("⏪ RESULTADOS DEL REPLAY")
+        logger.info("=" * 70)
+        logger.info(
+            f"📦 {report['payloads']} payload(s) en {report['elapsed_seconds']}s "
+            f"({report['payloads_per_second']} payloads/s)"
+        )
+        if report['errors']:
+            logger.warning(f"⚠️ {report['errors']} payload(s) sin tiendas reconocibles")
+
+        fired = [a for a in report['alerts'] if not a['is_first_run']]
+        logger.info(f"🔔 {len(fired)} alerta(s) se habrían enviado")
+        for alert in fired:
+            logger.info(f"   {alert['timestamp'][:19]} [{alert['sku']}] {alert['summary']}")
+        logger.info("=" * 70)
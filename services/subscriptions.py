@@ -0,0 +1,234 @@
+"""
+Registro de suscripciones por chat
+Cada chat se suscribe a sus propias (parte, tienda o región) y recibe solo sus cambios
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config import Config
+from utils.cache_manager import CacheManager
+from utils.location_cache import location_key
+
+logger = logging.getLogger('AppleStockBot')
+
+WILDCARD = '*'
+
+# (parte o product_url, ubicación normalizada); WILDCARD donde no se indicó
+Scope = Tuple[str, str]
+
+
+class SubscriptionRegistry:
+    """
+    Suscripciones con índice invertido (ámbito, tienda) → chats
+
+    Formato de SUBSCRIPTIONS_FILE (lista de suscripciones):
+        [
+          {"chat_id": "111", "part": "MFXX4LL/A", "stores": ["R623", "R401"]},
+          {"chat_id": "222", "part": "*", "state": "FL", "location": "Orlando"},
+          {"chat_id": "333", "product_url": "https://...", "location": "Miami"}
+        ]
+
+    - product_url / location: consulta que hay que hacer (default: PRODUCT_URL / SEARCH_LOCATION);
+      si se indican, el chat solo recibe las tiendas que observó esa consulta
+    - part: número de parte a vigilar ('*' o ausente = cualquiera de su consulta)
+    - stores: tiendas concretas; state: región; sin ninguno = todas las tiendas
+
+    Un barrido consulta la unión de las consultas una sola vez, y cada cambio
+    se enruta solo a los chats indexados para él: el coste crece con las
+    consultas únicas, no con el número de usuarios.
+    """
+
+    def __init__(self, subscriptions: Optional[List[Dict[str, Any]]] = None):
+        """
+        Inicializa el registro y construye los índices
+
+        Args:
+            subscriptions: Lista de suscripciones (ver formato arriba)
+        """
+        self.subscriptions = subscriptions or []
+        self._by_store: Dict[Tuple[Scope, str], Set[str]] = {}
+        self._by_state: Dict[Tuple[Scope, str], Set[str]] = {}
+        self._by_scope: Dict[Scope, Set[str]] = {}
+        self._queries: List[Tuple[str, str]] = []
+        self._build_index()
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> 'SubscriptionRegistry':
+        """
+        Carga las suscripciones desde archivo
+
+        Args:
+            path: Ruta del archivo (default: Config.SUBSCRIPTIONS_FILE)
+
+        Returns:
+            SubscriptionRegistry (vacío si el archivo no existe o es inválido)
+        """
+        path = path or Config.SUBSCRIPTIONS_FILE
+        if not path or not os.path.exists(path):
+            return cls()
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.error(f"❌ Error cargando suscripciones de {path}: {e}")
+            return cls()
+
+        registry = cls(data)
+        logger.info(
+            f"📋 {len(registry.subscriptions)} suscripción(es) de {len(registry.chat_ids())} chat(s), "
+            f"{len(registry.queries())} consulta(s) única(s)"
+        )
+        return registry
+
+    def __bool__(self) -> bool:
+        return bool(self.subscriptions)
+
+    @staticmethod
+    def _scope(sub: Dict[str, Any]) -> Scope:
+        """
+        Ámbito (producto, ubicación) de una suscripción
+
+        El producto es la parte si se indicó, si no la product_url; la
+        ubicación se normaliza con location_key. Lo no indicado es WILDCARD.
+        """
+        part = sub.get('part')
+        product = part if part and part != WILDCARD else sub.get('product_url') or WILDCARD
+        location = location_key(sub['location']) if sub.get('location') else WILDCARD
+        return product, location
+
+    def _build_index(self) -> None:
+        """Construye los índices invertidos y la lista de consultas únicas"""
+        seen_queries = set()
+
+        for sub in self.subscriptions:
+            chat_id = str(sub['chat_id'])
+            scope = self._scope(sub)
+
+            query = (sub.get('product_url') or Config.PRODUCT_URL, sub.get('location') or Config.SEARCH_LOCATION)
+            if query not in seen_queries:
+                seen_queries.add(query)
+                self._queries.append(query)
+
+            if sub.get('stores'):
+                for store_number in sub['stores']:
+                    self._by_store.setdefault((scope, store_number), set()).add(chat_id)
+            elif sub.get('state'):
+                self._by_state.setdefault((scope, sub['state'].upper()), set()).add(chat_id)
+            else:
+                self._by_scope.setdefault(scope, set()).add(chat_id)
+
+    def queries(self) -> List[Tuple[str, str]]:
+        """
+        Unión de las consultas de todas las suscripciones
+
+        Returns:
+            list: Tareas (product_url, location) sin duplicados, listas para SweepExecutor
+        """
+        return list(self._queries)
+
+    def chat_ids(self) -> Set[str]:
+        """Chats con al menos una suscripción"""
+        return {str(sub['chat_id']) for sub in self.subscriptions}
+
+    @staticmethod
+    def _scopes_for(store: Dict[str, Any], origin: Optional[List[str]] = None) -> Set[Scope]:
+        """
+        Ámbitos que cubren una tienda
+
+        Args:
+            store: Info de la tienda; 'sources' son las consultas que la
+                   observaron (las añade SweepExecutor._merge_results)
+            origin: [product_url, location] del resultado, para tiendas sin 'sources'
+
+        Returns:
+            set: Ámbitos (producto, ubicación) a buscar en los índices
+        """
+        part = (store.get('part_info') or {}).get('part_number', '')
+        sources = store.get('sources') or ([origin] if origin and any(origin) else [])
+
+        scopes = {(part, WILDCARD), (WILDCARD, WILDCARD)}
+        for product_url, location in sources:
+            locations = [WILDCARD] + ([location_key(location)] if location else [])
+            products = [part, WILDCARD] + ([product_url] if product_url else [])
+            scopes.update((product, loc) for product in products for loc in locations)
+        return scopes
+
+    def chats_for(self, store: Dict[str, Any], origin: Optional[List[str]] = None) -> Set[str]:
+        """
+        Chats suscritos a una tienda (búsquedas O(1) en los índices)
+
+        Una suscripción con product_url o location solo recibe las tiendas
+        que observó esa consulta; sin parte, producto ni ubicación es un
+        comodín para todas.
+
+        Args:
+            store: Info de la tienda (formato de _parse_fulfillment_data)
+            origin: [product_url, location] del resultado, para tiendas sin 'sources'
+
+        Returns:
+            set: Chat IDs
+        """
+        store_number = store.get('store_number', '')
+        state = (store.get('state') or '').upper()
+
+        chats: Set[str] = set()
+        for scope in self._scopes_for(store, origin):
+            chats |= self._by_store.get((scope, store_number), set())
+            chats |= self._by_state.get((scope, state), set())
+            chats |= self._by_scope.get(scope, set())
+        return chats
+
+    def route(self, result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Reparte un resultado con cambios entre los chats suscritos
+
+        Cada chat recibe una copia del resultado con las listas de tiendas y
+        de cambios filtradas a sus suscripciones. Solo se incluyen los chats
+        con algo que notificar.
+
+        Args:
+            result: Resultado de apply_cache
+
+        Returns:
+            dict: chat_id → resultado filtrado
+        """
+        is_first_run = result.get('is_first_run', False)
+        origin = [result.get('product_url'), result.get('location')]
+        per_chat: Dict[str, Dict[str, Any]] = {}
+
+        def bucket(chat_id: str) -> Dict[str, Any]:
+            if chat_id not in per_chat:
+                per_chat[chat_id] = {
+                    'available_stores': [],
+                    'unavailable_stores': [],
+                    'changes': {'new_available': [], 'new_unavailable': [],
+                                'still_available': [], 'still_unavailable': []}
+                }
+            return per_chat[chat_id]
+
+        for list_name in ('available_stores', 'unavailable_stores'):
+            for store in result.get(list_name, []):
+                for chat_id in self.chats_for(store, origin):
+                    bucket(chat_id)[list_name].append(store)
+
+        for change_type, stores in (result.get('changes') or {}).items():
+            for store in stores:
+                for chat_id in self.chats_for(store, origin):
+                    bucket(chat_id)['changes'][change_type].append(store)
+
+        routed = {}
+        for chat_id, data in per_chat.items():
+            changes = data['changes']
+            relevant = is_first_run or changes['new_available'] or changes['new_unavailable']
+            if not relevant:
+                continue
+            routed[chat_id] = {
+                **result,
+                **data,
+                'summary': result.get('summary') if is_first_run else CacheManager.summarize(changes)
+            }
+        return routed
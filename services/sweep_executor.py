@@ -0,0 +1,315 @@
+"""
+Ejecutor de barridos multi-proceso
+Reparte un barrido SKU × ubicación entre varios procesos, cada uno con su navegador
+"""
+
+import logging
+import os
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Callable, Dict, List, Any, Optional, Set, Tuple
+
+from config import Config
+from utils.rate_governor import RateGovernor
+
+logger = logging.getLogger('AppleStockBot')
+
+# (product_url, location)
+SweepTask = Tuple[str, str]
+
+
+def _init_worker(overrides: Dict[str, Any]) -> None:
+    """
+    Inicializa el logger y la configuración dentro de cada proceso worker
+
+    Args:
+        overrides: Config.overrides() del padre (con 'spawn' el hijo relee .env
+                   y perdería sobrescrituras como la de --headless)
+    """
+    from utils.logger import setup_logger
+    setup_logger()
+    Config.override(**overrides)
+
+
+def _run_task(product_url: str, location: str) -> Dict[str, Any]:
+    """
+    Ejecuta una tarea del barrido en el proceso worker
+
+    Args:
+        product_url: URL de la configuración del producto
+        location: Ubicación a buscar
+
+    Returns:
+        dict: Resultado de AppleScraper.check_availability
+    """
+    from services.apple_scraper import AppleScraper
+    return AppleScraper().check_availability(product_url=product_url, location=location)
+
+
+class SweepExecutor:
+    """
+    Ejecuta un barrido de productos × ubicaciones en un pool de procesos
+
+    Cada worker lanza su propio Chromium. Si un worker cae (BrokenProcessPool),
+    el pool se recrea y las tareas pendientes se reenvían, de modo que el
+    barrido no se pierde. El proceso padre combina los resultados en uno solo
+    para hacer una única actualización de caché y un único envío de alertas.
+
+    Una caída rompe todas las tareas en vuelo y no se sabe cuál la provocó:
+    no se les cobra el intento y se reejecutan de una en una, donde una
+    caída ya sí es atribuible a su tarea.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_retries: Optional[int] = None,
+                 on_result: Optional[Callable[[SweepTask, Dict[str, Any]], None]] = None):
+        """
+        Inicializa el ejecutor
+
+        Args:
+            workers: Número de procesos (default: Config.SWEEP_WORKERS o núcleos disponibles)
+            max_retries: Reintentos por tarea tras caída del worker (default: Config.SWEEP_MAX_RETRIES)
+            on_result: Callback (tarea, resultado) en el proceso padre en cuanto una
+                       tarea termina (con éxito o tras agotar reintentos)
+        """
+        self.workers = workers or Config.SWEEP_WORKERS or os.cpu_count() or 1
+        self.max_retries = Config.SWEEP_MAX_RETRIES if max_retries is None else max_retries
+        self.on_result = on_result
+        # 'spawn' evita heredar el estado de Playwright/greenlet del padre
+        self.mp_context = multiprocessing.get_context('spawn')
+
+    @staticmethod
+    def build_tasks(product_urls: Optional[List[str]] = None,
+                    locations: Optional[List[str]] = None) -> List[SweepTask]:
+        """
+        Construye el producto cartesiano de productos × ubicaciones
+
+        Args:
+            product_urls: URLs de producto (default: Config.SWEEP_PRODUCT_URLS o Config.PRODUCT_URL)
+            locations: Ubicaciones (default: Config.SWEEP_LOCATIONS, la cobertura de
+                       TARGET_STATE si SWEEP_AUTO_COVER, o Config.SEARCH_LOCATION)
+
+        Returns:
+            list: Tareas (product_url, location)
+        """
+        product_urls = product_urls or Config.SWEEP_PRODUCT_URLS or [Config.PRODUCT_URL]
+        locations = locations or Config.SWEEP_LOCATIONS
+        if not locations and Config.SWEEP_AUTO_COVER:
+            from utils.store_catalog import StoreCatalog
+            catalog = StoreCatalog()
+            locations = catalog.covering_locations(catalog.stores_in_state(Config.TARGET_STATE))
+            logger.info(f"🗺️ {len(locations)} ubicación(es) cubren {Config.TARGET_STATE}")
+        locations = locations or [Config.SEARCH_LOCATION]
+        return [(url, loc) for url in product_urls for loc in locations]
+
+    def run(self, tasks: Optional[List[SweepTask]] = None) -> Dict[str, Any]:
+        """
+        Ejecuta el barrido completo y combina los resultados
+
+        Args:
+            tasks: Tareas a ejecutar (default: build_tasks())
+
+        Returns:
+            dict: Resultado combinado con el mismo formato que check_availability,
+                  más 'sweep' con estadísticas de ejecución
+        """
+        tasks = tasks if tasks is not None else self.build_tasks()
+        workers = max(1, min(self.workers, len(tasks)))
+        logger.info(f"🧵 Iniciando barrido: {len(tasks)} tarea(s) en {workers} proceso(s)")
+
+        results: Dict[SweepTask, Dict[str, Any]] = {}
+        attempts: Dict[SweepTask, int] = {task: 0 for task in tasks}
+        pending = list(tasks)
+        suspects: List[SweepTask] = []  # En vuelo durante una caída sin culpable claro
+        restarts = 0
+
+        while pending or suspects:
+            if suspects:
+                # Un solo worker: si vuelve a caer, la caída es de esa tarea
+                retry, _ = self._run_round(suspects, 1, results, attempts)
+                pending, suspects = retry + pending, []
+            else:
+                pending, suspects = self._run_round(pending, workers, results, attempts)
+            if pending or suspects:
+                restarts += 1
+                logger.warning(f"♻️ Reiniciando pool de workers - {len(pending) + len(suspects)} tarea(s) pendientes")
+
+        merged = self._merge_results(tasks, results)
+        merged['sweep'] = {
+            'tasks': len(tasks),
+            'workers': workers,
+            'restarts': restarts,
+            'failed_tasks': [
+                {'product_url': url, 'location': loc, 'error': results[(url, loc)].get('error')}
+                for url, loc in tasks if not results[(url, loc)].get('success')
+            ]
+        }
+        logger.info(
+            f"🏁 Barrido completado - {len(tasks) - len(merged['sweep']['failed_tasks'])}/{len(tasks)} "
+            f"tarea(s) exitosas, {restarts} reinicio(s) del pool"
+        )
+        return merged
+
+    def _run_round(self, tasks: List[SweepTask], workers: int,
+                   results: Dict[SweepTask, Dict[str, Any]],
+                   attempts: Dict[SweepTask, int]) -> Tuple[List[SweepTask], List[SweepTask]]:
+        """
+        Ejecuta una ronda de tareas en un pool nuevo
+
+        Returns:
+            tuple: (tareas a reenviar porque el worker cayó antes de terminarlas,
+                    tareas en vuelo durante una caída con varias candidatas, sin intento cobrado)
+        """
+        retry: List[SweepTask] = []
+        broken: List[SweepTask] = []
+        queue = list(tasks)
+        governor = RateGovernor() if Config.RATE_LIMIT_ENABLED else None
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=self.mp_context,
+                                 initializer=_init_worker,
+                                 initargs=(Config.overrides(),)) as pool:
+            futures: Dict[Future, SweepTask] = {}
+            not_done = set()
+
+            while queue or not_done:
+                # Alimentar el pool a medida que se libera, al ritmo del gobernador de
+                # tasa: así no se lanza un Chromium que solo iría a esperar turno
+                while queue and len(not_done) < workers:
+                    delay = governor.next_delay() if governor else 0.0
+                    if delay > 0:
+                        logger.info(f"🚦 Gobernador de tasa: siguiente tarea en {delay:.1f}s")
+                        if not_done:
+                            done, not_done = wait(not_done, timeout=delay, return_when=FIRST_COMPLETED)
+                            self._collect(done, futures, results, attempts, retry, broken)
+                        else:
+                            time.sleep(delay)
+                        continue
+                    task = queue.pop(0)
+                    try:
+                        future = pool.submit(_run_task, *task)
+                    except BrokenProcessPool:
+                        # El pool cayó: lo que quede va a la siguiente ronda sin gastar intento
+                        retry.append(task)
+                        retry.extend(queue)
+                        queue.clear()
+                        break
+                    attempts[task] += 1
+                    futures[future] = task
+                    not_done.add(future)
+
+                if not_done:
+                    done, not_done = wait(not_done, return_when=FIRST_COMPLETED)
+                    self._collect(done, futures, results, attempts, retry, broken)
+
+        if len(broken) == 1:
+            # Única tarea en vuelo: la caída es suya
+            self._handle_failure(broken[0], "Worker terminado abruptamente", results, attempts, retry)
+            return retry, []
+
+        for task in broken:
+            attempts[task] -= 1
+        if broken:
+            logger.warning(f"💥 Worker caído con {len(broken)} tarea(s) en vuelo - se reintentan de una en una")
+        return retry, broken
+
+    def _collect(self, done: Set[Future], futures: Dict[Future, SweepTask],
+                 results: Dict[SweepTask, Dict[str, Any]],
+                 attempts: Dict[SweepTask, int], retry: List[SweepTask],
+                 broken: List[SweepTask]) -> None:
+        """Guarda los resultados de las tareas terminadas y reprograma las fallidas"""
+        for future in done:
+            task = futures[future]
+            try:
+                result = future.result()
+            except BrokenProcessPool:
+                broken.append(task)  # Se decide al cerrar la ronda (ver _run_round)
+            except Exception as e:
+                logger.error(f"❌ Tarea {task[1]} falló en worker: {e}", exc_info=True)
+                self._handle_failure(task, str(e), results, attempts, retry)
+            else:
+                self._finish(task, result, results)
+
+    def _finish(self, task: SweepTask, result: Dict[str, Any],
+                results: Dict[SweepTask, Dict[str, Any]]) -> None:
+        """Guarda el resultado definitivo de una tarea y lo entrega a on_result"""
+        results[task] = result
+        if self.on_result:
+            try:
+                self.on_result(task, result)
+            except Exception as e:
+                logger.warning(f"⚠️ Error en on_result para {task[1]}: {e}")
+
+    def _handle_failure(self, task: SweepTask, error: str,
+                        results: Dict[SweepTask, Dict[str, Any]],
+                        attempts: Dict[SweepTask, int], retry: List[SweepTask]) -> None:
+        """Reprograma una tarea fallida o la marca como error si agotó sus reintentos"""
+        if attempts[task] <= self.max_retries:
+            retry.append(task)
+            return
+
+        logger.error(f"❌ Tarea agotó reintentos ({attempts[task]}): {task[0]} @ {task[1]}")
+        self._finish(task, {
+            'success': False,
+            'timestamp': datetime.now().isoformat(),
+            'product': Config.TARGET_PRODUCT,
+            'product_url': task[0],
+            'location': task[1],
+            'error': error,
+            'available_stores': [],
+            'unavailable_stores': []
+        }, results)
+
+    @staticmethod
+    def _merge_results(tasks: List[SweepTask], results: Dict[SweepTask, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Combina los resultados de todas las tareas en uno solo
+
+        Las tiendas se deduplican por (store_number, part_number): ubicaciones
+        cercanas devuelven muchas de las mismas tiendas. Cada tienda lleva en
+        'sources' las consultas [product_url, location] que la observaron, para
+        que SubscriptionRegistry pueda enrutarla por consulta. Si alguna tarea falló
+        el resultado se marca 'partial': apply_cache conserva entonces del
+        caché anterior las tiendas que ninguna tarea observó.
+        """
+        available: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        unavailable: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        sources: Dict[Tuple[str, str], List[List[str]]] = {}
+        products: List[str] = []
+        errors: List[str] = []
+
+        for task in tasks:
+            result = results[task]
+            if not result.get('success'):
+                errors.append(f"{task[1]}: {result.get('error', 'Error desconocido')}")
+                continue
+
+            product = result.get('product')
+            if product and product not in products:
+                products.append(product)
+
+            source = [result.get('product_url') or task[0], result.get('location') or task[1]]
+            for store in result.get('available_stores', []):
+                key = (store.get('store_number', ''), (store.get('part_info') or {}).get('part_number', ''))
+                available[key] = store
+                unavailable.pop(key, None)
+                sources.setdefault(key, []).append(source)
+
+            for store in result.get('unavailable_stores', []):
+                key = (store.get('store_number', ''), (store.get('part_info') or {}).get('part_number', ''))
+                if key not in available:
+                    unavailable[key] = store
+                sources.setdefault(key, []).append(source)
+
+        merged: Dict[str, Any] = {
+            'success': len(errors) < len(tasks),
+            'partial': 0 < len(errors) < len(tasks),
+            'timestamp': datetime.now().isoformat(),
+            'product': ' / '.join(products) or Config.TARGET_PRODUCT,
+            'available_stores': [{**store, 'sources': sources[key]} for key, store in available.items()],
+            'unavailable_stores': [{**store, 'sources': sources[key]} for key, store in unavailable.items()]
+        }
+        if errors:
+            merged['error'] = '; '.join(errors)
+        return merged
@@ -5,7 +5,7 @@ Envía mensajes con resultados de disponibilidad
 
 import requests
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from config import Config
 
 logger = logging.getLogger('AppleStockBot')
@@ -18,16 +18,17 @@ class TelegramBot:
         """Inicializa el bot de Telegram"""
         self.token = Config.TELEGRAM_BOT_TOKEN
         self.chat_ids = Config.TELEGRAM_CHAT_IDS  # Lista de chat IDs
-        self.base_url = f"https://api.telegram.org/bot{self.token}"
+        self.base_url = f"{Config.TELEGRAM_API_URL}/bot{self.token}"
         self.enabled = Config.TELEGRAM_ENABLED
         
-    def send_message(self, message: str, parse_mode: str = 'HTML') -> bool:
+    def send_message(self, message: str, parse_mode: str = 'HTML', chat_ids: Optional[List[str]] = None) -> bool:
         """
-        Envía un mensaje de texto a todos los chats configurados
+        Envía un mensaje de texto a los chats indicados
         
         Args:
             message: Texto del mensaje (puede incluir HTML)
             parse_mode: Formato del mensaje ('HTML' o 'Markdown')
+            chat_ids: Chats destino (default: todos los configurados)
         
         Returns:
             bool: True si se envió correctamente a al menos un chat
@@ -36,12 +37,13 @@ class TelegramBot:
             logger.info("📱 Telegram deshabilitado, mensaje no enviado")
             return False
         
-        if not self.token or not self.chat_ids:
+        chat_ids = chat_ids if chat_ids is not None else self.chat_ids
+        if not self.token or not chat_ids:
             logger.error("❌ Token o Chat ID de Telegram no configurados")
             return False
         
         success_count = 0
-        for chat_id in self.chat_ids:
+        for chat_id in chat_ids:
             try:
                 url = f"{self.base_url}/sendMessage"
                 payload = {
@@ -64,30 +66,40 @@ class TelegramBot:
         
         return success_count > 0
     
-    def send_availability_report(self, result: Dict[str, Any]) -> bool:
+    def send_availability_report(self, result: Dict[str, Any], chat_ids: Optional[List[str]] = None) -> bool:
         """
         Envía un reporte formateado de disponibilidad
         Prioriza mostrar cambios si están disponibles
         
         Args:
             result: Diccionario con resultados del scraping
+            chat_ids: Chats destino (default: todos los configurados)
         
         Returns:
             bool: True si se envió correctamente
         """
+        return self.send_message(self.format_report(result), chat_ids=chat_ids)
+    
+    def format_report(self, result: Dict[str, Any]) -> str:
+        """
+        Elige el formato adecuado para un resultado
+        
+        Args:
+            result: Diccionario con resultados del scraping
+        
+        Returns:
+            str: Mensaje formateado en HTML
+        """
         if not result.get('success', False):
-            # Enviar mensaje de error
-            message = self._format_error_message(result)
-            return self.send_message(message)
+            # Mensaje de error
+            return self._format_error_message(result)
         
         # Si hay información de cambios, usar formato de cambios
         if result.get('has_changes') is not None and not result.get('is_first_run', False):
-            message = self._format_changes_message(result)
-        else:
-            # Formato normal (primera ejecución o sin sistema de caché)
-            message = self._format_availability_message(result)
+            return self._format_changes_message(result)
         
-        return self.send_message(message)
+        # Formato normal (primera ejecución o sin sistema de caché)
+        return self._format_availability_message(result)
     
     def _format_availability_message(self, result: Dict[str, Any]) -> str:
         """
@@ -280,3 +292,16 @@ class TelegramBot:
 """
         
         return self.send_message(test_message)
+
+
+class RecordingTelegramBot(TelegramBot):
+    """TelegramBot que guarda los mensajes en memoria en lugar de enviarlos (replay, prueba de carga)"""
+
+    def __init__(self):
+        super().__init__()
+        self.enabled = True
+        self.sent: List[str] = []
+
+    def send_message(self, message: str, parse_mode: str = 'HTML', chat_ids: Optional[List[str]] = None) -> bool:
+        self.sent.append(message)
+        return True
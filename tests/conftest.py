@@ -0,0 +1,38 @@
+"""
+Configuración común de pytest: permite importar los módulos del proyecto desde tests/
+
+Las pruebas marcadas `slow` (dependen del tiempo de reloj) se omiten salvo
+con `python -m pytest --run-slow`.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def pytest_addoption(parser):
+    parser.addoption('--run-slow', action='store_true', default=False,
+                     help='Ejecutar también las pruebas lentas basadas en tiempo')
+
+
+@pytest.fixture(scope='session', autouse=True)
+def isolated_cache_dir(tmp_path_factory):
+    """CACHE_DIR temporal: las pruebas no escriben en el cache/ del repositorio"""
+    from config import Config
+    Config.override(CACHE_DIR=str(tmp_path_factory.mktemp('cache')))
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'slow: prueba lenta basada en tiempo de reloj (opt-in con --run-slow)')
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--run-slow'):
+        return
+    skip = pytest.mark.skip(reason='prueba lenta: usar --run-slow')
+    for item in items:
+        if 'slow' in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,76 @@
+"""
+Umbral de escalado de la prueba de carga (parse, compare, notify) como prueba de pytest
+
+Las pruebas por defecto comprueban el pico de memoria por tienda, que es
+determinista. La comprobación de tiempo depende de la carga de la máquina
+y solo corre con --run-slow.
+"""
+
+import statistics
+
+import pytest
+
+from services.load_test import COMPONENTS, LoadTest
+from services.telegram_bot import RecordingTelegramBot
+
+
+@pytest.fixture
+def load_test():
+    # Pequeña para que corra en segundos; el umbral es LOAD_TEST_MAX_SCALING
+    return LoadTest(stores=40, parts=3, change_rate=0.05, rounds=1, checks=('memory',))
+
+
+def test_memory_scales_linearly(load_test):
+    report = load_test.run()
+
+    assert report['passed'], report['failures']
+    for component in COMPONENTS:
+        assert report['scales']['1x'][component]['items'] == 40 * 3
+        assert report['scaling'][component]['memory'] is not None
+
+
+def test_memory_peaks_are_deterministic(load_test):
+    first, second = load_test.run(), load_test.run()
+
+    for component in COMPONENTS:
+        assert first['scaling'][component]['memory'] == pytest.approx(
+            second['scaling'][component]['memory'], rel=0.05)
+
+
+def test_notify_sends_one_message_per_routed_chat(load_test, monkeypatch):
+    sent = []
+    monkeypatch.setattr(RecordingTelegramBot, 'send_message',
+                        lambda self, message, parse_mode='HTML', chat_ids=None: sent.append(chat_ids) or True)
+    load_test.run()
+
+    # Cada mensaje va a un solo chat, y con 5% de cambios llega al chat global
+    assert sent
+    assert all(len(chat_ids) == 1 for chat_ids in sent)
+    assert ['all'] in sent
+
+
+def test_quadratic_component_fails_the_threshold(load_test, monkeypatch):
+    compare = LoadTest._compare
+
+    def quadratic_compare(cache_manager, previous, result):
+        stores = result['available_stores'] + result['unavailable_stores']
+        pairs = [(a, b) for a in stores for b in stores]  # Memoria O(n²)
+        assert pairs
+        return compare(cache_manager, previous, result)
+
+    monkeypatch.setattr(LoadTest, '_compare', staticmethod(quadratic_compare))
+    report = load_test.run()
+
+    assert not report['passed']
+    assert any(failure.startswith('compare: coste por tienda en memoria') for failure in report['failures'])
+
+
+@pytest.mark.slow
+def test_time_scales_linearly():
+    # Tiempo de reloj: tamaños mayores, mediana de varias ejecuciones y margen amplio
+    load_test = LoadTest(stores=200, parts=5, change_rate=0.05, rounds=5, checks=())
+    reports = [load_test.run() for _ in range(3)]
+
+    for component in COMPONENTS:
+        ratio = statistics.median(report['scaling'][component]['time'] for report in reports)
+        assert ratio <= 2 * load_test.max_scaling, f"{component}: tiempo por tienda ×{ratio:.2f}"
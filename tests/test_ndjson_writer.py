@@ -0,0 +1,71 @@
+"""
+Pruebas de la salida NDJSON en streaming durante un barrido
+"""
+
+import json
+from concurrent.futures import Future
+
+from services.sweep_executor import SweepExecutor
+from utils.ndjson_writer import NdjsonWriter
+
+TASKS = [('https://apple.example/iphone', 'Miami'), ('https://apple.example/iphone', 'Orlando')]
+
+
+def _task_result(location, store_number):
+    return {
+        'success': True,
+        'timestamp': '2026-01-01T00:00:00',
+        'product': 'iPhone',
+        'location': location,
+        'available_stores': [{'store_number': store_number, 'name': f'Apple {location}',
+                              'status': 'available', 'available': True,
+                              'part_info': {'part_number': 'MFXX4LL/A'}}],
+        'unavailable_stores': [],
+    }
+
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _records(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+
+def test_sweep_streams_each_task_as_it_is_collected(tmp_path):
+    target = tmp_path / 'out.ndjson'
+    writer = NdjsonWriter(str(target), max_mb=0)
+    executor = SweepExecutor(workers=2, on_result=lambda task, result: writer.write_stores(result, location=task[1]))
+    results, attempts = {}, {task: 1 for task in TASKS}
+
+    first, second = _done(_task_result('Miami', 'R623')), _done(_task_result('Orlando', 'R401'))
+    futures = {first: TASKS[0], second: TASKS[1]}
+
+    executor._collect({first}, futures, results, attempts, [], [])
+    assert [(r['type'], r['location'], r['store_number']) for r in _records(target)] == [('store', 'Miami', 'R623')]
+
+    executor._collect({second}, futures, results, attempts, [], [])
+    merged = executor._merge_results(TASKS, results)
+    writer.write_result({**merged, 'is_first_run': True}, stores=False)
+    writer.close()
+
+    records = _records(target)
+    assert [r['type'] for r in records] == ['store', 'store', 'run']
+    assert records[-1]['available'] == 2
+
+
+def test_failed_task_is_reported_once_retries_are_exhausted(tmp_path):
+    seen = []
+    executor = SweepExecutor(workers=1, max_retries=0, on_result=lambda task, result: seen.append((task, result)))
+    failed = Future()
+    failed.set_exception(RuntimeError('sin respuesta'))
+    results, retry = {}, []
+
+    executor._collect({failed}, {failed: TASKS[0]}, results, {TASKS[0]: 1}, retry, [])
+
+    assert not retry
+    assert seen == [(TASKS[0], results[TASKS[0]])]
+    assert results[TASKS[0]]['error'] == 'sin respuesta'
@@ -0,0 +1,95 @@
+"""
+Pruebas del pipeline de notificaciones contra webhooks HTTP locales
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from services.notifiers import Notifier, NotifierPipeline, WebhookNotifier
+
+SLOW_DELAY_SEC = 3.0
+
+
+@pytest.fixture
+def webhook_server():
+    """
+    Servidor HTTP local: /slow tarda SLOW_DELAY_SEC en responder, el resto responde al momento
+
+    Yields:
+        tuple (url base, lista de (ruta, cuerpo JSON) recibidos)
+    """
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            if self.path == '/slow':
+                time.sleep(SLOW_DELAY_SEC)
+            received.append((self.path, body))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", received
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _result():
+    store = {'name': 'Apple Brickell', 'store_number': 'R623', 'status': 'available',
+             'part_info': {'part_number': 'MFXX4LL/A'}}
+    return {
+        'success': True,
+        'product': 'iPhone',
+        'available_stores': [store],
+        'unavailable_stores': [],
+        'changes': {'new_available': [store], 'new_unavailable': []},
+        'summary': '1 tienda con stock',
+    }
+
+
+def test_slow_webhook_does_not_block_the_others(webhook_server):
+    base_url, received = webhook_server
+    pipeline = NotifierPipeline([
+        WebhookNotifier(f"{base_url}/slow", timeout=0.5),
+        WebhookNotifier(f"{base_url}/fast", timeout=0.5),
+    ])
+
+    started = time.perf_counter()
+    statuses = pipeline.dispatch(_result())
+    elapsed = time.perf_counter() - started
+
+    assert statuses == {'webhook': 'timeout', 'webhook#2': 'ok'}
+    assert elapsed < SLOW_DELAY_SEC
+    assert [path for path, _ in received] == ['/fast']
+    assert received[0][1]['new_available'][0]['store_number'] == 'R623'
+
+
+def test_same_type_notifiers_get_distinct_labels():
+    pipeline = NotifierPipeline([
+        WebhookNotifier('http://127.0.0.1:1/a'),
+        WebhookNotifier('http://127.0.0.1:1/b'),
+        WebhookNotifier('http://127.0.0.1:1/c'),
+    ])
+
+    assert pipeline.labels() == ['webhook', 'webhook#2', 'webhook#3']
+
+
+def test_notifier_without_send_cannot_be_instantiated():
+    class Incomplete(Notifier):
+        name = 'incomplete'
+
+    with pytest.raises(TypeError):
+        Incomplete()
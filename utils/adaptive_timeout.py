@@ -0,0 +1,119 @@
+"""
+Timeouts adaptativos para Playwright
+Calcula los timeouts a partir de un percentil de las latencias recientes
+"""
+
+import json
+import logging
+import os
+from typing import Dict, List, Optional
+
+from config import Config
+
+logger = logging.getLogger('AppleStockBot')
+
+
+class LatencyTracker:
+    """
+    Ventana deslizante de latencias por tipo de operación
+
+    Las muestras se guardan en disco porque cada ejecución programada es un
+    proceso nuevo. El timeout de una operación es
+    percentil(P) × multiplicador, acotado entre un mínimo y el timeout fijo
+    original (nunca se espera más que antes).
+
+    Un timeout se registra como muestra censurada en el techo (la latencia
+    real fue al menos esa): tras una regresión el percentil sube en vez de
+    quedarse con las muestras rápidas de antes. Además, cada timeout seguido
+    al final de la ventana duplica el timeout calculado hasta el techo, para
+    volver a tomar muestras sin esperar a que la ventana se renueve.
+    """
+
+    MIN_SAMPLES = 5
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Inicializa el tracker
+
+        Args:
+            cache_dir: Directorio donde persistir las muestras (default: Config.CACHE_DIR)
+        """
+        cache_dir = cache_dir or Config.CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.stats_file = os.path.join(cache_dir, 'latency_stats.json')
+        self.window = Config.LATENCY_WINDOW
+        self.percentile = Config.TIMEOUT_PERCENTILE
+        self.multiplier = Config.TIMEOUT_MULTIPLIER
+        self.samples: Dict[str, List[float]] = self._load()
+
+    def _load(self) -> Dict[str, List[float]]:
+        """Carga las muestras guardadas"""
+        if not os.path.exists(self.stats_file):
+            return {}
+        try:
+            with open(self.stats_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudieron cargar latencias: {e}")
+            return {}
+
+    def save(self) -> None:
+        """Persiste las muestras"""
+        try:
+            with open(self.stats_file, 'w', encoding='utf-8') as f:
+                json.dump(self.samples, f)
+        except Exception as e:
+            logger.error(f"❌ Error guardando latencias: {e}")
+
+    def record(self, kind: str, elapsed_ms: float) -> None:
+        """
+        Registra una latencia observada
+
+        Args:
+            kind: Tipo de operación ('goto', 'selector', 'probe')
+            elapsed_ms: Duración en milisegundos
+        """
+        samples = self.samples.setdefault(kind, [])
+        samples.append(round(elapsed_ms, 1))
+        del samples[:-self.window]
+
+    def record_timeout(self, kind: str, ceiling_ms: int) -> None:
+        """
+        Registra una operación que agotó su timeout
+
+        Args:
+            kind: Tipo de operación
+            ceiling_ms: Timeout máximo de la operación (valor de la muestra censurada)
+        """
+        self.record(kind, ceiling_ms)
+
+    def timeout(self, kind: str, ceiling_ms: int, floor_ms: int = 2000) -> int:
+        """
+        Timeout a usar para una operación
+
+        Args:
+            kind: Tipo de operación
+            ceiling_ms: Timeout máximo (el valor fijo anterior)
+            floor_ms: Timeout mínimo
+
+        Returns:
+            int: Timeout en milisegundos
+        """
+        samples = self.samples.get(kind, [])
+        if len(samples) < self.MIN_SAMPLES:
+            return ceiling_ms
+
+        ordered = sorted(samples)
+        rank = min(len(ordered) - 1, int(round(self.percentile / 100 * (len(ordered) - 1))))
+        timeout = ordered[rank] * self.multiplier
+
+        # Timeouts seguidos (muestras censuradas al final): ensanchar hacia el techo
+        streak = 0
+        for sample in reversed(samples):
+            if sample < ceiling_ms:
+                break
+            streak += 1
+        if streak:
+            timeout *= 2 ** streak
+
+        return int(max(floor_ms, min(ceiling_ms, timeout)))
@@ -0,0 +1,235 @@
+"""
+Almacén de artefactos (screenshots y volcados de depuración)
+Escribe en un hilo en segundo plano y limita el uso de disco con evicción LRU
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger('AppleStockBot')
+
+_stores: Dict[str, 'ArtifactStore'] = {}
+_stores_lock = threading.Lock()
+
+
+def get_artifact_store(directory: str = 'screenshots') -> 'ArtifactStore':
+    """
+    Obtiene el almacén compartido de un directorio
+
+    Todos los scrapers del proceso comparten la misma instancia por directorio,
+    así el índice LRU y los límites de disco son globales.
+
+    Args:
+        directory: Directorio de artefactos
+
+    Returns:
+        ArtifactStore del directorio
+    """
+    key = os.path.abspath(directory)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = ArtifactStore(directory)
+        return _stores[key]
+
+
+class ArtifactStore:
+    """
+    Buffer circular de artefactos en disco
+
+    - Las escrituras se encolan y las realiza un hilo daemon: el scraper
+      no espera al disco.
+    - Se limita el número de archivos y el tamaño total; al superarse se
+      eliminan los artefactos usados menos recientemente.
+    - Al salir del proceso se vacía la cola (atexit) para no perder artefactos.
+    """
+
+    _STOP = object()
+
+    def __init__(self, directory: str = 'screenshots',
+                 max_files: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        """
+        Inicializa el almacén
+
+        Args:
+            directory: Directorio de artefactos
+            max_files: Máximo de archivos (default: Config.ARTIFACT_MAX_FILES)
+            max_bytes: Tamaño máximo total en bytes (default: Config.ARTIFACT_MAX_MB)
+        """
+        self.directory = directory
+        self.max_files = max_files if max_files is not None else Config.ARTIFACT_MAX_FILES
+        self.max_bytes = max_bytes if max_bytes is not None else Config.ARTIFACT_MAX_MB * 1024 * 1024
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._index: 'OrderedDict[str, int]' = OrderedDict()  # nombre -> bytes, del menos al más reciente
+        self._total_bytes = 0
+        self._queue: 'queue.Queue' = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+        self._load_index()
+        atexit.register(self.close)
+
+    def _load_index(self) -> None:
+        """Indexa los artefactos existentes ordenados por fecha de modificación"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith('.') or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name, stat.st_size))
+
+        for _, name, size in sorted(entries):
+            self._index[name] = size
+            self._total_bytes += size
+
+        self._evict()
+
+    def _ensure_worker(self) -> None:
+        """Arranca el hilo escritor la primera vez que se necesita"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._worker, name='ArtifactWriter', daemon=True)
+        self._thread.start()
+
+    def save_bytes(self, name: str, data: bytes) -> str:
+        """
+        Encola la escritura de un artefacto binario (p. ej. PNG)
+
+        Args:
+            name: Nombre del archivo dentro del directorio
+            data: Contenido
+
+        Returns:
+            str: Ruta donde quedará el artefacto
+        """
+        self._ensure_worker()
+        self._queue.put((name, data))
+        return os.path.join(self.directory, name)
+
+    def save_json(self, name: str, data: Any) -> str:
+        """
+        Encola la escritura de un artefacto JSON compacto
+
+        Args:
+            name: Nombre del archivo dentro del directorio
+            data: Objeto serializable
+
+        Returns:
+            str: Ruta donde quedará el artefacto
+        """
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return self.save_bytes(name, payload)
+
+    def get(self, name: str) -> Optional[bytes]:
+        """
+        Lee un artefacto y lo marca como usado recientemente
+
+        Args:
+            name: Nombre del archivo
+
+        Returns:
+            bytes o None si no existe
+        """
+        self.flush()
+        with self._lock:
+            if name not in self._index:
+                return None
+            self._index.move_to_end(name)
+
+        try:
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """
+        Espera a que se escriban todos los artefactos encolados
+
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+        """
+        if not self._thread or not self._thread.is_alive():
+            return
+        if timeout is None:
+            self._queue.join()
+            return
+
+        done = threading.Event()
+        threading.Thread(target=lambda: (self._queue.join(), done.set()), daemon=True).start()
+        done.wait(timeout)
+
+    def close(self) -> None:
+        """Vacía la cola y detiene el hilo escritor"""
+        if not self._thread or not self._thread.is_alive():
+            return
+        self._queue.put(self._STOP)
+        self._thread.join()
+
+    def usage(self) -> Dict[str, int]:
+        """
+        Uso actual del almacén
+
+        Returns:
+            dict: {'files': int, 'bytes': int}
+        """
+        with self._lock:
+            return {'files': len(self._index), 'bytes': self._total_bytes}
+
+    def _worker(self) -> None:
+        """Bucle del hilo escritor"""
+        while True:
+            item = self._queue.get()
+            try:
+                if item is self._STOP:
+                    return
+                self._write(*item)
+            except Exception as e:
+                logger.error(f"❌ Error guardando artefacto: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _write(self, name: str, data: bytes) -> None:
+        """Escribe un artefacto de forma atómica y aplica los límites"""
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._total_bytes -= self._index.pop(name, 0)
+            self._index[name] = len(data)
+            self._total_bytes += len(data)
+            self._evict(keep=name)
+
+        logger.debug(f"💾 Artefacto guardado: {path}")
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """
+        Elimina los artefactos menos usados hasta cumplir los límites
+
+        Args:
+            keep: Artefacto que nunca se elimina (el recién escrito)
+        """
+        while self._index and (len(self._index) > self.max_files or self._total_bytes > self.max_bytes):
+            name = next(iter(self._index))
+            if name == keep:
+                break
+            size = self._index.pop(name)
+            self._total_bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+                logger.debug(f"🗑️ Artefacto eliminado (LRU): {name}")
+            except OSError:
+                pass
@@ -9,25 +9,44 @@ from datetime import datetime
 from typing import Dict, Any, Optional, List
 import logging
 
+from utils.file_lock import FileLock
+from utils.store_catalog import StoreCatalog
+
 logger = logging.getLogger('AppleStockBot')
 
+# Versión del snapshot compacto: tiendas como [store_number, part_number, id estado, id quote,
+# id nombre, id ciudad, id estado/región]. Filas de 4 columnas (sin nombre) siguen siendo válidas.
+SNAPSHOT_FORMAT = 2
+
 
 class CacheManager:
     """
     Gestiona el caché de disponibilidad de productos
     Permite comparar resultados nuevos con anteriores
+    
+    En disco se guarda por tienda (store_number, parte, estado, quote,
+    nombre, ciudad, región), con todos los textos en una tabla sin
+    repetidos. El catálogo de tiendas solo completa filas antiguas sin
+    nombre: un catálogo perdido o ilegible no degrada alertas ni caché.
+    La comparación trabaja sobre las claves del snapshot compacto sin
+    reconstruir las tiendas.
     """
     
-    def __init__(self, cache_dir: str = 'cache'):
+    def __init__(self, cache_dir: str = 'cache', catalog: Optional[StoreCatalog] = None):
         """
         Inicializa el cache manager
         
         Args:
             cache_dir: Directorio donde se guardarán los archivos de caché
+            catalog: Catálogo de tiendas para completar el snapshot (default: el de cache_dir)
         """
         self.cache_dir = cache_dir
+        self.catalog = catalog or StoreCatalog(cache_dir)
         os.makedirs(cache_dir, exist_ok=True)
         self.cache_file = os.path.join(cache_dir, 'availability_cache.json')
+        # Lock entre procesos: envolver comparar + guardar en `with cache_manager.lock:`
+        # para que dos ejecuciones no pierdan actualizaciones ni dupliquen alertas
+        self.lock = FileLock(os.path.join(cache_dir, 'availability_cache.lock'))
         logger.info(f"📦 Cache Manager inicializado - Directorio: {cache_dir}")
     
     def load_cache(self) -> Optional[Dict[str, Any]]:
@@ -35,14 +54,19 @@ class CacheManager:
         Carga el caché desde el archivo
         
         Returns:
-            dict: Datos del caché o None si no existe
+            dict: Datos del caché (con las tiendas completas) o None si no existe
         """
+        snapshot = self._read_snapshot()
+        return self.expand(snapshot) if snapshot is not None else None
+    
+    def _read_snapshot(self) -> Optional[Dict[str, Any]]:
+        """Snapshot tal como está en disco (compacto o del formato anterior)"""
         if not os.path.exists(self.cache_file):
             logger.info("📂 No existe caché previo")
             return None
         
         try:
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
+            with self.lock, open(self.cache_file, 'r', encoding='utf-8') as f:
                 cache_data = json.load(f)
             
             logger.info(f"✅ Caché cargado - Última actualización: {cache_data.get('timestamp', 'N/A')}")
@@ -63,8 +87,16 @@ class CacheManager:
             bool: True si se guardó exitosamente
         """
         try:
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            stores = data.get('available_stores', []) + data.get('unavailable_stores', [])
+            self.catalog.add_missing(stores)
+            snapshot = self.compact(data)
+            
+            # Escritura atómica: un lector nunca ve el archivo a medias
+            tmp_file = f"{self.cache_file}.tmp"
+            with self.lock:
+                with open(tmp_file, 'w', encoding='utf-8') as f:
+                    json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+                os.replace(tmp_file, self.cache_file)
             
             logger.info(f"💾 Caché actualizado - Timestamp: {data.get('timestamp', 'N/A')}")
             return True
@@ -92,8 +124,22 @@ class CacheManager:
                 'summary': str
             }
         """
-        cached_data = self.load_cache()
+        return self.compare_snapshots(self._read_snapshot(), new_data)
+    
+    def compare_snapshots(self, cached_data: Optional[Dict[str, Any]], new_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compara dos resultados en memoria sin tocar el archivo de caché
+        
+        Usado por compare_with_cache y por el modo replay, que mantiene el
+        estado anterior en memoria para procesar miles de payloads por segundo.
+        
+        Args:
+            cached_data: Resultado anterior, completo o compacto (None = primera ejecución)
+            new_data: Nuevos datos del scraper
         
+        Returns:
+            dict: Mismo formato que compare_with_cache
+        """
         # Si no hay caché, todo es nuevo
         if cached_data is None:
             logger.info("🆕 Primera ejecución - No hay caché previo para comparar")
@@ -109,12 +155,11 @@ class CacheManager:
                 'summary': 'Primera ejecución - Datos iniciales capturados'
             }
         
-        # Comparar disponibilidad
-        old_available = {s['store_number']: s for s in cached_data.get('available_stores', [])}
-        old_unavailable = {s['store_number']: s for s in cached_data.get('unavailable_stores', [])}
+        # Comparar disponibilidad (del estado anterior solo hacen falta las claves)
+        old_available, old_unavailable = self._snapshot_keys(cached_data)
         
-        new_available = {s['store_number']: s for s in new_data.get('available_stores', [])}
-        new_unavailable = {s['store_number']: s for s in new_data.get('unavailable_stores', [])}
+        new_available = {self._store_key(s): s for s in new_data.get('available_stores', [])}
+        new_unavailable = {self._store_key(s): s for s in new_data.get('unavailable_stores', [])}
         
         # Detectar cambios
         changes = {
@@ -144,17 +189,10 @@ class CacheManager:
         has_changes = len(changes['new_available']) > 0 or len(changes['new_unavailable']) > 0
         
         # Generar resumen
-        summary_parts = []
-        if changes['new_available']:
-            summary_parts.append(f"{len(changes['new_available'])} tienda(s) con nuevo stock")
-        if changes['new_unavailable']:
-            summary_parts.append(f"{len(changes['new_unavailable'])} tienda(s) agotaron stock")
-        
+        summary = self.summarize(changes)
         if has_changes:
-            summary = "CAMBIOS DETECTADOS: " + ", ".join(summary_parts)
             logger.info(f"🔔 {summary}")
         else:
-            summary = f"Sin cambios - {len(changes['still_available'])} con stock, {len(changes['still_unavailable'])} sin stock"
             logger.info(f"ℹ️ {summary}")
         
         return {
@@ -164,6 +202,188 @@ class CacheManager:
             'summary': summary
         }
     
+    @staticmethod
+    def summarize(changes: Dict[str, List[Dict[str, Any]]]) -> str:
+        """
+        Genera el resumen legible de un conjunto de cambios
+        
+        Args:
+            changes: Dict con new_available, new_unavailable, still_available, still_unavailable
+        
+        Returns:
+            str: Resumen ('CAMBIOS DETECTADOS: ...' o 'Sin cambios - ...')
+        """
+        summary_parts = []
+        if changes.get('new_available'):
+            summary_parts.append(f"{len(changes['new_available'])} tienda(s) con nuevo stock")
+        if changes.get('new_unavailable'):
+            summary_parts.append(f"{len(changes['new_unavailable'])} tienda(s) agotaron stock")
+        
+        if summary_parts:
+            return "CAMBIOS DETECTADOS: " + ", ".join(summary_parts)
+        return (f"Sin cambios - {len(changes.get('still_available', []))} con stock, "
+                f"{len(changes.get('still_unavailable', []))} sin stock")
+    
+    @staticmethod
+    def _store_key(store: Dict[str, Any]) -> str:
+        """
+        Clave de comparación de una tienda
+        
+        Incluye el número de parte para que un barrido con varios productos
+        no mezcle la disponibilidad de distintas partes en la misma tienda.
+        
+        Args:
+            store: Info de la tienda (formato de _parse_fulfillment_data)
+        
+        Returns:
+            str: 'store_number' o 'store_number:part_number'
+        """
+        part_info = store.get('part_info') or {}
+        part_number = part_info.get('part_number')
+        if part_number:
+            return f"{store['store_number']}:{part_number}"
+        return store['store_number']
+    
+    def carry_forward(self, new_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Completa un resultado parcial con las tiendas del caché que no observó
+        
+        Un barrido con tareas fallidas no trae las tiendas/partes de esas
+        tareas; sin esto se borrarían del caché y el próximo cambio en ellas
+        se compararía contra nada. Se conservan con su último estado conocido.
+        
+        Args:
+            new_data: Resultado del scraper (p. ej. barrido con 'partial')
+        
+        Returns:
+            dict: Resultado con las tiendas arrastradas y 'carried_forward' (cuántas)
+        """
+        snapshot = self._read_snapshot()
+        if snapshot is None:
+            return new_data
+        
+        previous = self.expand(snapshot)
+        seen = {self._store_key(s) for s in new_data.get('available_stores', []) + new_data.get('unavailable_stores', [])}
+        carried_available = [s for s in previous.get('available_stores', []) if self._store_key(s) not in seen]
+        carried_unavailable = [s for s in previous.get('unavailable_stores', []) if self._store_key(s) not in seen]
+        carried = len(carried_available) + len(carried_unavailable)
+        if carried:
+            logger.info(f"📎 Resultado parcial: {carried} tienda(s) no observadas conservan su estado anterior")
+        
+        return {
+            **new_data,
+            'available_stores': new_data.get('available_stores', []) + carried_available,
+            'unavailable_stores': new_data.get('unavailable_stores', []) + carried_unavailable,
+            'carried_forward': carried
+        }
+    
+    @classmethod
+    def compact(cls, data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Convierte un resultado del scraper en snapshot compacto
+        
+        Args:
+            data: Resultado con available_stores / unavailable_stores
+        
+        Returns:
+            dict: Mismos metadatos, con 'stores' (tuplas) y 'strings' (tabla de textos)
+        """
+        if data.get('format') == SNAPSHOT_FORMAT:
+            return data
+        
+        strings: List[str] = []
+        ids: Dict[str, int] = {}
+        
+        def intern(text: str) -> int:
+            if text not in ids:
+                ids[text] = len(strings)
+                strings.append(text)
+            return ids[text]
+        
+        stores = [
+            [
+                store['store_number'],
+                (store.get('part_info') or {}).get('part_number'),
+                intern(store.get('status', 'unavailable')),
+                intern(store.get('pickup_quote', '')),
+                intern(store.get('name', 'Unknown Store')),
+                intern(store.get('city', '')),
+                intern(store.get('state', '')),
+            ]
+            for store in data.get('available_stores', []) + data.get('unavailable_stores', [])
+        ]
+        
+        snapshot = {k: v for k, v in data.items() if k not in ('available_stores', 'unavailable_stores')}
+        snapshot.update({'format': SNAPSHOT_FORMAT, 'strings': strings, 'stores': stores})
+        return snapshot
+    
+    def expand(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Reconstruye las tiendas de un snapshot compacto
+
+        Nombre, ciudad y región vienen de la propia fila; solo las filas de
+        snapshots antiguos (4 columnas) se completan con el catálogo.
+        
+        Args:
+            snapshot: Snapshot leído del caché (los del formato anterior se devuelven tal cual)
+        
+        Returns:
+            dict: Resultado con available_stores / unavailable_stores
+        """
+        if snapshot.get('format') != SNAPSHOT_FORMAT:
+            return snapshot
+        
+        if any(len(row) < 7 and row[0] not in self.catalog.stores for row in snapshot['stores']):
+            self.catalog.reload()
+        
+        strings = snapshot['strings']
+        available_stores, unavailable_stores = [], []
+        for row in snapshot['stores']:
+            store_number, part_number, status_id, quote_id = row[:4]
+            if len(row) >= 7:
+                info = {'name': strings[row[4]], 'city': strings[row[5]], 'state': strings[row[6]]}
+            else:
+                info = self.catalog.get(store_number) or {}
+            status, quote = strings[status_id], strings[quote_id]
+            store = {
+                'name': info.get('name', 'Unknown Store'),
+                'city': info.get('city', ''),
+                'state': info.get('state', ''),
+                'store_number': store_number,
+                'status': status,
+                'pickup_quote': quote,
+                'available': status == 'available',
+                'part_info': {
+                    'part_number': part_number,
+                    'pickup_display': status,
+                    'pickup_quote': quote
+                } if part_number else None
+            }
+            (available_stores if store['available'] else unavailable_stores).append(store)
+        
+        data = {k: v for k, v in snapshot.items() if k not in ('format', 'strings', 'stores')}
+        data.update({'available_stores': available_stores, 'unavailable_stores': unavailable_stores})
+        return data
+    
+    @classmethod
+    def _snapshot_keys(cls, snapshot: Dict[str, Any]) -> tuple:
+        """
+        Claves de tienda con y sin stock de un snapshot (compacto o completo)
+        
+        Returns:
+            tuple: (set disponibles, set no disponibles)
+        """
+        if snapshot.get('format') != SNAPSHOT_FORMAT:
+            return ({cls._store_key(s) for s in snapshot.get('available_stores', [])},
+                    {cls._store_key(s) for s in snapshot.get('unavailable_stores', [])})
+        
+        available_id = snapshot['strings'].index('available') if 'available' in snapshot['strings'] else None
+        available, unavailable = set(), set()
+        for store_number, part_number, status_id, *_ in snapshot['stores']:
+            key = f"{store_number}:{part_number}" if part_number else store_number
+            (available if status_id == available_id else unavailable).add(key)
+        return available, unavailable
+    
     def get_cache_age(self) -> Optional[str]:
         """
         Obtiene la antigüedad del caché
@@ -175,7 +395,7 @@ class CacheManager:
             return None
         
         try:
-            with open(self.cache_file, 'r', encoding='utf-8') as f:
+            with self.lock, open(self.cache_file, 'r', encoding='utf-8') as f:
                 cache_data = json.load(f)
             
             timestamp_str = cache_data.get('timestamp')
@@ -183,23 +403,36 @@ class CacheManager:
                 return "Desconocida"
             
             cache_time = datetime.fromisoformat(timestamp_str)
-            now = datetime.now()
-            delta = now - cache_time
-            
-            hours = delta.total_seconds() / 3600
-            if hours < 1:
-                minutes = int(delta.total_seconds() / 60)
-                return f"{minutes} minutos"
-            elif hours < 24:
-                return f"{int(hours)} horas"
-            else:
-                days = int(hours / 24)
-                return f"{days} días"
+            return self.format_age(cache_time, datetime.now())
                 
         except Exception as e:
             logger.error(f"Error calculando antigüedad del caché: {e}")
             return "Error"
     
+    @staticmethod
+    def format_age(since: datetime, now: datetime) -> str:
+        """
+        Describe el tiempo transcurrido entre dos instantes
+        
+        Args:
+            since: Instante anterior
+            now: Instante de referencia
+        
+        Returns:
+            str: Antigüedad legible ('5 minutos', '3 horas', '2 días')
+        """
+        delta = now - since
+        
+        hours = delta.total_seconds() / 3600
+        if hours < 1:
+            minutes = int(delta.total_seconds() / 60)
+            return f"{minutes} minutos"
+        elif hours < 24:
+            return f"{int(hours)} horas"
+        else:
+            days = int(hours / 24)
+            return f"{days} días"
+    
     def clear_cache(self) -> bool:
         """
         Limpia el caché eliminando el archivo
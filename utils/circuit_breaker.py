@@ -0,0 +1,124 @@
+"""
+Circuit breaker para el scraping de Apple Store
+Evita lanzar el navegador mientras Apple está caído o bloqueando
+"""
+
+import json
+import logging
+import os
+import random
+import time
+from typing import Any, Dict, Optional
+
+from config import Config
+
+logger = logging.getLogger('AppleStockBot')
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker persistente (closed → open → half_open)
+
+    - closed: se scrapea normalmente.
+    - open: tras N fallos consecutivos se omiten los scrapes hasta que
+      vence un backoff exponencial con jitter.
+    - half_open: vencido el backoff, se hace una prueba barata
+      (test_connection) antes del scrape completo. Si falla se vuelve a
+      abrir con el doble de espera.
+
+    El estado se guarda en disco porque cada ejecución programada es un
+    proceso nuevo.
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str = 'apple', cache_dir: Optional[str] = None):
+        """
+        Inicializa el circuit breaker
+
+        Args:
+            name: Nombre del circuito (archivo de estado)
+            cache_dir: Directorio donde persistir el estado (default: Config.CACHE_DIR)
+        """
+        cache_dir = cache_dir or Config.CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.state_file = os.path.join(cache_dir, f'circuit_{name}.json')
+        self.failure_threshold = Config.CIRCUIT_FAILURE_THRESHOLD
+        self.base_backoff = Config.CIRCUIT_BASE_BACKOFF_MIN * 60
+        self.max_backoff = Config.CIRCUIT_MAX_BACKOFF_MIN * 60
+        self.state: Dict[str, Any] = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        """Carga el estado guardado"""
+        default = {'state': self.CLOSED, 'failures': 0, 'open_count': 0, 'retry_at': 0.0}
+        if not os.path.exists(self.state_file):
+            return default
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return {**default, **json.load(f)}
+        except Exception as e:
+            logger.warning(f"⚠️ No se pudo cargar estado del circuit breaker: {e}")
+            return default
+
+    def _save(self) -> None:
+        """Persiste el estado"""
+        try:
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f)
+        except Exception as e:
+            logger.error(f"❌ Error guardando estado del circuit breaker: {e}")
+
+    @property
+    def current_state(self) -> str:
+        return self.state['state']
+
+    def allow_request(self) -> bool:
+        """
+        Indica si se puede intentar un scrape
+
+        Si el backoff venció pasa a half_open; el llamador debe hacer la
+        prueba barata antes del scrape completo.
+
+        Returns:
+            bool: False si el circuito está abierto
+        """
+        if self.state['state'] != self.OPEN:
+            return True
+
+        remaining = self.state['retry_at'] - time.time()
+        if remaining > 0:
+            logger.warning(f"⛔ Circuit breaker abierto - Scrape omitido (reintento en {int(remaining / 60)} min)")
+            return False
+
+        logger.info("🟡 Circuit breaker half-open - Se hará una prueba antes del scrape")
+        self.state['state'] = self.HALF_OPEN
+        self._save()
+        return True
+
+    def record_success(self) -> None:
+        """Cierra el circuito tras un scrape correcto"""
+        if self.state['state'] != self.CLOSED:
+            logger.info("🟢 Circuit breaker cerrado - Apple Store responde de nuevo")
+        self.state.update({'state': self.CLOSED, 'failures': 0, 'open_count': 0, 'retry_at': 0.0})
+        self._save()
+
+    def record_failure(self) -> None:
+        """Registra un fallo y abre el circuito si corresponde"""
+        self.state['failures'] += 1
+
+        if self.state['state'] == self.HALF_OPEN or self.state['failures'] >= self.failure_threshold:
+            backoff = min(self.max_backoff, self.base_backoff * (2 ** self.state['open_count']))
+            delay = random.uniform(backoff / 2, backoff)  # jitter para no sincronizar reintentos
+            self.state.update({
+                'state': self.OPEN,
+                'open_count': self.state['open_count'] + 1,
+                'retry_at': time.time() + delay
+            })
+            logger.warning(
+                f"🔴 Circuit breaker abierto tras {self.state['failures']} fallo(s) - "
+                f"Próximo intento en {int(delay / 60)} min"
+            )
+
+        self._save()
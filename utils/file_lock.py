@@ -0,0 +1,141 @@
+"""
+Lock de archivo entre procesos
+Lock advisory exclusivo con fcntl (Linux/macOS) o msvcrt (Windows)
+"""
+
+import os
+import threading
+import time
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class LockTimeout(Exception):
+    """No se pudo adquirir el lock en el tiempo indicado"""
+
+
+class FileLock:
+    """
+    Lock exclusivo sobre un archivo, reentrante dentro del proceso
+
+    Entre procesos lo garantiza el sistema operativo (flock / msvcrt.locking)
+    y se libera solo si el proceso muere. Dentro del proceso un RLock permite
+    que un mismo hilo lo tome anidado (p. ej. load_cache dentro de una
+    transacción de caché) y serializa los demás hilos.
+
+    Uso:
+        with FileLock('cache/run.lock'):
+            ...
+        lock = FileLock('cache/run.lock')
+        if lock.acquire(timeout=0):  # no bloquear
+            ...
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Archivo de lock (se crea si no existe)
+        """
+        self.path = path
+        self._rlock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+
+    def acquire(self, timeout: Optional[float] = None, poll: float = 0.1) -> bool:
+        """
+        Adquiere el lock
+
+        Args:
+            timeout: Segundos máximos de espera (None = indefinido, 0 = no esperar)
+            poll: Intervalo entre reintentos
+
+        Returns:
+            bool: True si se adquirió
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        if not self._rlock.acquire(timeout=-1 if timeout is None else max(0.0, timeout)):
+            return False
+
+        if self._depth > 0:
+            self._depth += 1
+            return True
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+        while True:
+            if self._try_lock(fd):
+                self._fd = fd
+                self._depth = 1
+                self._write_owner(fd)
+                return True
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(fd)
+                self._rlock.release()
+                return False
+            time.sleep(poll)
+
+    def release(self) -> None:
+        """Libera el lock (el último release del anidamiento suelta el del SO)"""
+        self._depth -= 1
+        if self._depth == 0:
+            fd, self._fd = self._fd, None
+            try:
+                if fcntl:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+                else:
+                    os.lseek(fd, 0, os.SEEK_SET)
+                    msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+            finally:
+                os.close(fd)
+        self._rlock.release()
+
+    def owner(self) -> str:
+        """PID e inicio del proceso que tiene (o tuvo por última vez) el lock"""
+        try:
+            with open(self.path, 'r', encoding='utf-8', errors='replace') as f:
+                content = f.read()
+        except OSError:
+            return ''
+        start = content.find('pid=')
+        return content[start:].strip() if start >= 0 else ''
+
+    @staticmethod
+    def _try_lock(fd: int) -> bool:
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            return True
+        except OSError:
+            return False
+
+    @staticmethod
+    def _write_owner(fd: int) -> None:
+        """Deja el PID en el archivo (informativo, para los logs de quien espera)"""
+        info = f"pid={os.getpid()} since={time.strftime('%Y-%m-%d %H:%M:%S')}".encode()
+        if fcntl:
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, info, 0)
+        else:
+            # En Windows el byte 0 está bloqueado: escribir a continuación
+            os.lseek(fd, 1, os.SEEK_SET)
+            os.write(fd, info)
+
+    def __enter__(self) -> 'FileLock':
+        if not self.acquire():
+            raise LockTimeout(self.path)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
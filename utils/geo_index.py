@@ -0,0 +1,147 @@
+"""
+Índice espacial de tiendas
+k-d tree sobre coordenadas cartesianas de la esfera para búsquedas por radio y vecinos
+"""
+
+import heapq
+import math
+from typing import Any, List, Optional, Sequence, Tuple
+
+EARTH_RADIUS_MILES = 3958.8
+
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distancia de círculo máximo en millas"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _to_xyz(lat: float, lon: float) -> Tuple[float, float, float]:
+    """Coordenadas en la esfera unidad"""
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def _chord(miles: float) -> float:
+    """Distancia euclídea (esfera unidad) equivalente a una distancia de superficie"""
+    return 2 * math.sin(min(math.pi, miles / EARTH_RADIUS_MILES) / 2)
+
+
+class _Node:
+    __slots__ = ('point', 'key', 'axis', 'left', 'right')
+
+    def __init__(self, point, key, axis, left, right):
+        self.point = point
+        self.key = key
+        self.axis = axis
+        self.left = left
+        self.right = right
+
+
+class GeoIndex:
+    """
+    k-d tree de puntos (clave, lat, lon)
+
+    Los puntos se proyectan a 3D sobre la esfera unidad: la distancia
+    euclídea (cuerda) es monótona con la distancia de superficie, así las
+    búsquedas por radio son exactas y sin problemas en el antimeridiano.
+    Construcción O(n log n); consultas O(log n + resultados) en promedio.
+    """
+
+    def __init__(self, points: Sequence[Tuple[Any, float, float]]):
+        """
+        Construye el índice
+
+        Args:
+            points: Tuplas (clave, latitud, longitud)
+        """
+        self.size = len(points)
+        self._coords = {key: (lat, lon) for key, lat, lon in points}
+        items = [(_to_xyz(lat, lon), key) for key, lat, lon in points]
+        self._root = self._build(items, 0)
+
+    def _build(self, items: List[Tuple[Tuple[float, float, float], Any]], depth: int) -> Optional[_Node]:
+        if not items:
+            return None
+        axis = depth % 3
+        items.sort(key=lambda item: item[0][axis])
+        mid = len(items) // 2
+        point, key = items[mid]
+        return _Node(point, key, axis,
+                     self._build(items[:mid], depth + 1),
+                     self._build(items[mid + 1:], depth + 1))
+
+    def within_radius(self, lat: float, lon: float, miles: float) -> List[Tuple[Any, float]]:
+        """
+        Puntos a menos de `miles` millas
+
+        Args:
+            lat: Latitud del centro
+            lon: Longitud del centro
+            miles: Radio en millas
+
+        Returns:
+            list: (clave, distancia en millas) ordenados por distancia
+        """
+        target = _to_xyz(lat, lon)
+        limit = _chord(miles)
+        limit_sq = limit * limit
+        found = []
+
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node is None:
+                continue
+            if sum((a - b) ** 2 for a, b in zip(node.point, target)) <= limit_sq:
+                found.append(node.key)
+            diff = target[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            stack.append(near)
+            if abs(diff) <= limit:
+                stack.append(far)
+
+        result = [(key, haversine_miles(lat, lon, *self._coords[key])) for key in found]
+        result.sort(key=lambda item: item[1])
+        return result
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[Any, float]]:
+        """
+        Los k puntos más cercanos
+
+        Args:
+            lat: Latitud del centro
+            lon: Longitud del centro
+            k: Número de vecinos
+
+        Returns:
+            list: (clave, distancia en millas) ordenados por distancia
+        """
+        target = _to_xyz(lat, lon)
+        heap: List[Tuple[float, int, Any]] = []  # max-heap por distancia² negada
+        counter = 0
+
+        def visit(node: Optional[_Node]) -> None:
+            nonlocal counter
+            if node is None:
+                return
+            dist_sq = sum((a - b) ** 2 for a, b in zip(node.point, target))
+            counter += 1
+            if len(heap) < k:
+                heapq.heappush(heap, (-dist_sq, counter, node.key))
+            elif dist_sq < -heap[0][0]:
+                heapq.heapreplace(heap, (-dist_sq, counter, node.key))
+
+            diff = target[node.axis] - node.point[node.axis]
+            near, far = (node.left, node.right) if diff < 0 else (node.right, node.left)
+            visit(near)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far)
+
+        visit(self._root)
+        result = [(key, haversine_miles(lat, lon, *self._coords[key])) for _, _, key in heap]
+        result.sort(key=lambda item: item[1])
+        return result
@@ -0,0 +1,96 @@
+"""
+Caché de ubicaciones resueltas
+Guarda la ubicación canónica que el buscador de Apple envía a fulfillment-messages
+para no repetir el autocompletado en cada scrape
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config import Config
+from utils.file_lock import FileLock
+
+logger = logging.getLogger('AppleStockBot')
+
+
+def location_key(location: str) -> str:
+    """Clave de una ubicación configurada ('Miami', ' miami ' → 'miami')"""
+    return location.strip().lower()
+
+
+class LocationCache:
+    """
+    Ubicaciones resueltas por el autocompletado, por ubicación configurada
+
+    El autocompletado siempre devuelve lo mismo para 'Miami': la primera
+    ejecución lo recorre y guarda el texto canónico que la página envió en
+    el parámetro `location` de fulfillment-messages (p. ej. 'Miami, FL').
+    Las siguientes escriben ese texto y envían el formulario directamente.
+    Si una entrada deja de producir respuesta se olvida y se vuelve al
+    autocompletado.
+
+    Se guarda en CACHE_DIR/resolved_locations.json (compartido entre procesos).
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Inicializa la caché
+
+        Args:
+            cache_dir: Directorio del archivo (default: Config.CACHE_DIR)
+        """
+        cache_dir = cache_dir or Config.CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.locations_file = os.path.join(cache_dir, 'resolved_locations.json')
+        self.lock = FileLock(os.path.join(cache_dir, 'resolved_locations.lock'))
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.locations_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, locations: Dict[str, Dict[str, Any]]) -> None:
+        tmp_file = f"{self.locations_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(locations, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, self.locations_file)
+
+    def get(self, location: str) -> Optional[str]:
+        """Texto canónico de una ubicación, o None si no está resuelta"""
+        with self.lock:
+            entry = self._load().get(location_key(location))
+        return entry['resolved'] if entry else None
+
+    def remember(self, location: str, resolved: str) -> None:
+        """
+        Guarda la resolución de una ubicación
+
+        Args:
+            location: Ubicación configurada (SEARCH_LOCATION, SWEEP_LOCATIONS...)
+            resolved: Texto canónico que envía la página
+        """
+        with self.lock:
+            locations = self._load()
+            previous = locations.get(location_key(location))
+            if previous and previous['resolved'] == resolved:
+                return
+            locations[location_key(location)] = {
+                'resolved': resolved,
+                'resolved_at': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._save(locations)
+        logger.info(f"📌 Ubicación '{location}' resuelta como '{resolved}' (se omitirá el autocompletado)")
+
+    def forget(self, location: str) -> None:
+        """Descarta la resolución de una ubicación"""
+        with self.lock:
+            locations = self._load()
+            if locations.pop(location_key(location), None) is None:
+                return
+            self._save(locations)
+        logger.info(f"🗑️ Resolución de '{location}' descartada")
@@ -0,0 +1,135 @@
+"""
+Perfilado de memoria opcional para ejecución prolongada
+Snapshots de tracemalloc con diferencias top-N y RSS de Python y del navegador
+"""
+
+import logging
+import os
+import tracemalloc
+from typing import Any, Dict, List, Optional
+
+from config import Config
+from utils.process_memory import get_rss, get_children_rss
+
+logger = logging.getLogger('AppleStockBot')
+
+# Componentes a los que se atribuyen las asignaciones (ruta relativa al proyecto)
+_COMPONENTS = {
+    'scraper': os.path.join('services', 'apple_scraper.py'),
+    'cache': os.path.join('utils', 'cache_manager.py'),
+    'telegram': os.path.join('services', 'telegram_bot.py'),
+}
+
+
+class MemoryProfiler:
+    """
+    Toma muestras de memoria en puntos de control
+
+    Cada checkpoint registra:
+    - RSS del proceso Python y RSS total de sus hijos (driver + Chromium)
+    - memoria trazada por tracemalloc (actual y pico)
+    - las N líneas cuya memoria más creció desde el checkpoint anterior
+    - el crecimiento atribuido a scraper, caché y Telegram
+
+    Deshabilitado, todos los métodos son no-ops de coste nulo.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, top_n: Optional[int] = None):
+        """
+        Inicializa el profiler
+
+        Args:
+            enabled: Activar (default: Config.MEMORY_PROFILING)
+            top_n: Líneas a reportar por checkpoint (default: Config.MEMORY_TOP_N)
+        """
+        self.enabled = Config.MEMORY_PROFILING if enabled is None else enabled
+        self.top_n = top_n or Config.MEMORY_TOP_N
+        self._previous: Optional[tracemalloc.Snapshot] = None
+        self._samples: List[Dict[str, Any]] = []
+
+        if self.enabled and not tracemalloc.is_tracing():
+            tracemalloc.start(Config.MEMORY_TRACE_FRAMES)
+            logger.info(f"🧠 Perfilado de memoria activado ({Config.MEMORY_TRACE_FRAMES} frames)")
+
+    def checkpoint(self, label: str) -> Optional[Dict[str, Any]]:
+        """
+        Toma una muestra
+
+        Args:
+            label: Nombre del punto de control ('scrape', 'notify', ...)
+
+        Returns:
+            dict con la muestra o None si está deshabilitado
+        """
+        if not self.enabled:
+            return None
+
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+            tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+
+        sample: Dict[str, Any] = {
+            'label': label,
+            'python_rss': get_rss(),
+            'browser_rss': get_children_rss(),
+            'traced_current': current,
+            'traced_peak': peak,
+            'top_growth': [],
+            'by_component': {}
+        }
+
+        if self._previous is not None:
+            sample['top_growth'] = [
+                {
+                    'location': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                    'size_diff': stat.size_diff,
+                    'count_diff': stat.count_diff
+                }
+                for stat in snapshot.compare_to(self._previous, 'lineno')[:self.top_n]
+            ]
+            sample['by_component'] = self._growth_by_component(snapshot)
+
+        self._previous = snapshot
+        self._samples.append(sample)
+
+        logger.info(
+            f"🧠 Memoria [{label}]: Python RSS {self._mb(sample['python_rss'])}, "
+            f"navegador {self._mb(sample['browser_rss'])}, trazada {self._mb(current)}"
+        )
+        return sample
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """
+        Devuelve y vacía las muestras acumuladas (para adjuntarlas a las métricas)
+
+        Returns:
+            list: Muestras desde la última llamada
+        """
+        samples, self._samples = self._samples, []
+        return samples
+
+    def _growth_by_component(self, snapshot: tracemalloc.Snapshot) -> Dict[str, int]:
+        """Atribuye el crecimiento al frame más reciente de scraper/caché/Telegram en cada traza"""
+        growth = {name: 0 for name in _COMPONENTS}
+        growth['other'] = 0
+
+        for stat in snapshot.compare_to(self._previous, 'traceback'):
+            if stat.size_diff == 0:
+                continue
+            component = 'other'
+            for frame in reversed(stat.traceback):  # del frame más reciente al más antiguo
+                filename = os.path.normpath(frame.filename)
+                match = next((name for name, path in _COMPONENTS.items() if filename.endswith(path)), None)
+                if match:
+                    component = match
+                    break
+            growth[component] += stat.size_diff
+
+        return growth
+
+    @staticmethod
+    def _mb(value: Optional[int]) -> str:
+        return 'N/A' if value is None else f"{value / (1024 * 1024):.1f} MB"
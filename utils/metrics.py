@@ -0,0 +1,117 @@
+"""
+Métricas por ejecución
+Añade un registro JSON por línea en logs/metrics_YYYYMMDD.jsonl
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger('AppleStockBot')
+
+
+class RunMetrics:
+    """
+    Acumula métricas de una ejecución y las escribe como una línea JSON
+
+    Uso:
+        metrics = RunMetrics('scrape')
+        metrics.set('stores', 12)
+        with metrics.timer('notify'):
+            ...
+        metrics.write()
+    """
+
+    def __init__(self, mode: str, log_dir: str = 'logs'):
+        """
+        Inicializa las métricas de una ejecución
+
+        Args:
+            mode: Modo de ejecución ('scrape', 'watch', 'sweep', ...)
+            log_dir: Directorio de los archivos de métricas
+        """
+        self.log_dir = log_dir
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self.data: Dict[str, Any] = {
+            'timestamp': datetime.now().isoformat(),
+            'mode': mode,
+            'timings_ms': {}
+        }
+
+    def set(self, key: str, value: Any) -> None:
+        """Guarda un valor arbitrario"""
+        with self._lock:
+            self.data[key] = value
+
+    def add_timing(self, name: str, elapsed_ms: float) -> None:
+        """Guarda una duración en milisegundos"""
+        with self._lock:
+            self.data['timings_ms'][name] = round(elapsed_ms, 1)
+
+    def timer(self, name: str) -> '_Timer':
+        """
+        Context manager que mide un bloque
+
+        Args:
+            name: Nombre de la duración en timings_ms
+        """
+        return _Timer(self, name)
+
+    def record_result(self, result: Dict[str, Any]) -> None:
+        """Extrae las métricas principales de un resultado del scraper"""
+        self.set('success', bool(result.get('success')))
+        self.set('available', len(result.get('available_stores', [])))
+        self.set('unavailable', len(result.get('unavailable_stores', [])))
+        self.set('has_changes', bool(result.get('has_changes')))
+        if result.get('skipped'):
+            self.set('skipped', True)
+        if result.get('response_to_delivery_ms') is not None:
+            self.add_timing('response_to_delivery', result['response_to_delivery_ms'])
+        for stage, elapsed_ms in (result.get('pipeline_ms') or {}).items():
+            self.add_timing(f'post_{stage}', elapsed_ms)
+
+    def write(self, path: Optional[str] = None) -> Optional[str]:
+        """
+        Añade el registro al archivo de métricas del día
+
+        Args:
+            path: Ruta alternativa del archivo
+
+        Returns:
+            str: Ruta escrita o None si falló
+        """
+        self.add_timing('total', (time.perf_counter() - self.started) * 1000)
+        if not path:
+            os.makedirs(self.log_dir, exist_ok=True)
+            path = os.path.join(self.log_dir, f"metrics_{datetime.now().strftime('%Y%m%d')}.jsonl")
+
+        try:
+            with self._lock:
+                line = json.dumps(self.data, ensure_ascii=False, separators=(',', ':'), default=str)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+            return path
+        except Exception as e:
+            logger.error(f"❌ Error guardando métricas: {e}")
+            return None
+
+
+class _Timer:
+    """Context manager de RunMetrics.timer"""
+
+    def __init__(self, metrics: RunMetrics, name: str):
+        self.metrics = metrics
+        self.name = name
+        self.started = 0.0
+
+    def __enter__(self) -> '_Timer':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.metrics.add_timing(self.name, (time.perf_counter() - self.started) * 1000)
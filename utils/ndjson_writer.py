@@ -0,0 +1,228 @@
+"""
+Salida NDJSON en streaming
+Un registro JSON compacto por línea hacia stdout, un FIFO o un archivo rotativo
+"""
+
+import errno
+import json
+import logging
+import os
+import stat
+import sys
+from datetime import datetime
+from typing import Any, Dict, IO, Optional
+
+from config import Config
+
+logger = logging.getLogger('AppleStockBot')
+
+STDOUT = '-'
+
+
+class NdjsonWriter:
+    """
+    Escribe registros NDJSON con flush inmediato
+
+    Destinos:
+    - '-': stdout (los logs van a stderr, así la salida se puede encadenar con jq)
+    - FIFO existente: se abre sin bloquear; si no hay lector los registros se
+      descartan (contados en `dropped`) y se reintenta en la siguiente escritura
+    - Archivo normal: rota a .1 … .N al superar NDJSON_MAX_MB
+
+    Tipos de registro (campo 'type'):
+    - store: estado de una tienda en la ejecución (en un barrido, con la
+      'location' de la tarea que la observó, emitido al terminar esa tarea)
+    - change: evento new_available / new_unavailable
+    - run: resumen de la ejecución (siempre el último de cada resultado)
+    """
+
+    def __init__(self, target: Optional[str] = None, max_mb: Optional[float] = None,
+                 backups: Optional[int] = None):
+        """
+        Inicializa el writer
+
+        Args:
+            target: '-', ruta de un FIFO o de un archivo (default: Config.NDJSON_TARGET)
+            max_mb: Tamaño de rotación del archivo (default: Config.NDJSON_MAX_MB, 0 = sin rotar)
+            backups: Archivos rotados a conservar (default: Config.NDJSON_BACKUPS)
+        """
+        self.target = target or Config.NDJSON_TARGET
+        self.max_bytes = int((Config.NDJSON_MAX_MB if max_mb is None else max_mb) * 1024 * 1024)
+        self.backups = Config.NDJSON_BACKUPS if backups is None else backups
+        self.is_fifo = self.target != STDOUT and os.path.exists(self.target) and \
+            stat.S_ISFIFO(os.stat(self.target).st_mode)
+        self.written = 0
+        self.dropped = 0
+        self._stream: Optional[IO[str]] = None
+        self._size = 0
+        self._closed = False
+
+    def __enter__(self) -> 'NdjsonWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _open(self) -> Optional[IO[str]]:
+        """Abre el destino si aún no está abierto (None si un FIFO no tiene lector)"""
+        if self._stream is not None:
+            return self._stream
+
+        if self.target == STDOUT:
+            self._stream = sys.stdout
+        elif self.is_fifo:
+            try:
+                fd = os.open(self.target, os.O_WRONLY | os.O_NONBLOCK)
+            except OSError as e:
+                if e.errno == errno.ENXIO:  # Sin lector
+                    return None
+                raise
+            os.set_blocking(fd, True)  # Una vez conectado, el lector marca el ritmo
+            self._stream = os.fdopen(fd, 'w', encoding='utf-8')
+        else:
+            directory = os.path.dirname(self.target)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._stream = open(self.target, 'a', encoding='utf-8')
+            self._size = self._stream.tell()
+        return self._stream
+
+    def _rotate(self) -> None:
+        """Rota target → target.1 → … → target.N"""
+        self._stream.close()
+        self._stream = None
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.target}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.target}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.target, f"{self.target}.1")
+        else:
+            os.remove(self.target)
+
+    def write(self, record: Dict[str, Any]) -> bool:
+        """
+        Escribe un registro y hace flush
+
+        Args:
+            record: Registro serializable a JSON
+
+        Returns:
+            bool: True si se escribió, False si se descartó
+        """
+        if self._closed:
+            return False
+
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':'), default=str) + '\n'
+        line_bytes = len(line.encode('utf-8'))
+
+        try:
+            stream = self._open()
+            if stream is None:
+                self.dropped += 1
+                return False
+
+            if self.max_bytes and not self.is_fifo and self.target != STDOUT \
+                    and self._size and self._size + line_bytes > self.max_bytes:
+                self._rotate()
+                stream = self._open()
+
+            stream.write(line)
+            stream.flush()
+            self._size += line_bytes
+            self.written += 1
+            return True
+
+        except BrokenPipeError:
+            self.dropped += 1
+            if self.is_fifo:
+                # El lector se fue: se reabre cuando vuelva
+                self._discard_stream()
+            else:
+                logger.warning("⚠️ Salida NDJSON cerrada por el consumidor")
+                self._closed = True
+            return False
+
+    def _discard_stream(self) -> None:
+        try:
+            self._stream.close()
+        except OSError:
+            pass
+        self._stream = None
+
+    def write_stores(self, result: Dict[str, Any], location: Optional[str] = None) -> int:
+        """
+        Emite un registro 'store' por tienda del resultado
+
+        Args:
+            result: Resultado con available_stores / unavailable_stores
+            location: Ubicación consultada (tareas de un barrido)
+
+        Returns:
+            int: Registros escritos
+        """
+        base = {'ts': result.get('timestamp') or datetime.now().isoformat(), 'product': result.get('product')}
+        if location:
+            base['location'] = location
+        count = 0
+        for list_name in ('available_stores', 'unavailable_stores'):
+            for store in result.get(list_name, []):
+                count += self.write({'type': 'store', **base, **self._store_fields(store)})
+        return count
+
+    def write_result(self, result: Dict[str, Any], stores: bool = True) -> int:
+        """
+        Emite los registros de un resultado: tiendas, cambios y resumen
+
+        Args:
+            result: Resultado de check_availability_with_cache / apply_cache / barrido
+            stores: False si las tiendas ya se emitieron por tarea (write_stores)
+
+        Returns:
+            int: Registros escritos
+        """
+        ts = result.get('timestamp') or datetime.now().isoformat()
+        base = {'ts': ts, 'product': result.get('product')}
+        count = self.write_stores(result) if stores else 0
+
+        if not result.get('is_first_run'):
+            for event in ('new_available', 'new_unavailable'):
+                for store in (result.get('changes') or {}).get(event, []):
+                    count += self.write({'type': 'change', **base, 'event': event, **self._store_fields(store)})
+
+        summary = {
+            'type': 'run',
+            **base,
+            'success': bool(result.get('success')),
+            'available': len(result.get('available_stores', [])),
+            'total': len(result.get('available_stores', [])) + len(result.get('unavailable_stores', [])),
+            'has_changes': bool(result.get('has_changes')),
+            'is_first_run': bool(result.get('is_first_run')),
+        }
+        if result.get('error'):
+            summary['error'] = result['error']
+        count += self.write(summary)
+        return count
+
+    @staticmethod
+    def _store_fields(store: Dict[str, Any]) -> Dict[str, Any]:
+        """Campos planos de una tienda para un registro"""
+        return {
+            'store_number': store.get('store_number'),
+            'name': store.get('name'),
+            'city': store.get('city'),
+            'state': store.get('state'),
+            'part_number': (store.get('part_info') or {}).get('part_number'),
+            'status': store.get('status'),
+            'available': bool(store.get('available')),
+            'pickup_quote': store.get('pickup_quote'),
+        }
+
+    def close(self) -> None:
+        """Cierra el destino (stdout no se cierra)"""
+        if self._stream is not None and self._stream is not sys.stdout:
+            self._discard_stream()
+        self._stream = None
+        self._closed = True
+        if self.dropped:
+            logger.warning(f"⚠️ NDJSON: {self.dropped} registro(s) descartado(s) sin lector")
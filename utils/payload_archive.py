@@ -0,0 +1,305 @@
+"""
+Archivo comprimido de respuestas crudas de fulfillment-messages
+Segmentos diarios con un índice de offsets para acceso aleatorio
+"""
+
+import json
+import logging
+import os
+import struct
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from config import Config
+from utils.file_lock import FileLock
+
+logger = logging.getLogger('AppleStockBot')
+
+# Registro del índice: timestamp (epoch), offset, longitud comprimida, SKU (ASCII, relleno con \0)
+_SKU_BYTES = 20
+_INDEX_RECORD = struct.Struct(f'<dQI{_SKU_BYTES}s')
+
+
+class ArchiveEntry(NamedTuple):
+    """Entrada del índice del archivo"""
+    day: str            # YYYYMMDD (nombre del segmento)
+    timestamp: float    # epoch en segundos
+    offset: int         # posición del registro en el segmento
+    length: int         # bytes comprimidos
+    sku: str            # número de parte principal del payload
+
+
+class PayloadArchive:
+    """
+    Archivo rotativo de payloads de la API
+
+    Estructura en disco (un par de archivos por día):
+        YYYYMMDD.seg  registros JSON compactos comprimidos con zlib, uno tras otro
+        YYYYMMDD.idx  registros de 40 bytes (timestamp, offset, longitud, SKU)
+
+    Cada registro se comprime por separado, así un payload se recupera con
+    un seek + una descompresión sin leer el resto del día. Cada append
+    escribe segmento e índice bajo un FileLock (archive.lock), así varios
+    procesos pueden archivar a la vez sin intercalar registros ni desalinear
+    los offsets del índice con el segmento.
+    """
+
+    def __init__(self, archive_dir: Optional[str] = None, retention_days: Optional[int] = None):
+        """
+        Inicializa el archivo
+
+        Args:
+            archive_dir: Directorio de segmentos (default: Config.ARCHIVE_DIR)
+            retention_days: Días a conservar (default: Config.ARCHIVE_RETENTION_DAYS, 0 = sin límite)
+        """
+        self.archive_dir = archive_dir or Config.ARCHIVE_DIR
+        self.retention_days = Config.ARCHIVE_RETENTION_DAYS if retention_days is None else retention_days
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self._lock = FileLock(os.path.join(self.archive_dir, 'archive.lock'))
+        self._last_prune_day: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+
+    def append(self, payload: Dict[str, Any], timestamp: Optional[datetime] = None,
+               sku: Optional[str] = None) -> ArchiveEntry:
+        """
+        Archiva un payload
+
+        Args:
+            payload: JSON de fulfillment-messages
+            timestamp: Momento de captura (default: ahora)
+            sku: Número de parte (default: extraído del payload)
+
+        Returns:
+            ArchiveEntry del registro escrito
+        """
+        timestamp = timestamp or datetime.now()
+        sku = sku or self.extract_sku(payload)
+        day = timestamp.strftime('%Y%m%d')
+
+        raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        record = zlib.compress(raw, 9)
+
+        with self._lock:
+            offset = self._append_bytes(self._segment_path(day), record) - len(record)
+            entry = ArchiveEntry(day, timestamp.timestamp(), offset, len(record), sku)
+            self._append_bytes(self._index_path(day), _INDEX_RECORD.pack(
+                entry.timestamp, entry.offset, entry.length,
+                sku.encode('ascii', 'ignore')[:_SKU_BYTES]
+            ))
+
+            if self._last_prune_day != day:
+                self._last_prune_day = day
+                self.prune()
+
+        logger.debug(f"🗄️ Payload archivado: {sku} ({len(raw)} → {len(record)} bytes)")
+        return entry
+
+    @staticmethod
+    def _append_bytes(path: str, data: bytes) -> int:
+        """
+        Añade bytes al final de un archivo (el llamador tiene el lock del archivo)
+
+        Returns:
+            int: Posición del final de lo escrito
+        """
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0)
+        fd = os.open(path, flags, 0o644)
+        try:
+            os.write(fd, data)
+            return os.lseek(fd, 0, os.SEEK_CUR)
+        finally:
+            os.close(fd)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+
+    def days(self) -> List[str]:
+        """
+        Días disponibles en el archivo
+
+        Returns:
+            list: Días YYYYMMDD ordenados
+        """
+        return sorted(name[:-4] for name in os.listdir(self.archive_dir) if name.endswith('.idx'))
+
+    def find(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+             sku: Optional[str] = None) -> List[ArchiveEntry]:
+        """
+        Busca entradas por rango de tiempo y SKU leyendo solo los índices
+
+        Args:
+            start: Inicio del rango (inclusive)
+            end: Fin del rango (inclusive)
+            sku: Número de parte exacto
+
+        Returns:
+            list: Entradas ordenadas por timestamp
+        """
+        first_day = start.strftime('%Y%m%d') if start else None
+        last_day = end.strftime('%Y%m%d') if end else None
+        start_ts = start.timestamp() if start else None
+        end_ts = end.timestamp() if end else None
+
+        entries = []
+        for day in self.days():
+            if (first_day and day < first_day) or (last_day and day > last_day):
+                continue
+            for entry in self._read_index(day):
+                if start_ts is not None and entry.timestamp < start_ts:
+                    continue
+                if end_ts is not None and entry.timestamp > end_ts:
+                    continue
+                if sku and entry.sku != sku:
+                    continue
+                entries.append(entry)
+
+        entries.sort(key=lambda e: e.timestamp)
+        return entries
+
+    def get(self, at: datetime, sku: Optional[str] = None) -> Optional[Tuple[ArchiveEntry, Dict[str, Any]]]:
+        """
+        Recupera el último payload capturado en o antes de un instante
+
+        Args:
+            at: Instante de referencia
+            sku: Número de parte (opcional)
+
+        Returns:
+            tuple (entrada, payload) o None si no hay ninguno
+        """
+        entries = self.find(end=at, sku=sku)
+        if not entries:
+            return None
+        return entries[-1], self.read(entries[-1])
+
+    def read(self, entry: ArchiveEntry) -> Dict[str, Any]:
+        """
+        Lee y descomprime un único payload
+
+        Args:
+            entry: Entrada del índice
+
+        Returns:
+            dict: Payload original
+        """
+        with open(self._segment_path(entry.day), 'rb') as f:
+            f.seek(entry.offset)
+            record = f.read(entry.length)
+        return json.loads(zlib.decompress(record))
+
+    def iter_payloads(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                      sku: Optional[str] = None) -> Iterator[Tuple[ArchiveEntry, Dict[str, Any]]]:
+        """
+        Itera payloads en orden temporal
+
+        Args:
+            start: Inicio del rango (inclusive)
+            end: Fin del rango (inclusive)
+            sku: Número de parte exacto
+
+        Yields:
+            tuple (entrada, payload)
+        """
+        handles: Dict[str, Any] = {}
+        try:
+            for entry in self.find(start, end, sku):
+                f = handles.get(entry.day)
+                if f is None:
+                    f = handles[entry.day] = open(self._segment_path(entry.day), 'rb')
+                f.seek(entry.offset)
+                yield entry, json.loads(zlib.decompress(f.read(entry.length)))
+        finally:
+            for f in handles.values():
+                f.close()
+
+    def _read_index(self, day: str) -> Iterator[ArchiveEntry]:
+        """Lee las entradas del índice de un día"""
+        with open(self._index_path(day), 'rb') as f:
+            data = f.read()
+
+        # Ignorar un registro final incompleto (escritura interrumpida)
+        usable = len(data) - len(data) % _INDEX_RECORD.size
+        for timestamp, offset, length, sku in _INDEX_RECORD.iter_unpack(data[:usable]):
+            yield ArchiveEntry(day, timestamp, offset, length, sku.rstrip(b'\0').decode('ascii'))
+
+    # ------------------------------------------------------------------
+    # Mantenimiento
+    # ------------------------------------------------------------------
+
+    def prune(self) -> int:
+        """
+        Elimina los segmentos más antiguos que la retención configurada
+
+        Returns:
+            int: Número de días eliminados
+        """
+        if not self.retention_days:
+            return 0
+
+        cutoff = (datetime.now() - timedelta(days=self.retention_days)).strftime('%Y%m%d')
+        removed = 0
+        for day in self.days():
+            if day >= cutoff:
+                continue
+            for path in (self._segment_path(day), self._index_path(day)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            removed += 1
+
+        if removed:
+            logger.info(f"🗑️ Archivo de payloads: {removed} día(s) eliminados por retención")
+        return removed
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Tamaño del archivo en disco
+
+        Returns:
+            dict: {'days': int, 'payloads': int, 'bytes': int}
+        """
+        days = self.days()
+        payloads = 0
+        size = 0
+        for day in days:
+            index_size = os.path.getsize(self._index_path(day))
+            payloads += index_size // _INDEX_RECORD.size
+            size += index_size
+            if os.path.exists(self._segment_path(day)):
+                size += os.path.getsize(self._segment_path(day))
+        return {'days': len(days), 'payloads': payloads, 'bytes': size}
+
+    @staticmethod
+    def extract_sku(payload: Dict[str, Any]) -> str:
+        """
+        Obtiene el número de parte principal de un payload
+
+        Args:
+            payload: JSON de fulfillment-messages
+
+        Returns:
+            str: Número de parte o '' si no se encuentra
+        """
+        content = (payload.get('body') or {}).get('content') or {}
+
+        for store in (content.get('pickupMessage') or {}).get('stores', []):
+            for part_number in (store.get('partsAvailability') or {}):
+                return part_number
+
+        for key, value in (content.get('deliveryMessage') or {}).items():
+            if isinstance(value, dict) and 'regular' in value:
+                return key
+
+        return ''
+
+    def _segment_path(self, day: str) -> str:
+        return os.path.join(self.archive_dir, f"{day}.seg")
+
+    def _index_path(self, day: str) -> str:
+        return os.path.join(self.archive_dir, f"{day}.idx")
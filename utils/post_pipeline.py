@@ -0,0 +1,111 @@
+"""
+Pipeline de post-procesado
+Ejecuta en un pool de hilos las etapas posteriores al scrape (caché, archivo, notificaciones)
+"""
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional, Set
+
+from config import Config
+
+logger = logging.getLogger('AppleStockBot')
+
+_pipeline: Optional['PostPipeline'] = None
+_pipeline_lock = threading.Lock()
+
+
+def get_post_pipeline() -> 'PostPipeline':
+    """Pipeline compartido por todos los scrapers del proceso"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = PostPipeline()
+        return _pipeline
+
+
+class PostPipeline:
+    """
+    Etapas de post-procesado en paralelo
+
+    Persistir el caché, archivar el payload y enviar notificaciones no
+    dependen entre sí ni del navegador: se encolan aquí mientras el hilo de
+    Playwright (el único que puede hacerlo) cierra el navegador. Una
+    ejecución tarda así lo que su etapa más lenta y no la suma de todas.
+
+    drain() espera a que terminen las etapas pendientes; también se llama
+    al salir del proceso (atexit) para no perder escrituras.
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: Hilos del pool (default: Config.POST_WORKERS)
+        """
+        self._executor = ThreadPoolExecutor(max_workers=workers or Config.POST_WORKERS,
+                                            thread_name_prefix='post')
+        self._lock = threading.Lock()
+        self._pending: Set[Future] = set()
+        self._timings: Dict[str, float] = {}
+        atexit.register(self.drain)
+
+    def submit(self, stage: str, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Encola una etapa
+
+        Args:
+            stage: Nombre de la etapa (para logs y timings)
+            fn: Función a ejecutar con *args/**kwargs
+
+        Returns:
+            Future con el resultado de fn (las excepciones se registran y se propagan)
+        """
+        def run() -> Any:
+            started = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"❌ Etapa de post-procesado '{stage}' falló: {e}", exc_info=True)
+                raise
+            finally:
+                with self._lock:
+                    self._timings[stage] = self._timings.get(stage, 0.0) + (time.perf_counter() - started) * 1000
+
+        future = self._executor.submit(run)
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def _discard(self, future: Future) -> None:
+        with self._lock:
+            self._pending.discard(future)
+
+    def drain(self, timeout: Optional[float] = None) -> Dict[str, float]:
+        """
+        Espera a las etapas pendientes (incluidas las que encolen mientras tanto)
+
+        Args:
+            timeout: Segundos máximos de espera (None = sin límite)
+
+        Returns:
+            dict: Milisegundos por etapa desde el último drain
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                pending = set(self._pending)
+            if not pending:
+                break
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            wait(pending, timeout=remaining)
+            if deadline is not None and time.monotonic() >= deadline:
+                logger.warning(f"⚠️ Post-procesado: {len(self._pending)} etapa(s) sin terminar")
+                break
+
+        with self._lock:
+            timings, self._timings = self._timings, {}
+        return {stage: round(ms, 1) for stage, ms in timings.items()}
@@ -0,0 +1,112 @@
+"""
+Medición de memoria (RSS) del proceso y de sus procesos hijos
+Usa psutil (requirements.txt); si falta, /proc en Linux
+"""
+
+import logging
+import os
+from typing import Dict, List, Optional
+
+try:
+    import psutil  # En requirements.txt: necesario en Windows/macOS
+except ImportError:
+    psutil = None
+
+logger = logging.getLogger('AppleStockBot')
+
+_warned = False
+
+
+def _unavailable() -> None:
+    """Avisa una sola vez de que no hay forma de medir memoria (sin psutil ni /proc)"""
+    global _warned
+    if not _warned:
+        _warned = True
+        logger.warning("⚠️ psutil no está instalado y no hay /proc: no se medirá la memoria "
+                       "(pip install -r requirements.txt)")
+
+
+def _proc_rss(pid: int) -> Optional[int]:
+    """RSS en bytes leído de /proc/<pid>/status"""
+    try:
+        with open(f'/proc/{pid}/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _proc_children(pid: int) -> List[int]:
+    """Descendientes de un proceso recorriendo /proc"""
+    parents: Dict[int, List[int]] = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat', 'r') as f:
+                # El nombre del proceso va entre paréntesis y puede contener espacios
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        parents.setdefault(ppid, []).append(int(entry))
+
+    result: List[int] = []
+    pending = [pid]
+    while pending:
+        children = parents.get(pending.pop(), [])
+        result.extend(children)
+        pending.extend(children)
+    return result
+
+
+def get_rss(pid: Optional[int] = None) -> Optional[int]:
+    """
+    RSS de un proceso
+
+    Args:
+        pid: PID (default: proceso actual)
+
+    Returns:
+        int: Bytes residentes, o None si no se puede medir en esta plataforma
+    """
+    pid = pid or os.getpid()
+    if psutil:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    if os.path.isdir('/proc'):
+        return _proc_rss(pid)
+    _unavailable()
+    return None
+
+
+def get_children_rss(pid: Optional[int] = None) -> Optional[int]:
+    """
+    RSS total de los descendientes de un proceso (driver de Playwright y Chromium)
+
+    Args:
+        pid: PID raíz (default: proceso actual)
+
+    Returns:
+        int: Bytes residentes sumados, o None si no se puede medir
+    """
+    pid = pid or os.getpid()
+    if psutil:
+        total = 0
+        try:
+            children = psutil.Process(pid).children(recursive=True)
+        except psutil.Error:
+            return None
+        for child in children:
+            try:
+                total += child.memory_info().rss
+            except psutil.Error:
+                continue
+        return total
+    if os.path.isdir('/proc'):
+        return sum(_proc_rss(child) or 0 for child in _proc_children(pid))
+    _unavailable()
+    return None
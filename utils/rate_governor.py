@@ -0,0 +1,209 @@
+"""
+Gobernador de tasa para las peticiones a Apple
+Token buckets por host y por endpoint compartidos por todos los procesos mediante un archivo
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from config import Config
+from utils.file_lock import FileLock
+from utils.proxy_pool import proxy_label
+
+logger = logging.getLogger('AppleStockBot')
+
+# (tipo de endpoint, patrón sobre la ruta) - el primero que coincide gana
+ENDPOINT_PATTERNS: List[Tuple[str, re.Pattern]] = [
+    ('fulfillment', re.compile(r'/shop/fulfillment-messages')),
+    ('autocomplete', re.compile(r'/shop/(address-lookup|store-search|.*autocomplete)')),
+    ('product', re.compile(r'/shop/buy-')),
+]
+
+# En la página solo se interceptan XHR/fetch: imágenes, fuentes y scripts no gastan
+# cupo, y las navegaciones se gobiernan antes de page.goto (la espera no consume
+# el timeout de navegación)
+ROUTE_RESOURCE_TYPES = ('xhr', 'fetch')
+
+# Rutas que Playwright intercepta (el resto de peticiones no pasa por Python)
+ROUTE_PATTERN = re.compile(r'^https://www\.apple\.com/shop/')
+
+# Endpoints que consume una verificación completa (para planificar)
+TASK_ENDPOINTS = ('product', 'autocomplete', 'fulfillment')
+
+
+class RateGovernor:
+    """
+    Token buckets por host (y salida) y por (host, endpoint)
+
+    Cada petición reserva un token de su bucket de host y de su bucket de
+    endpoint; si alguno queda en negativo la petición espera lo necesario
+    para que se rellene. Al reservar por adelantado, procesos concurrentes
+    quedan en cola en lugar de competir, y la tasa agregada nunca supera el
+    techo configurado mientras el hueco disponible se aprovecha entero.
+
+    Con PROXY_URLS el bucket de host es por proxy de salida (el límite de
+    Apple es por IP), mientras que los de endpoint siguen siendo globales.
+
+    El estado vive en CACHE_DIR/rate_governor.json bajo un FileLock, así lo
+    comparten los workers del barrido y ejecuciones simultáneas.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, limits: Optional[Dict[str, float]] = None,
+                 burst: Optional[int] = None):
+        """
+        Inicializa el gobernador
+
+        Args:
+            cache_dir: Directorio del estado compartido (default: Config.CACHE_DIR)
+            limits: Peticiones por minuto por clave ('host', 'product', 'autocomplete',
+                    'fulfillment'). Default: RATE_*_PER_MIN de Config
+            burst: Capacidad de cada bucket (default: Config.RATE_BURST)
+        """
+        cache_dir = cache_dir or Config.CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.state_file = os.path.join(cache_dir, 'rate_governor.json')
+        self.lock = FileLock(os.path.join(cache_dir, 'rate_governor.lock'))
+        self.limits = limits or {
+            'host': Config.RATE_HOST_PER_MIN,
+            'product': Config.RATE_PRODUCT_PER_MIN,
+            'autocomplete': Config.RATE_AUTOCOMPLETE_PER_MIN,
+            'fulfillment': Config.RATE_FULFILLMENT_PER_MIN,
+        }
+        self.burst = burst or Config.RATE_BURST
+        self.waits = 0
+        self.waited_seconds = 0.0
+
+    @staticmethod
+    def classify(url: str) -> Optional[Tuple[str, str]]:
+        """
+        Clasifica una URL
+
+        Returns:
+            tuple (host, endpoint) o None si la URL no está gobernada
+        """
+        parts = urlsplit(url)
+        for endpoint, pattern in ENDPOINT_PATTERNS:
+            if pattern.search(parts.path):
+                return parts.hostname or '', endpoint
+        return None
+
+    def _buckets(self, host: str, endpoints: Iterable[str],
+                 egress: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Claves de bucket y su tasa (peticiones/minuto) para un host, endpoints y salida"""
+        host_key = f"host:{host}@{egress}" if egress else f"host:{host}"
+        keys = [(host_key, self.limits['host'])]
+        keys += [(f"{host}:{endpoint}", self.limits[endpoint]) for endpoint in endpoints]
+        return [(key, rate) for key, rate in keys if rate > 0]
+
+    def _refill(self, state: Dict[str, List[float]], key: str, rate: float, now: float) -> float:
+        tokens, updated = state.get(key, [float(self.burst), now])
+        return min(float(self.burst), tokens + max(0.0, now - updated) * rate / 60)
+
+    def _load(self) -> Dict[str, List[float]]:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, state: Dict[str, List[float]]) -> None:
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+
+    def reserve(self, host: str, endpoint: str, egress: Optional[str] = None) -> float:
+        """
+        Reserva un token en los buckets del host y del endpoint
+
+        Args:
+            host: Host de la petición
+            endpoint: Tipo de endpoint (ver ENDPOINT_PATTERNS)
+            egress: Proxy de salida (proxy_label); None = conexión directa
+
+        Returns:
+            float: Segundos a esperar antes de enviar la petición
+        """
+        with self.lock:
+            state = self._load()
+            now = time.time()
+            delay = 0.0
+            for key, rate in self._buckets(host, [endpoint], egress):
+                tokens = self._refill(state, key, rate, now) - 1
+                state[key] = [tokens, now]
+                if tokens < 0:
+                    delay = max(delay, -tokens * 60 / rate)
+            self._save(state)
+        return delay
+
+    def acquire(self, url: str, egress: Optional[str] = None) -> float:
+        """
+        Espera el turno de una petición (no-op si la URL no está gobernada)
+
+        Args:
+            url: URL de la petición
+            egress: Proxy de salida (proxy_label); None = conexión directa
+
+        Returns:
+            float: Segundos esperados
+        """
+        target = self.classify(url)
+        if not target:
+            return 0.0
+
+        delay = self.reserve(*target, egress)
+        if delay > 0:
+            self.waits += 1
+            self.waited_seconds += delay
+            logger.info(f"🚦 Límite de tasa ({target[1]}): esperando {delay:.1f}s")
+            time.sleep(delay)
+        return delay
+
+    def next_delay(self, host: str = 'www.apple.com', endpoints: Iterable[str] = TASK_ENDPOINTS,
+                   egresses: Optional[Iterable[str]] = None) -> float:
+        """
+        Segundos hasta que todos los buckets indicados tengan un token, sin reservar
+
+        Lo usa el planificador (watch, barrido) para no arrancar un navegador
+        que solo iría a esperar al gobernador. Con varias salidas basta con
+        que una tenga cupo.
+
+        Args:
+            egresses: Salidas a considerar (default: los proxies de PROXY_URLS,
+                      o la conexión directa si no hay)
+        """
+        if egresses is None:
+            egresses = [proxy_label(url) for url in Config.PROXY_URLS] or [None]
+        with self.lock:
+            state = self._load()
+        now = time.time()
+        best = None
+        for egress in egresses:
+            delay = 0.0
+            for key, rate in self._buckets(host, endpoints, egress):
+                tokens = self._refill(state, key, rate, now)
+                if tokens < 1:
+                    delay = max(delay, (1 - tokens) * 60 / rate)
+            best = delay if best is None else min(best, delay)
+        return best or 0.0
+
+    def install(self, page, egress: Optional[str] = None) -> None:
+        """
+        Gobierna las peticiones XHR/fetch de una página de Playwright
+
+        Args:
+            page: Page (la ruta se libera al cerrar su contexto)
+            egress: Proxy de salida del contexto de la página (proxy_label)
+        """
+        def handle_route(route):
+            request = route.request
+            if request.resource_type in ROUTE_RESOURCE_TYPES:
+                self.acquire(request.url, egress)
+            route.continue_()
+
+        page.route(ROUTE_PATTERN, handle_route)
@@ -0,0 +1,104 @@
+"""
+Coalescencia de peticiones con caché de TTL corto
+Peticiones concurrentes con la misma clave comparten una sola ejecución
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Call:
+    """Ejecución en curso compartida por todos los que piden la misma clave"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Singleflight + caché en memoria
+
+    - Si hay un resultado fresco (menos de `ttl` segundos) se devuelve sin ejecutar.
+    - Si otra llamada con la misma clave está en curso, se espera su resultado.
+    - Si no, esta llamada ejecuta la función y comparte el resultado.
+
+    Thread-safe dentro de un proceso.
+    """
+
+    def __init__(self, ttl: float = 0):
+        """
+        Inicializa el singleflight
+
+        Args:
+            ttl: Segundos que un resultado sigue sirviéndose desde caché (0 = sin caché)
+        """
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, _Call] = {}
+        self._cache: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any],
+           cacheable: Callable[[Any], bool] = lambda value: True) -> Tuple[Any, str]:
+        """
+        Obtiene el valor de una clave ejecutando `fn` como máximo una vez a la vez
+
+        Args:
+            key: Clave de la petición
+            fn: Función que produce el valor
+            cacheable: Indica si un valor puede guardarse en caché (p. ej. solo éxitos)
+
+        Returns:
+            tuple (valor, origen) con origen 'cache', 'coalesced' o 'fetch'
+        """
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > time.monotonic():
+                return cached[1], 'cache'
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.value, 'coalesced'
+
+        try:
+            call.value = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                if call.error is None and self.ttl > 0 and cacheable(call.value):
+                    self._cache[key] = (time.monotonic() + self.ttl, call.value)
+            call.done.set()
+
+        return call.value, 'fetch'
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Elimina resultados en caché
+
+        Args:
+            key: Clave a eliminar (None = todas)
+        """
+        with self._lock:
+            if key is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(key, None)
+
+    def purge_expired(self) -> None:
+        """Elimina entradas vencidas (para procesos de larga duración)"""
+        now = time.monotonic()
+        with self._lock:
+            for key in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+                del self._cache[key]
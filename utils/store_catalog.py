@@ -0,0 +1,372 @@
+"""
+Catálogo de tiendas Apple
+Datos estáticos de cada tienda (nombre, ubicación, coordenadas) construidos
+a partir de los payloads de fulfillment-messages
+"""
+
+import csv
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import Config
+from utils.file_lock import FileLock
+from utils.geo_index import GeoIndex
+
+logger = logging.getLogger('AppleStockBot')
+
+US_STATES = {
+    'ALABAMA': 'AL', 'ALASKA': 'AK', 'ARIZONA': 'AZ', 'ARKANSAS': 'AR', 'CALIFORNIA': 'CA',
+    'COLORADO': 'CO', 'CONNECTICUT': 'CT', 'DELAWARE': 'DE', 'DISTRICT OF COLUMBIA': 'DC',
+    'FLORIDA': 'FL', 'GEORGIA': 'GA', 'HAWAII': 'HI', 'IDAHO': 'ID', 'ILLINOIS': 'IL',
+    'INDIANA': 'IN', 'IOWA': 'IA', 'KANSAS': 'KS', 'KENTUCKY': 'KY', 'LOUISIANA': 'LA',
+    'MAINE': 'ME', 'MARYLAND': 'MD', 'MASSACHUSETTS': 'MA', 'MICHIGAN': 'MI', 'MINNESOTA': 'MN',
+    'MISSISSIPPI': 'MS', 'MISSOURI': 'MO', 'MONTANA': 'MT', 'NEBRASKA': 'NE', 'NEVADA': 'NV',
+    'NEW HAMPSHIRE': 'NH', 'NEW JERSEY': 'NJ', 'NEW MEXICO': 'NM', 'NEW YORK': 'NY',
+    'NORTH CAROLINA': 'NC', 'NORTH DAKOTA': 'ND', 'OHIO': 'OH', 'OKLAHOMA': 'OK', 'OREGON': 'OR',
+    'PENNSYLVANIA': 'PA', 'RHODE ISLAND': 'RI', 'SOUTH CAROLINA': 'SC', 'SOUTH DAKOTA': 'SD',
+    'TENNESSEE': 'TN', 'TEXAS': 'TX', 'UTAH': 'UT', 'VERMONT': 'VT', 'VIRGINIA': 'VA',
+    'WASHINGTON': 'WA', 'WEST VIRGINIA': 'WV', 'WISCONSIN': 'WI', 'WYOMING': 'WY',
+}
+
+
+def normalize_state(state: str) -> str:
+    """'Florida' / 'florida' / 'FL' → 'FL'"""
+    state = (state or '').strip().upper()
+    return US_STATES.get(state, state)
+
+
+class StoreCatalog:
+    """
+    Catálogo persistente de tiendas indexado por store_number
+
+    Se actualiza con cada payload (solo se escribe a disco si algo cambió)
+    y mantiene un índice espacial para responder localmente preguntas como
+    "tiendas a 50 millas del ZIP X" o "qué búsquedas cubren Florida".
+
+    Los workers de un barrido lo actualizan a la vez: cada escritura toma
+    CACHE_DIR/store_catalog.lock, relee el archivo y aplica encima solo las
+    tiendas que cambiaron en este proceso.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        """
+        Inicializa el catálogo
+
+        Args:
+            cache_dir: Directorio del catálogo (default: Config.CACHE_DIR)
+        """
+        cache_dir = cache_dir or Config.CACHE_DIR
+        os.makedirs(cache_dir, exist_ok=True)
+        self.catalog_file = os.path.join(cache_dir, 'store_catalog.json')
+        self.lock = FileLock(os.path.join(cache_dir, 'store_catalog.lock'))
+        # store_number → si pisa la versión del disco (False = solo si falta)
+        self._dirty: Dict[str, bool] = {}
+        with self.lock:
+            self.stores: Dict[str, Dict[str, Any]] = self._load()
+        self._index: Optional[GeoIndex] = None
+        self._zip_centroids: Optional[Dict[str, Tuple[float, float]]] = None
+
+    def _read(self) -> Dict[str, Dict[str, Any]]:
+        """Catálogo en disco (lanza si el archivo existe pero no es JSON válido)"""
+        if not os.path.exists(self.catalog_file):
+            return {}
+        with open(self.catalog_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return self._read()
+        except Exception as e:
+            logger.error(f"❌ Error cargando catálogo de tiendas: {e}")
+            return {}
+
+    def save(self) -> bool:
+        """
+        Persiste las tiendas modificadas en este proceso
+
+        Bajo el lock se relee el archivo y se aplican encima solo las
+        entradas cambiadas aquí, así un worker no borra lo que añadió otro
+        ni pisa con datos viejos lo que otro actualizó.
+        Se escribe en un temporal único y se reemplaza de forma atómica.
+
+        Returns:
+            bool: True si se guardó
+        """
+        try:
+            with self.lock:
+                try:
+                    on_disk = self._read()
+                except ValueError as e:
+                    logger.warning(f"⚠️ Catálogo de tiendas ilegible, se reescribe: {e}")
+                    on_disk = {}
+                # El catálogo solo crece: lo que conoce este proceso tampoco se pierde
+                merged = {**self.stores, **on_disk}
+                for store_number, overwrite in self._dirty.items():
+                    if overwrite or store_number not in on_disk:
+                        merged[store_number] = self.stores[store_number]
+
+                fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(self.catalog_file),
+                                                prefix='store_catalog.', suffix='.tmp')
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(merged, f, ensure_ascii=False, separators=(',', ':'))
+                    os.replace(tmp_file, self.catalog_file)
+                except BaseException:
+                    if os.path.exists(tmp_file):
+                        os.remove(tmp_file)
+                    raise
+
+            self.stores = merged
+            self._dirty.clear()
+            self._index = None
+            return True
+        except Exception as e:
+            logger.error(f"❌ Error guardando catálogo de tiendas: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Actualización
+    # ------------------------------------------------------------------
+
+    def update_from_payload(self, payload: Dict[str, Any]) -> int:
+        """
+        Incorpora las tiendas de un payload de fulfillment-messages
+
+        Args:
+            payload: JSON de la API
+
+        Returns:
+            int: Tiendas nuevas o modificadas
+        """
+        content = (payload.get('body') or {}).get('content') or {}
+        stores = (content.get('pickupMessage') or {}).get('stores', [])
+        return self.update_from_stores(stores)
+
+    def update_from_stores(self, stores: List[Dict[str, Any]]) -> int:
+        """
+        Incorpora tiendas en el formato crudo de la API
+
+        Args:
+            stores: Lista pickupMessage.stores
+
+        Returns:
+            int: Tiendas nuevas o modificadas (0 = no se escribe a disco)
+        """
+        changed = 0
+        for store in stores:
+            store_number = store.get('storeNumber')
+            if not store_number:
+                continue
+
+            address = store.get('address') or {}
+            entry = {
+                'name': store.get('storeName', 'Unknown Store'),
+                'city': store.get('city', ''),
+                'state': store.get('state', ''),
+                'postal_code': address.get('postalCode', ''),
+                'latitude': self._to_float(store.get('storelatitude')),
+                'longitude': self._to_float(store.get('storelongitude')),
+            }
+
+            previous = self.stores.get(store_number)
+            if previous and all(previous.get(k) == v for k, v in entry.items()):
+                continue
+
+            entry['updated'] = datetime.now().isoformat(timespec='seconds')
+            self.stores[store_number] = entry
+            self._dirty[store_number] = True
+            changed += 1
+
+        if changed:
+            self._index = None
+            self.save()
+            logger.info(f"🗺️ Catálogo de tiendas actualizado: {changed} tienda(s)")
+        return changed
+
+    def add_missing(self, stores: List[Dict[str, Any]]) -> int:
+        """
+        Añade tiendas ya parseadas que falten en el catálogo (sin coordenadas)
+
+        Garantiza que un snapshot compacto siempre pueda unirse con el
+        catálogo, aunque sus tiendas no pasaran por update_from_stores en
+        este proceso (p. ej. resultados fusionados de un barrido).
+
+        Args:
+            stores: Tiendas en el formato de _parse_fulfillment_data
+
+        Returns:
+            int: Tiendas añadidas
+        """
+        missing = [s for s in stores if s.get('store_number') and s['store_number'] not in self.stores]
+        if not missing:
+            return 0
+
+        # Otro proceso pudo añadirlas (con coordenadas): no pisar su versión
+        self.reload()
+        added = 0
+        for store in missing:
+            if store['store_number'] in self.stores:
+                continue
+            self.stores[store['store_number']] = {
+                'name': store.get('name', 'Unknown Store'),
+                'city': store.get('city', ''),
+                'state': store.get('state', ''),
+                'postal_code': '',
+                'latitude': None,
+                'longitude': None,
+                'updated': datetime.now().isoformat(timespec='seconds'),
+            }
+            self._dirty.setdefault(store['store_number'], False)
+            added += 1
+
+        if added:
+            self.save()
+        return added
+
+    def reload(self) -> None:
+        """Incorpora lo que otros procesos hayan escrito en el catálogo"""
+        with self.lock:
+            on_disk = self._load()
+        # Lo pendiente de guardar en este proceso manda sobre el disco
+        self.stores.update({k: v for k, v in on_disk.items() if k not in self._dirty})
+        self._index = None
+
+    @staticmethod
+    def _to_float(value: Any) -> Optional[float]:
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def get(self, store_number: str) -> Optional[Dict[str, Any]]:
+        """Datos de una tienda o None"""
+        return self.stores.get(store_number)
+
+    @property
+    def index(self) -> GeoIndex:
+        """Índice espacial (se reconstruye solo cuando cambia el catálogo)"""
+        if self._index is None:
+            self._index = GeoIndex([
+                (number, s['latitude'], s['longitude'])
+                for number, s in self.stores.items()
+                if s.get('latitude') is not None and s.get('longitude') is not None
+            ])
+        return self._index
+
+    def resolve_location(self, location: str) -> Optional[Tuple[float, float]]:
+        """
+        Convierte una ubicación en coordenadas sin consultar a Apple
+
+        Acepta "lat,lon", un ZIP de alguna tienda del catálogo o un ZIP de
+        ZIP_CENTROIDS_FILE (CSV zip,lat,lon opcional).
+
+        Args:
+            location: Ubicación
+
+        Returns:
+            tuple (lat, lon) o None si no se puede resolver
+        """
+        location = location.strip()
+
+        if ',' in location:
+            try:
+                lat, lon = (float(part) for part in location.split(',', 1))
+                return lat, lon
+            except ValueError:
+                pass
+
+        zip_code = location[:5]
+        for store in self.stores.values():
+            if store.get('postal_code', '')[:5] == zip_code and store.get('latitude') is not None:
+                return store['latitude'], store['longitude']
+
+        return self._load_zip_centroids().get(zip_code)
+
+    def _load_zip_centroids(self) -> Dict[str, Tuple[float, float]]:
+        """Carga (una vez) el CSV opcional de centroides de ZIP"""
+        if self._zip_centroids is not None:
+            return self._zip_centroids
+
+        self._zip_centroids = {}
+        path = Config.ZIP_CENTROIDS_FILE
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for row in csv.reader(f):
+                    try:
+                        self._zip_centroids[row[0].strip()[:5]] = (float(row[1]), float(row[2]))
+                    except (IndexError, ValueError):
+                        continue
+        return self._zip_centroids
+
+    def stores_within(self, location: str, miles: float) -> List[Tuple[str, float]]:
+        """
+        Tiendas dentro de un radio
+
+        Args:
+            location: "lat,lon" o ZIP
+            miles: Radio en millas
+
+        Returns:
+            list: (store_number, distancia) ordenados por distancia
+
+        Raises:
+            ValueError: Si la ubicación no se puede resolver localmente
+        """
+        coords = self.resolve_location(location)
+        if coords is None:
+            raise ValueError(f"Ubicación desconocida para el catálogo: {location}")
+        return self.index.within_radius(coords[0], coords[1], miles)
+
+    def stores_in_state(self, state: str) -> List[str]:
+        """Tiendas de un estado ('Florida' o 'FL')"""
+        code = normalize_state(state)
+        return [number for number, s in self.stores.items() if normalize_state(s.get('state', '')) == code]
+
+    def search_location_for(self, store_number: str) -> str:
+        """Texto de búsqueda que centra el buscador de Apple en una tienda"""
+        store = self.stores[store_number]
+        return store.get('postal_code') or f"{store.get('city', '')}, {store.get('state', '')}"
+
+    def covering_locations(self, store_numbers: List[str],
+                           stores_per_search: Optional[int] = None) -> List[str]:
+        """
+        Conjunto mínimo (greedy) de búsquedas que cubre unas tiendas
+
+        Se asume que una búsqueda centrada en una tienda devuelve sus
+        `stores_per_search` tiendas más cercanas, como hace el buscador
+        de Apple. Se elige repetidamente la búsqueda que cubre más
+        tiendas pendientes (aproximación ln(n) al set cover óptimo).
+
+        Args:
+            store_numbers: Tiendas a cubrir
+            stores_per_search: Tiendas por respuesta (default: Config.STORES_PER_SEARCH)
+
+        Returns:
+            list: Textos de búsqueda (ZIP o "Ciudad, ST")
+        """
+        k = stores_per_search or Config.STORES_PER_SEARCH
+        pending = {n for n in store_numbers if self.stores.get(n, {}).get('latitude') is not None}
+
+        coverage = {}
+        for number in pending:
+            store = self.stores[number]
+            coverage[number] = {key for key, _ in self.index.nearest(store['latitude'], store['longitude'], k)}
+
+        locations = []
+        while pending:
+            best = max(coverage, key=lambda n: len(coverage[n] & pending))
+            covered = coverage.pop(best) & pending
+            if not covered:
+                break
+            pending -= covered
+            locations.append(self.search_location_for(best))
+
+        return locations